@@ -2,6 +2,7 @@ from defconQt import representationFactories
 from defconQt import icons_db  # noqa
 from defconQt.fontView import Application, MainWindow
 from defconQt.objects.defcon import TFont
+from defconQt.objects import undoManager
 import sys
 import os
 from PyQt5.QtCore import QSettings
@@ -23,6 +24,8 @@ def main():
     app.setApplicationName("TruFont")
     app.setWindowIcon(QIcon(":/resources/app.png"))
     settings = QSettings()
+    undoMemory = settings.value("misc/undoMemory", 64, int)
+    undoManager.setGlobalMaxCost(undoMemory * 1024 * 1024)
     glyphListPath = settings.value("settings/glyphListPath", "", type=str)
     if glyphListPath and os.path.exists(glyphListPath):
         from defconQt.util import glyphList
@@ -4,14 +4,20 @@ from defconQt.fontInfo import TabDialog
 from defconQt.glyphCollectionView import GlyphCollectionWidget
 from defconQt.glyphView import MainGlyphWindow
 from defconQt.groupsView import GroupsWindow
+from defconQt.profilerWindow import ProfilerWindow
 from defconQt.scriptingWindow import MainScriptingWindow
 from defconQt.objects.colorWidgets import ColorVignette
-from defconQt.objects.defcon import GlyphSet, TComponent, TFont, TGlyph
+from defconQt.objects.defcon import (
+    GlyphSet, LazyGlyphList, TComponent, TFont, TGlyph)
+from defconQt.objects.glyphIndex import GlyphIndex
+from defconQt.objects import undoManager
 from defconQt.util import platformSpecific
+from defconQt.util.refreshScheduler import refreshScheduler
 from defcon import Color
 from defconQt.metricsWindow import MainMetricsWindow, comboBoxItems
 from PyQt5.QtCore import (
-    pyqtSignal, QEvent, QMimeData, QRegularExpression, QSettings, Qt)
+    pyqtSignal, QEvent, QMimeData, QRegularExpression, QSettings, Qt, QThread,
+    QTimer)
 from PyQt5.QtGui import (
     QColor, QCursor, QIcon, QIntValidator, QKeySequence, QPixmap,
     QRegularExpressionValidator, QTextCursor)
@@ -19,13 +25,16 @@ from PyQt5.QtWidgets import (
     QAbstractItemView, QAction, QApplication, QCheckBox, QComboBox, QDialog,
     QDialogButtonBox, QFileDialog, QGridLayout, QGroupBox, QHBoxLayout, QLabel,
     QLineEdit, QListWidget, QListWidgetItem, QMainWindow, QMenu, QMessageBox,
-    QPlainTextEdit, QPushButton, QRadioButton, QSlider, QSplitter, QTabWidget,
-    QTextEdit, QToolTip, QTreeWidget, QTreeWidgetItem, QVBoxLayout, QWidget)
+    QPlainTextEdit, QProgressDialog, QPushButton, QRadioButton, QSlider,
+    QSpinBox, QSplitter, QTabWidget, QTextEdit, QToolTip, QTreeWidget,
+    QTreeWidgetItem, QVBoxLayout, QWidget)
 from collections import OrderedDict
 import os
 import pickle
 import platform
+import re
 import subprocess
+import time
 
 cannedDesign = [
     dict(type="cannedDesign", allowPseudoUnicode=True)
@@ -284,11 +293,13 @@ class InspectorWindow(QWidget):
         controlPointBounds = self._glyph.controlPointBounds
         if controlPointBounds is None:
             return
+        self._glyph.prepareUndo("Horizontal Symmetry")
         xMin, _, xMax, _ = controlPointBounds
-        for contour in self._glyph:
-            for point in contour:
-                point.x = xMin + xMax - point.x
-        self._glyph.dirty = True
+        with self._glyph.batchNotifications():
+            for contour in self._glyph:
+                for point in contour:
+                    point.x = xMin + xMax - point.x
+                contour.dirty = True
 
     def vSymmetry(self):
         if self._glyph is None:
@@ -296,11 +307,13 @@ class InspectorWindow(QWidget):
         controlPointBounds = self._glyph.controlPointBounds
         if controlPointBounds is None:
             return
+        self._glyph.prepareUndo("Vertical Symmetry")
         _, yMin, _, yMax = controlPointBounds
-        for contour in self._glyph:
-            for point in contour:
-                point.y = yMin + yMax - point.y
-        self._glyph.dirty = True
+        with self._glyph.batchNotifications():
+            for contour in self._glyph:
+                for point in contour:
+                    point.y = yMin + yMax - point.y
+                contour.dirty = True
 
     def lockMove(self, checked):
         self.moveYEdit.setEnabled(not checked)
@@ -312,7 +325,9 @@ class InspectorWindow(QWidget):
         else:
             y = self.moveYEdit.text()
         x, y = int(x) if x != "" else 0, int(y) if y != "" else 0
-        self._glyph.move((x, y))
+        self._glyph.prepareUndo("Move", coalesce="move")
+        with self._glyph.batchNotifications():
+            self._glyph.move((x, y))
 
     def lockScale(self, checked):
         self.scaleYEdit.setEnabled(not checked)
@@ -332,11 +347,13 @@ class InspectorWindow(QWidget):
         sX /= 100
         sY /= 100
         xMin, yMin, _, _ = controlPointBounds
-        for contour in self._glyph:
-            for point in contour:
-                point.x = xMin + (point.x - xMin) * sX
-                point.y = yMin + (point.y - yMin) * sY
-        self._glyph.dirty = True
+        self._glyph.prepareUndo("Scale", coalesce="scale")
+        with self._glyph.batchNotifications():
+            for contour in self._glyph:
+                for point in contour:
+                    point.x = xMin + (point.x - xMin) * sX
+                    point.y = yMin + (point.y - yMin) * sY
+                contour.dirty = True
 
     def updateGlyph(self):
         app = QApplication.instance()
@@ -348,7 +365,7 @@ class InspectorWindow(QWidget):
         self._glyph = app.currentGlyph()
         if self._glyph is not None:
             self._glyph.addObserver(
-                self, "updateGlyphAttributes", "Glyph.Changed")
+                self, "_glyphChanged", "Glyph.Changed")
             layerSet = self._glyph.layerSet
             if layerSet is not None:
                 layerSet.addObserver(
@@ -356,9 +373,14 @@ class InspectorWindow(QWidget):
         self.updateGlyphAttributes()
         self.updateLayerAttributes()
 
-    def updateGlyphAttributes(self, notification=None):
+    def _glyphChanged(self, notification):
         if self._blocked:
             return
+        refreshScheduler().schedule(
+            self, "glyphAttributes", self.updateGlyphAttributes)
+
+    def updateGlyphAttributes(self):
+        refreshScheduler().cancel(self, "glyphAttributes")
         name = None
         unicodes = None
         width = None
@@ -414,6 +436,7 @@ class InspectorWindow(QWidget):
         if self._glyph is None:
             return
         self._blocked = True
+        self._glyph.prepareUndo("Rename", coalesce="name")
         self._glyph.name = self.nameEdit.text()
         self._blocked = False
 
@@ -421,6 +444,7 @@ class InspectorWindow(QWidget):
         if self._glyph is None:
             return
         self._blocked = True
+        self._glyph.prepareUndo("Unicodes", coalesce="unicodes")
         unicodes = self.unicodesEdit.text().split(" ")
         if len(unicodes) == 1 and unicodes[0] == "":
             self._glyph.unicodes = []
@@ -432,6 +456,7 @@ class InspectorWindow(QWidget):
         if self._glyph is None:
             return
         self._blocked = True
+        self._glyph.prepareUndo("Width", coalesce="width")
         self._glyph.width = int(self.widthEdit.text())
         self._blocked = False
 
@@ -439,6 +464,7 @@ class InspectorWindow(QWidget):
         if self._glyph is None:
             return
         self._blocked = True
+        self._glyph.prepareUndo("Left Side Bearing", coalesce="leftMargin")
         self._glyph.leftMargin = int(self.leftSideBearingEdit.text())
         self._blocked = False
 
@@ -446,11 +472,13 @@ class InspectorWindow(QWidget):
         if self._glyph is None:
             return
         self._blocked = True
+        self._glyph.prepareUndo("Right Side Bearing", coalesce="rightMargin")
         self._glyph.rightMargin = int(self.rightSideBearingEdit.text())
         self._blocked = False
 
     def writeMarkColor(self):
         color = self.markColorWidget.color()
+        self._glyph.prepareUndo("Flag", coalesce="markColor")
         if color is not None:
             color = Color(color.getRgbF())
         self._glyph.markColor = color
@@ -697,6 +725,117 @@ class SortDialog(QDialog):
         self.customSortGroup.setEnabled(checkBox.isChecked())
 
 
+class GlyphFilterBar(QWidget):
+    """
+    A bar to narrow the glyphs displayed down to a name prefix or unicode
+    range (“U+0041” or “U+0041-U+005A”) and a flag.
+    """
+    filterChanged = pyqtSignal()
+
+    flagItems = (
+        ("All Glyphs", None),
+        ("Flagged", "marked"),
+        ("Modified", "dirty"),
+        ("Templates", "template"),
+    )
+    unicodeRangeRE = re.compile(
+        "^u\\+([0-9a-f]{1,6})(?:\\s*-\\s*u\\+([0-9a-f]{1,6}))?$", re.I)
+
+    def __init__(self, parent=None):
+        super(GlyphFilterBar, self).__init__(parent)
+        self.lineEdit = QLineEdit(self)
+        self.lineEdit.setClearButtonEnabled(True)
+        self.lineEdit.setPlaceholderText("Name prefix or U+XXXX[-U+YYYY]")
+        self.lineEdit.textChanged.connect(self.filterChanged)
+        self.flagBox = QComboBox(self)
+        for text, flag in self.flagItems:
+            self.flagBox.addItem(text, flag)
+        self.flagBox.currentIndexChanged.connect(self.filterChanged)
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.addWidget(self.lineEdit)
+        layout.addWidget(self.flagBox)
+        self.setLayout(layout)
+
+    def query(self):
+        """
+        Returns the filter as keyword arguments to GlyphIndex.filter(), or
+        None if it lets all glyphs through.
+        """
+        if self.isHidden():
+            return None
+        query = dict()
+        text = self.lineEdit.text().strip()
+        m = self.unicodeRangeRE.match(text)
+        if m is not None:
+            first = int(m.group(1), 16)
+            last = int(m.group(2), 16) if m.group(2) else first
+            query["unicodeRange"] = (first, last)
+        elif text:
+            query["prefix"] = text
+        flag = self.flagBox.currentData()
+        if flag is not None:
+            query["flag"] = flag
+        return query or None
+
+    def showEvent(self, event):
+        super(GlyphFilterBar, self).showEvent(event)
+        self.lineEdit.setFocus(Qt.ShortcutFocusReason)
+        self.filterChanged.emit()
+
+    def hideEvent(self, event):
+        super(GlyphFilterBar, self).hideEvent(event)
+        self.filterChanged.emit()
+
+
+class FontLoader(QThread):
+    """
+    Opens the UFO at *path*, or imports it with extractor when *extract* is
+    True, outside of the GUI thread.
+
+    When *loadGlyphs* is True, the glyphs of an opened UFO are loaded one by
+    one, reporting *progress* (done, total) along the way. Loading stops
+    once interruption is requested; *loaded* is then never emitted.
+    """
+    progress = pyqtSignal(int, int)
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, path, extract=False, loadGlyphs=True, parent=None):
+        super(FontLoader, self).__init__(parent)
+        self.path = path
+        self.extract = extract
+        self.loadGlyphs = loadGlyphs
+
+    def run(self):
+        try:
+            if self.extract:
+                import extractor
+                font = TFont()
+                # extractor doesn't report progress nor can it be stopped
+                extractor.extractUFO(self.path, font)
+            else:
+                font = TFont(self.path)
+                if self.loadGlyphs:
+                    glyphNames = font.keys()
+                    total = len(glyphNames)
+                    for index, name in enumerate(glyphNames):
+                        if self.isInterruptionRequested():
+                            return
+                        font[name]
+                        self.progress.emit(index + 1, total)
+        except Exception as e:
+            self.failed.emit(e.__class__.__name__, str(e))
+            return
+        if self.isInterruptionRequested():
+            return
+        # QObjects made here belong to this thread, hand them to the GUI
+        # thread before it goes away. Glyphs make theirs on first use.
+        font.undoManager.moveToThread(QApplication.instance().thread())
+        self.loaded.emit(font)
+
+
 class MainWindow(QMainWindow):
 
     def __init__(self, font):
@@ -708,6 +847,21 @@ class MainWindow(QMainWindow):
         self._font = None
         self._sortDescriptor = None
         settings = QSettings()
+        self._lazyLoading = settings.value(
+            "misc/lazyLoading", False, bool)
+        self._lazyLoadTimer = QTimer(self)
+        self._lazyLoadTimer.timeout.connect(self._loadGlyphsWhenIdle)
+        self._lazyLoadNames = None
+        self._glyphOrder = None
+        self._undoGlyph = None
+        # all the glyphs, those displayed may be filtered
+        self._allGlyphs = []
+        self._glyphsFiltered = False
+        self._shownGlyphs = None
+        self._glyphIndex = None
+        self.filterBar = GlyphFilterBar(self)
+        self.filterBar.hide()
+        self.filterBar.filterChanged.connect(self._applyFilter)
         loadRecentFile = settings.value("misc/loadRecentFile", False, bool)
         if font is None and loadRecentFile:
             recentFiles = settings.value("core/recentFiles", [], type=str)
@@ -763,6 +917,10 @@ class MainWindow(QMainWindow):
             "&Paste", self.paste, QKeySequence.Paste)
         self._clipboardActions = (cut, copy, copyComponent, paste)
         editMenu.addSeparator()
+        filterAction = editMenu.addAction(
+            "&Filter Glyphs", self.filterBar.setVisible, QKeySequence.Find)
+        filterAction.setCheckable(True)
+        editMenu.addSeparator()
         editMenu.addAction("&Settings…", self.settings)
         menuBar.addMenu(editMenu)
 
@@ -786,6 +944,8 @@ class MainWindow(QMainWindow):
         action.setShortcutContext(Qt.ApplicationShortcut)
         windowMenu.addAction("&Metrics Window", self.metrics, "Ctrl+Alt+S")
         windowMenu.addAction("&Groups Window", self.groups, "Ctrl+Alt+G")
+        windowMenu.addSeparator()
+        windowMenu.addAction("Notification &Profiler", self.profiler)
         menuBar.addMenu(windowMenu)
 
         helpMenu = QMenu("&Help", self)
@@ -808,7 +968,14 @@ class MainWindow(QMainWindow):
         self._updateGlyphActions()
         app.currentGlyphChanged.connect(self._updateGlyphActions)
 
-        self.setCentralWidget(self.collectionWidget.scrollArea())
+        centralWidget = QWidget(self)
+        layout = QVBoxLayout(centralWidget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        layout.addWidget(self.filterBar)
+        layout.addWidget(self.collectionWidget.scrollArea())
+        centralWidget.setLayout(layout)
+        self.setCentralWidget(centralWidget)
         self.resize(605, 430)
         if font is not None:
             self.setCurrentFile(font.path)
@@ -857,17 +1024,56 @@ class MainWindow(QMainWindow):
                         and window._font.path == path):
                     window.raise_()
                     return
+            if not stickToSelf:
+                self._loadFontInBackground(
+                    path, "Opening font…", loadGlyphs=not self._lazyLoading)
+                return
             try:
                 font = TFont(path)
             except Exception as e:
                 title = e.__class__.__name__
                 QMessageBox.critical(self, title, str(e))
                 return
-            if not stickToSelf:
-                window = MainWindow(font)
-                window.show()
-            else:
-                self.font = font
+            self.font = font
+
+    def _loadFontInBackground(self, path, labelText, **kwargs):
+        app = QApplication.instance()
+        loader = FontLoader(path, parent=app, **kwargs)
+        progressDialog = QProgressDialog(labelText, "Cancel", 0, 0, self)
+        progressDialog.setWindowModality(Qt.WindowModal)
+        progressDialog.setMinimumDuration(500)
+        progressDialog.setAutoReset(False)
+
+        def updateProgress(value, maximum):
+            progressDialog.setMaximum(maximum)
+            progressDialog.setValue(value)
+
+        def fontLoaded(font):
+            if progressDialog.wasCanceled():
+                return
+            window = MainWindow(font)
+            window.show()
+
+        def loadFailed(title, message):
+            if progressDialog.wasCanceled():
+                return
+            QMessageBox.critical(self, title, message)
+
+        def loadingFinished():
+            loader.progress.disconnect(updateProgress)
+            loader.loaded.disconnect(fontLoaded)
+            loader.failed.disconnect(loadFailed)
+            progressDialog.canceled.disconnect(loader.requestInterruption)
+            progressDialog.deleteLater()
+            loader.deleteLater()
+
+        loader.progress.connect(updateProgress)
+        loader.loaded.connect(fontLoaded)
+        loader.failed.connect(loadFailed)
+        loader.finished.connect(loadingFinished)
+        progressDialog.canceled.connect(loader.requestInterruption)
+        progressDialog.show()
+        loader.start()
 
     def openRecentFile(self):
         fontPath = self.sender().toolTip()
@@ -879,16 +1085,16 @@ class MainWindow(QMainWindow):
         else:
             if path is None:
                 path = self.font.path
-            glyphs = self.collectionWidget.glyphs
             # TODO: save sortDescriptor somewhere in lib as well
-            glyphNames = []
-            for glyph in glyphs:
-                glyphNames.append(glyph.name)
-            self.font.lib["public.glyphOrder"] = glyphNames
+            glyphNames = self._glyphOrderFromView()
+            # don't dirty the lib (and have it written) for nothing
+            if self.font.lib.get("public.glyphOrder") != glyphNames:
+                self.font.lib["public.glyphOrder"] = glyphNames
+            # only modified objects are written
             self.font.save(path, ufoFormatVersion)
             self.font.dirty = False
-            for glyph in self.font:
-                glyph.dirty = False
+            # clean glyphs have a different header
+            self.collectionWidget.update()
             self.setCurrentFile(path)
             self.setWindowModified(False)
 
@@ -912,7 +1118,7 @@ class MainWindow(QMainWindow):
 
     def importFile(self):
         try:
-            import extractor
+            import extractor  # noqa
         except Exception as e:
             title = e.__class__.__name__
             QMessageBox.critical(self, title, str(e))
@@ -932,15 +1138,7 @@ class MainWindow(QMainWindow):
             self, "Import File", None, ";;".join(fileFormats), fileFormats[4])
 
         if path:
-            font = TFont()
-            try:
-                extractor.extractUFO(path, font)
-            except Exception as e:
-                title = e.__class__.__name__
-                QMessageBox.critical(self, title, str(e))
-                return
-            window = MainWindow(font)
-            window.show()
+            self._loadFontInBackground(path, "Importing font…", extract=True)
 
     def exportFile(self):
         try:
@@ -965,13 +1163,37 @@ class MainWindow(QMainWindow):
             print(reports["autohint"])
             print(reports["makeotf"])
 
-    def undo(self):
+    def _undoTargets(self):
+        # the font history and the current glyph's, if any
+        targets = [self._font]
         glyph = self.collectionWidget.lastSelectedGlyph()
-        glyph.undo()
+        if glyph is not None:
+            targets.append(glyph)
+        return targets
+
+    def undo(self):
+        # undo the most recent step, be it font-wide or glyph-only
+        targets = [target for target in self._undoTargets()
+                   if target.undoManager.canUndo()]
+        if targets:
+            target = max(
+                targets, key=lambda target: target.undoManager.undoOrder())
+            target.undo()
 
     def redo(self):
-        glyph = self.collectionWidget.lastSelectedGlyph()
-        glyph.redo()
+        targets = [target for target in self._undoTargets()
+                   if target.undoManager.canRedo()]
+        if targets:
+            target = max(
+                targets, key=lambda target: target.undoManager.redoOrder())
+            target.redo()
+
+    def _updateUndoActions(self):
+        targets = self._undoTargets()
+        self._undoAction.setEnabled(
+            any(target.undoManager.canUndo() for target in targets))
+        self._redoAction.setEnabled(
+            any(target.undoManager.canRedo() for target in targets))
 
     def setCurrentFile(self, path):
         if path is None:
@@ -1025,15 +1247,16 @@ class MainWindow(QMainWindow):
         self._redoAction.disconnect()
         self._redoAction.triggered.connect(self.redo)
         # now update status
-        if currentGlyph is None:
-            self._undoAction.setEnabled(False)
-            self._redoAction.setEnabled(False)
-        else:
+        if self._undoGlyph is not None:
+            undoManager = self._undoGlyph.undoManager
+            undoManager.canUndoChanged.disconnect(self._updateUndoActions)
+            undoManager.canRedoChanged.disconnect(self._updateUndoActions)
+        self._undoGlyph = currentGlyph
+        if currentGlyph is not None:
             undoManager = currentGlyph.undoManager
-            self._undoAction.setEnabled(currentGlyph.canUndo())
-            undoManager.canUndoChanged.connect(self._undoAction.setEnabled)
-            self._redoAction.setEnabled(currentGlyph.canRedo())
-            undoManager.canRedoChanged.connect(self._redoAction.setEnabled)
+            undoManager.canUndoChanged.connect(self._updateUndoActions)
+            undoManager.canRedoChanged.connect(self._updateUndoActions)
+        self._updateUndoActions()
         # and other actions
         for action in self._clipboardActions:
             action.setEnabled(currentGlyph is not None)
@@ -1043,6 +1266,7 @@ class MainWindow(QMainWindow):
         ok = self.maybeSaveBeforeExit()
         if ok:
             self.font.removeObserver(self, "Font.Changed")
+            self.font.info.removeObserver(self, "Info.Changed")
             event.accept()
         else:
             event.ignore()
@@ -1094,10 +1318,20 @@ class MainWindow(QMainWindow):
         if self._font is not None:
             self._font.removeObserver(self, "Font.Changed")
             self._font.removeObserver(self, "Font.GlyphOrderChanged")
+            self._font.info.removeObserver(self, "Info.Changed")
+            undoManager = self._font.undoManager
+            undoManager.canUndoChanged.disconnect(self._updateUndoActions)
+            undoManager.canRedoChanged.disconnect(self._updateUndoActions)
         self._font = font
+        undoManager = self._font.undoManager
+        undoManager.canUndoChanged.connect(self._updateUndoActions)
+        undoManager.canRedoChanged.connect(self._updateUndoActions)
         self._font.addObserver(self, "_fontChanged", "Font.Changed")
         self._font.addObserver(
             self, "_glyphOrderChanged", "Font.GlyphOrderChanged")
+        # glyph changes repaint their own cell, but vertical metrics affect
+        # all of them
+        self._font.info.addObserver(self, "_fontInfoChanged", "Info.Changed")
         if self._font.glyphOrder is None:
             # TODO: cannedDesign or carry sortDescriptor from previous font?
             self.sortDescriptor = cannedDesign
@@ -1130,10 +1364,12 @@ class MainWindow(QMainWindow):
 
     def cut(self):
         self.copy()
-        glyphs = self.collectionWidget.glyphs
-        for index in self.collectionWidget.selection:
-            glyph = glyphs[index]
-            glyph.clear()
+        glyphs = self.collectionWidget.getSelectedGlyphs()
+        with self._font.undoTransaction("Cut"), \
+                self._font.batchNotifications(glyphs):
+            for glyph in glyphs:
+                glyph.prepareUndo()
+                glyph.clear()
 
     def copy(self):
         glyphs = self.collectionWidget.glyphs
@@ -1173,10 +1409,12 @@ class MainWindow(QMainWindow):
                 "application/x-defconQt-glyph-data"))
             glyphs = self.collectionWidget.getSelectedGlyphs()
             if len(data) == len(glyphs):
-                for pickled, glyph in zip(data, glyphs):
-                    # XXX: prune
-                    glyph.prepareUndo()
-                    glyph.deserialize(pickled)
+                with self._font.undoTransaction("Paste"), \
+                        self._font.batchNotifications(glyphs):
+                    for pickled, glyph in zip(data, glyphs):
+                        # XXX: prune
+                        glyph.prepareUndo()
+                        glyph.deserialize(pickled)
 
     def settings(self):
         if hasattr(self, 'settingsWindow') and self.settingsWindow.isVisible():
@@ -1187,35 +1425,160 @@ class MainWindow(QMainWindow):
 
     def markColor(self):
         color = self.sender().data()
-        glyphs = self.collectionWidget.glyphs
-        for key in self.collectionWidget.selection:
-            glyph = glyphs[key]
-            glyph.markColor = Color(
-                color.getRgbF()) if color is not None else None
+        glyphs = self.collectionWidget.getSelectedGlyphs()
+        with self._font.undoTransaction("Flag"), \
+                self._font.batchNotifications(glyphs):
+            for glyph in glyphs:
+                glyph.prepareUndo()
+                glyph.markColor = Color(
+                    color.getRgbF()) if color is not None else None
 
     def _fontChanged(self, notification):
-        self.collectionWidget.update()
         self.setWindowModified(self._font.dirty)
 
-    def _glyphOrderChanged(self, notification):
-        self.updateGlyphsFromFont()
+    def _fontInfoChanged(self, notification):
+        self.collectionWidget.update()
 
-    def updateGlyphsFromFont(self):
+    def _glyphOrderChanged(self, notification):
+        self.updateGlyphsFromFont(incremental=True)
+
+    def _glyphNamesFromFont(self):
+        glyphNames = [name for name in self._font.glyphOrder
+                      if name in self._font]
+        if len(glyphNames) < len(self._font):
+            # if some glyphs in the font are not present in the glyph
+            # order, add them at the end
+            known = set(glyphNames)
+            glyphNames.extend(
+                name for name in self._font.keys() if name not in known)
+        return glyphNames
+
+    def updateGlyphsFromFont(self, incremental=False):
+        """
+        Fills the collection widget with the font glyphs, in glyph order.
+
+        If *incremental* is True and the glyph order only had names appended
+        to it or removed from it since the last update, the widget glyphs are
+        patched instead of rebuilt, which keeps the selection.
+        """
         glyphOrder = self._font.glyphOrder
-        if len(glyphOrder):
-            glyphs = []
-            for glyphName in glyphOrder:
-                if glyphName in self._font:
-                    glyphs.append(self._font[glyphName])
-            if len(glyphs) < len(self._font):
-                # if some glyphs in the font are not present in the glyph
-                # order, loop again to add them at the end
-                for glyph in self._font:
-                    if glyph not in glyphs:
-                        glyphs.append(glyph)
+        previousOrder = self._glyphOrder
+        self._glyphOrder = glyphOrder
+        if incremental and previousOrder is not None and \
+                self._patchGlyphsFromOrder(previousOrder, glyphOrder):
+            return
+        glyphNames = self._glyphNamesFromFont()
+        if self._lazyLoading:
+            # only deal with names here, glyphs get loaded as they are shown
+            # and by the idle loader
+            glyphs = LazyGlyphList(self._font, glyphNames)
+            self._lazyLoadNames = iter(glyphNames)
+            self._lazyLoadTimer.start(0)
         else:
-            glyphs = list(self._font)
+            glyphs = [self._font[name] for name in glyphNames]
+        self._allGlyphs = glyphs
+        self._shownGlyphs = None
+        self._invalidateGlyphIndex()
+        self._applyFilter()
+
+    def _patchGlyphsFromOrder(self, previousOrder, glyphOrder):
+        # the widget shows the previous order followed by the glyphs missing
+        # from it, only the ordered part is patched
+        if self.filterBar.query() is not None:
+            return False
+        count = len(previousOrder)
+        glyphNames = self.collectionWidget.glyphNames()
+        if glyphNames[:count] != previousOrder:
+            return False
+        # the glyph list is about to change
+        self._invalidateGlyphIndex()
+        if len(glyphOrder) >= count and glyphOrder[:count] == previousOrder:
+            # names appended
+            names = glyphOrder[count:]
+            known = set(previousOrder)
+            if len(set(names)) < len(names) or any(
+                    name in known or name not in self._font
+                    for name in names):
+                return False
+            # glyphs that were listed after the ordered ones move up
+            unordered = dict(
+                (name, index) for index, name in enumerate(
+                    glyphNames[count:], count))
+            self.collectionWidget.removeGlyphs(sorted(
+                unordered[name] for name in names if name in unordered))
+            self.collectionWidget.insertGlyphs(
+                count, [self._font[name] for name in names])
+            return True
+        # names removed, glyphOrder must be a subsequence of previousOrder
+        removed = []
+        index = 0
+        for name in glyphOrder:
+            while index < count and previousOrder[index] != name:
+                removed.append(index)
+                index += 1
+            if index == count:
+                return False
+            index += 1
+        removed.extend(range(index, count))
+        # glyphs that only left the glyph order are still listed, at the end
+        if any(previousOrder[index] in self._font for index in removed):
+            return False
+        self.collectionWidget.removeGlyphs(removed)
+        return True
+
+    def _invalidateGlyphIndex(self):
+        if self._glyphIndex is not None:
+            self._glyphIndex.close()
+            self._glyphIndex = None
+
+    def _applyFilter(self):
+        query = self.filterBar.query()
+        widgetGlyphs = self.collectionWidget.glyphs
+        if not self._glyphsFiltered and self._shownGlyphs is not None and \
+                widgetGlyphs is not self._shownGlyphs:
+            # glyphs were rearranged in the widget, take them as reference
+            # TODO: rearranging filtered glyphs doesn't carry over
+            self._allGlyphs = widgetGlyphs
+            self._invalidateGlyphIndex()
+        if query is None:
+            self._glyphsFiltered = False
+            if widgetGlyphs is not self._allGlyphs:
+                self.collectionWidget.glyphs = self._allGlyphs
+            self._shownGlyphs = self._allGlyphs
+            return
+        if self._glyphIndex is None:
+            self._glyphIndex = GlyphIndex(self._allGlyphs)
+        positions = self._glyphIndex.filter(**query)
+        allGlyphs = self._allGlyphs
+        if isinstance(allGlyphs, LazyGlyphList):
+            glyphNames = allGlyphs.glyphNames()
+            glyphs = LazyGlyphList(
+                self._font, [glyphNames[position] for position in positions])
+        else:
+            glyphs = [allGlyphs[position] for position in positions]
+        self._glyphsFiltered = True
         self.collectionWidget.glyphs = glyphs
+        self._shownGlyphs = glyphs
+
+    def _glyphOrderFromView(self):
+        if self._glyphsFiltered:
+            glyphs = self._allGlyphs
+            if isinstance(glyphs, LazyGlyphList):
+                return list(glyphs.glyphNames())
+            return [glyph.name for glyph in glyphs]
+        return list(self.collectionWidget.glyphNames())
+
+    def _loadGlyphsWhenIdle(self):
+        # load glyphs in small slices so as to keep the UI responsive
+        deadline = time.time() + .01
+        font = self._font
+        for name in self._lazyLoadNames:
+            if name in font:
+                font[name]
+            if time.time() > deadline:
+                return
+        self._lazyLoadNames = None
+        self._lazyLoadTimer.stop()
 
     def _glyphOpened(self, glyph):
         glyphViewWindow = MainGlyphWindow(glyph, self)
@@ -1318,6 +1681,16 @@ class MainWindow(QMainWindow):
         else:
             app.scriptingWindow.show()
 
+    def profiler(self):
+        app = QApplication.instance()
+        if not hasattr(app, 'profilerWindow'):
+            app.profilerWindow = ProfilerWindow()
+            app.profilerWindow.show()
+        elif app.profilerWindow.isVisible():
+            app.profilerWindow.raise_()
+        else:
+            app.profilerWindow.show()
+
     def inspector(self):
         app = QApplication.instance()
         if not hasattr(app, 'inspectorWindow'):
@@ -1343,11 +1716,15 @@ class MainWindow(QMainWindow):
             self, glyphs)
         if ok:
             sortFont = params.pop("sortFont")
+            newGlyphs = []
             for name in newGlyphNames:
                 glyph = self.font.newStandardGlyph(name, **params)
                 if glyph is not None:
-                    glyphs.append(glyph)
-            self.collectionWidget.glyphs = glyphs
+                    newGlyphs.append(glyph)
+            # glyph order updates may have brought some of them in already
+            glyphNames = set(self.collectionWidget.glyphNames())
+            self.collectionWidget.appendGlyphs(
+                [glyph for glyph in newGlyphs if glyph.name not in glyphNames])
             if sortFont:
                 # TODO: when the user add chars from a glyphSet and no others,
                 # should we try to sort according to that glyphSet?
@@ -1686,6 +2063,16 @@ class MiscTab(QWidget):
         self.loadRecentFileBox = QCheckBox("Load most recent file on start",
                                            self)
         self.loadRecentFileBox.setChecked(loadRecentFile)
+        lazyLoading = settings.value("misc/lazyLoading", False, bool)
+        self.lazyLoadingBox = QCheckBox(
+            "Load glyphs on demand when opening a font", self)
+        self.lazyLoadingBox.setChecked(lazyLoading)
+        undoMemory = settings.value("misc/undoMemory", 64, int)
+        self.undoMemoryLabel = QLabel("Undo history memory:", self)
+        self.undoMemoryBox = QSpinBox(self)
+        self.undoMemoryBox.setRange(1, 4096)
+        self.undoMemoryBox.setSuffix(" MB")
+        self.undoMemoryBox.setValue(undoMemory)
 
         self.markColorLabel = QLabel("Default flag colors:", self)
         # TODO: enforce duplicate names avoidance
@@ -1716,6 +2103,11 @@ class MiscTab(QWidget):
         l = 0
         layout.addWidget(self.loadRecentFileBox, l, 0, 1, 3)
         l += 1
+        layout.addWidget(self.lazyLoadingBox, l, 0, 1, 3)
+        l += 1
+        layout.addWidget(self.undoMemoryLabel, l, 0)
+        layout.addWidget(self.undoMemoryBox, l, 1, 1, 2)
+        l += 1
         layout.addWidget(self.markColorLabel, l, 0, 1, 3)
         l += 1
         layout.addWidget(self.markColorWidget, l, 0, 1, 3)
@@ -1771,4 +2163,9 @@ class MiscTab(QWidget):
         settings = QSettings()
         loadRecentFile = self.loadRecentFileBox.isChecked()
         settings.setValue("misc/loadRecentFile", loadRecentFile)
+        lazyLoading = self.lazyLoadingBox.isChecked()
+        settings.setValue("misc/lazyLoading", lazyLoading)
+        undoMemory = self.undoMemoryBox.value()
+        settings.setValue("misc/undoMemory", undoMemory)
+        undoManager.setGlobalMaxCost(undoMemory * 1024 * 1024)
         self.writeMarkColors()
@@ -1,9 +1,16 @@
+from defconQt.objects.defcon import LazyGlyphList
+from defconQt.objects.glyphIndex import GlyphIndex
 from defconQt.util import platformSpecific
-from PyQt5.QtCore import QMimeData, QRectF, QSize, Qt
+from defconQt.util.rangeSet import RangeSet
+from PyQt5.QtCore import (
+    pyqtSignal, QLine, QMimeData, QObject, QRect, QRectF, QRunnable, QSize,
+    Qt, QThreadPool)
 from PyQt5.QtGui import (
-    QBrush, QColor, QCursor, QDrag, QFont, QFontMetrics, QKeySequence,
-    QLinearGradient, QPainter, QPen)
+    QBrush, QColor, QCursor, QDrag, QFont, QFontMetrics, QGradient, QImage,
+    QKeySequence, QLinearGradient, QPainter, QPainterPath, QPen, QPixmap)
 from PyQt5.QtWidgets import QApplication, QMessageBox, QScrollArea, QWidget
+from bisect import bisect_left
+from collections import OrderedDict
 import math
 import time
 import unicodedata
@@ -14,8 +21,22 @@ cellHeaderLineColor = QColor(220, 220, 220)
 cellHeaderHighlightLineColor = QColor(240, 240, 240)
 cellSelectionColor = QColor.fromRgbF(.2, .3, .7, .15)
 
+# stretched over the header rectangle they fill
+_cellHeaderGradient = QLinearGradient(0, 0, 0, 1)
+_cellHeaderGradient.setCoordinateMode(QGradient.ObjectBoundingMode)
+_cellHeaderGradient.setColorAt(0.0, cellHeaderBaseColor)
+_cellHeaderGradient.setColorAt(1.0, cellHeaderLineColor)
+cellHeaderBrush = QBrush(_cellHeaderGradient)
+_cellHeaderGradient.setColorAt(0.0, cellHeaderBaseColor.darker(125))
+_cellHeaderGradient.setColorAt(1.0, cellHeaderLineColor.darker(125))
+cellHeaderDirtyBrush = QBrush(_cellHeaderGradient)
+
 GlyphCellBufferHeight = .2
 GlyphCellHeaderHeight = 14
+# memory budget of the cell pixmap cache, in bytes
+GlyphCellCacheSize = 64 * 1024 * 1024
+# number of rows rendered ahead of the viewport when scrolling
+GlyphCellPrefetchRows = 4
 
 headerFont = QFont()
 headerFont.setFamily('Lucida Sans Unicode')
@@ -40,6 +61,285 @@ def proceedWithDeletion(self):
     return False
 
 
+def _glyphCellVerticalMetrics(glyph):
+    font = glyph.getParent()
+    uPM = font.info.unitsPerEm
+    if uPM is None or not uPM > 0:
+        uPM = 1000
+    descender = font.info.descender
+    if descender is None or not descender < 0:
+        descender = -250
+    return uPM, descender
+
+
+def glyphCellBodyParameters(glyph):
+    """
+    Returns the parameters of drawGlyphCellBody() that depend on *glyph*, as
+    Qt values that can be handed over to another thread.
+    """
+    markColor = None
+    if glyph.template:
+        outline = None
+        if glyph.unicode is not None:
+            text = chr(glyph.unicode)
+        else:
+            text = "✌"
+    else:
+        outline = QPainterPath(
+            glyph.getRepresentation("defconQt.QPainterPath"))
+        text = None
+        if glyph.markColor is not None:
+            markColor = QColor.fromRgbF(*tuple(glyph.markColor))
+    return outline, glyph.width, markColor, text
+
+
+def drawGlyphCellBody(painter, width, height, uPM, descender, outline,
+                      glyphWidth, markColor=None, text=None):
+    """
+    Draws a glyph cell body (everything below the header) in the rectangle
+    (0, 0, *width*, *height*). Template glyphs have no *outline*; *text* is
+    drawn in their stead.
+
+    This only involves Qt objects and may run outside of the GUI thread.
+    """
+    painter.fillRect(0, 0, width, height, Qt.white)
+    if outline is not None:
+        # mark color
+        if markColor is not None:
+            markGradient = QLinearGradient(0, 0, 0, height)
+            markGradient.setColorAt(1.0, markColor)
+            markGradient.setColorAt(0.0, markColor.lighter(125))
+            painter.fillRect(0, 0, width, height, QBrush(markGradient))
+        factor = height / (uPM * (1 + 2 * GlyphCellBufferHeight))
+        x_offset = (width - glyphWidth * factor) / 2
+        # If the glyph overflows horizontally we need to adjust the
+        # scaling factor
+        if x_offset < 0:
+            factor *= 1 + 2 * x_offset / (glyphWidth * factor)
+            x_offset = 0
+        # TODO: the * 1.8 below is somewhat artificial
+        y_offset = descender * factor * 1.8
+        painter.save()
+        painter.setClipRect(0, 0, width, height)
+        painter.translate(x_offset, height + y_offset)
+        painter.scale(factor, -factor)
+        painter.fillPath(outline, Qt.black)
+        painter.restore()
+    else:
+        font = QFont(voidFont)
+        font.setPointSizeF(.425 * (height + GlyphCellHeaderHeight))
+        painter.save()
+        painter.setFont(font)
+        painter.setPen(QPen(Qt.lightGray))
+        painter.drawText(QRectF(0, 0, width, height), Qt.AlignCenter, text)
+        painter.restore()
+
+
+class GlyphCellCache(object):
+    """
+    A cache of glyph cell pixmaps.
+
+    Entries are keyed on the glyph and the parameters its rendering depends
+    on; they are dropped when the glyph posts *Glyph.Changed* and the least
+    recently used ones are evicted once the cache grows past *maxCost*
+    bytes.
+    """
+
+    def __init__(self, maxCost=GlyphCellCacheSize):
+        self._entries = OrderedDict()
+        self._glyphKeys = dict()
+        self._cost = 0
+        self._maxCost = maxCost
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _get_maxCost(self):
+        return self._maxCost
+
+    def _set_maxCost(self, maxCost):
+        self._maxCost = maxCost
+        self._evict()
+
+    maxCost = property(_get_maxCost, _set_maxCost, doc="The memory budget "
+                       "of the cache, in bytes. Evicts entries when set.")
+
+    def _get_cost(self):
+        return self._cost
+
+    cost = property(_get_cost, doc="The memory used by cached pixmaps, "
+                    "in bytes.")
+
+    @staticmethod
+    def _pixmapCost(pixmap):
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+    def get(self, key):
+        pixmap = self._entries.get(key)
+        if pixmap is not None:
+            self._entries.move_to_end(key)
+        return pixmap
+
+    def insert(self, key, pixmap):
+        """
+        Inserts *pixmap* under *key*, whose first item must be the glyph the
+        pixmap depicts.
+        """
+        if key in self._entries:
+            self._remove(key)
+        cost = self._pixmapCost(pixmap)
+        if cost > self._maxCost:
+            return
+        glyph = key[0]
+        keys = self._glyphKeys.get(glyph)
+        if keys is None:
+            keys = self._glyphKeys[glyph] = set()
+            glyph.addObserver(self, "_glyphChanged", "Glyph.Changed")
+        keys.add(key)
+        self._entries[key] = pixmap
+        self._cost += cost
+        self._evict()
+
+    def invalidate(self, glyph):
+        keys = self._glyphKeys.pop(glyph, None)
+        if keys is None:
+            return
+        glyph.removeObserver(self, "Glyph.Changed")
+        for key in keys:
+            pixmap = self._entries.pop(key)
+            self._cost -= self._pixmapCost(pixmap)
+
+    def clear(self):
+        for glyph in list(self._glyphKeys.keys()):
+            self.invalidate(glyph)
+
+    def _remove(self, key):
+        pixmap = self._entries.pop(key)
+        self._cost -= self._pixmapCost(pixmap)
+        glyph = key[0]
+        keys = self._glyphKeys[glyph]
+        keys.discard(key)
+        if not keys:
+            del self._glyphKeys[glyph]
+            glyph.removeObserver(self, "Glyph.Changed")
+
+    def _evict(self):
+        while self._cost > self._maxCost and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+
+    def _glyphChanged(self, notification):
+        self.invalidate(notification.object)
+
+
+class _GlyphCellJob(QRunnable):
+
+    def __init__(self, renderer, key, index, size, devicePixelRatio,
+                 parameters):
+        super(_GlyphCellJob, self).__init__()
+        # the renderer holds a reference to us until _finishJob() or until
+        # it takes us back from the pool
+        self.setAutoDelete(False)
+        self.renderer = renderer
+        self.key = key
+        self.index = index
+        self.size = size
+        self.devicePixelRatio = devicePixelRatio
+        self.parameters = parameters
+
+    def run(self):
+        image = QImage(self.size * self.devicePixelRatio,
+                       QImage.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(self.devicePixelRatio)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        drawGlyphCellBody(painter, self.size.width(), self.size.height(),
+                          *self.parameters)
+        painter.end()
+        self.renderer._jobFinished.emit(self, image)
+
+
+class GlyphCellRenderer(QObject):
+    """
+    Rasterizes glyph cell bodies into QImages on a thread pool.
+
+    Requests are keyed like GlyphCellCache entries; *cellRendered* is
+    emitted on the GUI thread with the key, the index passed to request()
+    and the image. Pending requests whose glyph posts *Glyph.Changed* are
+    dropped.
+    """
+    cellRendered = pyqtSignal(object, int, QImage)
+    _jobFinished = pyqtSignal(object, QImage)
+
+    def __init__(self, parent=None):
+        super(GlyphCellRenderer, self).__init__(parent)
+        self._threadPool = QThreadPool(self)
+        self._pending = dict()
+        # discarded jobs that were already running: the pool doesn't own
+        # them, so they must stay referenced until they're done
+        self._inFlight = set()
+        self._glyphKeys = dict()
+        self._jobFinished.connect(self._finishJob)
+
+    def isPending(self, key):
+        return key in self._pending
+
+    def request(self, key, index, size, devicePixelRatio, verticalMetrics,
+                priority=0):
+        """
+        Schedules rendering of the cell of *key*, whose first item must be
+        the glyph. Higher *priority* requests are served first.
+        """
+        if key in self._pending:
+            return
+        glyph = key[0]
+        job = _GlyphCellJob(self, key, index, size, devicePixelRatio,
+                            verticalMetrics + glyphCellBodyParameters(glyph))
+        keys = self._glyphKeys.get(glyph)
+        if keys is None:
+            keys = self._glyphKeys[glyph] = set()
+            glyph.addObserver(self, "_glyphChanged", "Glyph.Changed")
+        keys.add(key)
+        self._pending[key] = job
+        self._threadPool.start(job, priority)
+
+    def discard(self, glyph):
+        keys = self._glyphKeys.pop(glyph, None)
+        if keys is None:
+            return
+        glyph.removeObserver(self, "Glyph.Changed")
+        for key in keys:
+            job = self._pending.pop(key)
+            # don't let stale work hold up the visible cells
+            if not self._threadPool.tryTake(job):
+                self._inFlight.add(job)
+
+    def clear(self):
+        for glyph in list(self._glyphKeys.keys()):
+            self.discard(glyph)
+
+    def _finishJob(self, job, image):
+        self._inFlight.discard(job)
+        key = job.key
+        if self._pending.get(key) is not job:
+            # discarded
+            return
+        del self._pending[key]
+        glyph = key[0]
+        keys = self._glyphKeys[glyph]
+        keys.discard(key)
+        if not keys:
+            del self._glyphKeys[glyph]
+            glyph.removeObserver(self, "Glyph.Changed")
+        self.cellRendered.emit(key, job.index, image)
+
+    def _glyphChanged(self, notification):
+        self.discard(notification.object)
+
+
 class GlyphCollectionWidget(QWidget):
     """
     A widget that presents a list of glyphs in cells.
@@ -51,9 +351,18 @@ class GlyphCollectionWidget(QWidget):
         self._glyphs = []
         self._squareSize = 56
         self._columns = 10
-        self._selection = set()
+        self._selection = RangeSet()
         self._oldSelection = None
         self._lastSelectedCell = None
+        self._cellCache = GlyphCellCache()
+        self._cellRenderer = GlyphCellRenderer(self)
+        self._cellRenderer.cellRendered.connect(self._cellRendered)
+        # glyphs painted, observed so as to repaint only their cell
+        self._cellIndexes = dict()
+        # header layout of the observed glyphs' cells
+        self._cellLayouts = dict()
+        self._glyphIndex = None
+        self._lastScrollValue = 0
         self._inputString = ""
         self._lastKeyInputTime = None
 
@@ -74,14 +383,18 @@ class GlyphCollectionWidget(QWidget):
         self._scrollArea.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self._scrollArea.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
         self._scrollArea.setWidget(self)
+        self._scrollArea.verticalScrollBar().valueChanged.connect(
+            self._scrollValueChanged)
 
     def _get_glyphs(self):
         return self._glyphs
 
     def _set_glyphs(self, glyphs):
+        self._clearCellIndexes()
+        self._invalidateGlyphIndex()
         self._glyphs = glyphs
         self.adjustSize()
-        self.selection = set()
+        self.selection = RangeSet()
         # self.update() # self.selection changed will do it
 
     glyphs = property(
@@ -92,6 +405,8 @@ class GlyphCollectionWidget(QWidget):
         return self._selection
 
     def _set_selection(self, selection):
+        if not isinstance(selection, RangeSet):
+            selection = RangeSet(selection)
         self._selection = selection
         if not len(self._selection):
             self.lastSelectedCell = None
@@ -99,11 +414,97 @@ class GlyphCollectionWidget(QWidget):
         self.update()
 
     selection = property(
-        _get_selection, _set_selection, doc="A set that contains indexes of "
-        "selected glyphs. Schedules display refresh when set.")
+        _get_selection, _set_selection, doc="A RangeSet that contains indexes "
+        "of selected glyphs. Any iterable of indexes can be set. Schedules "
+        "display refresh when set.")
+
+    def appendGlyphs(self, glyphs):
+        """
+        Appends *glyphs* to the glyphs displayed, keeping the selection.
+        """
+        self._glyphs.extend(glyphs)
+        self._invalidateGlyphIndex()
+        self.adjustSize()
+        self.update()
+
+    def insertGlyphs(self, index, glyphs):
+        """
+        Inserts *glyphs* before *index* in the glyphs displayed, keeping the
+        selection.
+        """
+        if not glyphs:
+            return
+        self._clearCellIndexes()
+        self._invalidateGlyphIndex()
+        self._glyphs[index:index] = glyphs
+        selection = RangeSet(self._selection)
+        selection.insertRange(index, index + len(glyphs))
+        lastSelectedCell = self._lastSelectedCell
+        if lastSelectedCell is not None and lastSelectedCell >= index:
+            self._lastSelectedCell = lastSelectedCell + len(glyphs)
+        self.adjustSize()
+        self.selection = selection
+
+    def removeGlyphs(self, indexes):
+        """
+        Removes the glyphs at *indexes*, a sorted sequence, keeping the
+        selection of the other glyphs.
+        """
+        if not indexes:
+            return
+        self._clearCellIndexes()
+        self._invalidateGlyphIndex()
+        removed = set(indexes)
+        items = self._glyphs
+        if isinstance(items, LazyGlyphList):
+            items = items.glyphNames()
+        items[:] = [
+            item for index, item in enumerate(items) if index not in removed]
+        selection = RangeSet(self._selection)
+        # delete runs of consecutive indexes, last first so that the indexes
+        # left to delete don't shift
+        start = stop = None
+        for index in reversed(indexes):
+            if index + 1 != start:
+                if start is not None:
+                    selection.deleteRange(start, stop)
+                stop = index + 1
+            start = index
+        selection.deleteRange(start, stop)
+        lastSelectedCell = self._lastSelectedCell
+        if lastSelectedCell is not None:
+            if lastSelectedCell in removed:
+                self._lastSelectedCell = None
+            else:
+                self._lastSelectedCell = lastSelectedCell - \
+                    bisect_left(indexes, lastSelectedCell)
+        self.adjustSize()
+        self.selection = selection
+
+    def glyphIndex(self):
+        """
+        Returns a GlyphIndex of the glyphs displayed, built on first use.
+        """
+        if self._glyphIndex is None:
+            self._glyphIndex = GlyphIndex(self._glyphs)
+        return self._glyphIndex
+
+    def _invalidateGlyphIndex(self):
+        if self._glyphIndex is not None:
+            self._glyphIndex.close()
+            self._glyphIndex = None
+
+    def glyphNames(self):
+        """
+        Returns the names of the glyphs displayed, without loading glyphs
+        that aren't yet.
+        """
+        if isinstance(self._glyphs, LazyGlyphList):
+            return self._glyphs.glyphNames()
+        return [glyph.name for glyph in self._glyphs]
 
     def getSelectedGlyphs(self):
-        return [self._glyphs[key] for key in sorted(self._selection)]
+        return [self._glyphs[key] for key in self._selection]
 
     def _get_lastSelectedCell(self):
         if self._lastSelectedCell is not None and \
@@ -151,10 +552,127 @@ class GlyphCollectionWidget(QWidget):
 
     def _set_squareSize(self, squareSize):
         self._squareSize = squareSize
+        # pixmaps at the former size won't be of any use anymore
+        self._cellCache.clear()
+        self._cellRenderer.clear()
+        self._cellLayouts.clear()
         self._rewindColumns()
 
     squareSize = property(_get_squareSize, _set_squareSize)
 
+    def cellCache(self):
+        return self._cellCache
+
+    def _glyphCellKey(self, glyph, size, devicePixelRatio, verticalMetrics):
+        return (glyph, size.width(), size.height(), devicePixelRatio,
+                glyph.markColor, glyph.template) + verticalMetrics
+
+    def _glyphCellPixmap(self, index, size, devicePixelRatio,
+                         verticalMetrics, priority=1):
+        """
+        Returns the cached body pixmap of the cell at *index*, or None after
+        scheduling its rendering.
+        """
+        glyph = self._glyphs[index]
+        key = self._glyphCellKey(glyph, size, devicePixelRatio,
+                                 verticalMetrics)
+        pixmap = self._cellCache.get(key)
+        if pixmap is None:
+            self._cellRenderer.request(
+                key, index, size, devicePixelRatio, verticalMetrics, priority)
+        return pixmap
+
+    def _cellRendered(self, key, index, image):
+        self._cellCache.insert(key, QPixmap.fromImage(image))
+        if index < len(self._glyphs) and self._glyphs[index] is key[0]:
+            self.update(self._cellRect(index))
+        else:
+            self.update()
+
+    def _cellRect(self, index):
+        return QRect(
+            index % self._columns * self.squareSize,
+            index // self._columns * self.squareSize,
+            self.squareSize + 1, self.squareSize + 1)
+
+    def _cellLayout(self, glyph):
+        """
+        Returns the (elided name, dirty) header layout of *glyph*'s cell.
+        """
+        layout = self._cellLayouts.get(glyph)
+        if layout is None:
+            name = metrics.elidedText(
+                glyph.name, Qt.ElideRight, self.squareSize - 2)
+            layout = self._cellLayouts[glyph] = (
+                name, not glyph.template and glyph.dirty)
+        return layout
+
+    def _observeGlyph(self, glyph, index):
+        if glyph not in self._cellIndexes:
+            glyph.addObserver(self, "_glyphChanged", "Glyph.Changed")
+        self._cellIndexes[glyph] = index
+
+    def _unobserveGlyph(self, glyph):
+        del self._cellIndexes[glyph]
+        self._cellLayouts.pop(glyph, None)
+        glyph.removeObserver(self, "Glyph.Changed")
+
+    def _clearCellIndexes(self):
+        for glyph in list(self._cellIndexes.keys()):
+            self._unobserveGlyph(glyph)
+
+    def _pruneCellIndexes(self):
+        """
+        Stops observing glyphs that were scrolled out of view, once there
+        are many of them.
+        """
+        rect = self.visibleRegion().boundingRect()
+        beginIndex = rect.top() // self.squareSize * self._columns
+        endIndex = (rect.bottom() // self.squareSize + 1) * self._columns
+        if len(self._cellIndexes) <= 2 * (endIndex - beginIndex):
+            return
+        for glyph, index in list(self._cellIndexes.items()):
+            if not beginIndex <= index < endIndex:
+                self._unobserveGlyph(glyph)
+
+    def _glyphChanged(self, notification):
+        glyph = notification.object
+        index = self._cellIndexes.get(glyph)
+        if index is None:
+            return
+        self._cellLayouts.pop(glyph, None)
+        if index < len(self._glyphs) and self._glyphs[index] is glyph:
+            self.update(self._cellRect(index))
+        else:
+            self._unobserveGlyph(glyph)
+
+    def _scrollValueChanged(self, value):
+        forward = value >= self._lastScrollValue
+        self._lastScrollValue = value
+        self._prefetchCells(value, forward)
+
+    def _prefetchCells(self, top, forward=True):
+        """
+        Schedules rendering of the rows just beyond the viewport in the
+        scrolling direction.
+        """
+        if not self._glyphs:
+            return
+        if forward:
+            height = self._scrollArea.viewport().height()
+            beginRow = (top + height) // self.squareSize + 1
+        else:
+            beginRow = max(
+                top // self.squareSize - GlyphCellPrefetchRows, 0)
+        endRow = beginRow + GlyphCellPrefetchRows
+        size = QSize(self.squareSize, self.squareSize - GlyphCellHeaderHeight)
+        devicePixelRatio = self.devicePixelRatio()
+        verticalMetrics = _glyphCellVerticalMetrics(self._glyphs[0])
+        for index in range(beginRow * self._columns,
+                           min(endRow * self._columns, len(self._glyphs))):
+            self._glyphCellPixmap(
+                index, size, devicePixelRatio, verticalMetrics, priority=0)
+
     def pipeDragEnterEvent(self, event):
         # glyph reordering
         if event.source() == self:
@@ -266,26 +784,27 @@ class GlyphCollectionWidget(QWidget):
                 #       doubleClickCallback?
                 self.doubleClickCallback(self._glyphs[index])
         elif event.matches(QKeySequence.SelectAll):
-            self.selection = set(range(len(self._glyphs)))
+            self.selection = RangeSet.fromRange(0, len(self._glyphs))
         elif key == Qt.Key_D and modifiers & Qt.ControlModifier:
-            self.selection = set()
+            self.selection = RangeSet()
         # XXX: this is specific to fontView so should be done thru subclassing
         # of a base widget, as is done in groupsView
         elif key == platformSpecific.deleteKey:
             # if self.characterDeletionCallback is not None:
             if proceedWithDeletion(self) and self.selection:
                 # we need to del in reverse order to keep key references valid
-                for key in sorted(self._selection, reverse=True):
+                for key in reversed(self._selection):
                     glyph = self._glyphs[key]
                     font = glyph.getParent()
                     if modifiers & Qt.ShiftModifier:
                         del font[glyph.name]
                         # XXX: need a del fn in property
                         del self._glyphs[key]
+                        self._invalidateGlyphIndex()
                     else:
                         # XXX: have template setter clear glyph content
                         glyph.template = True
-                self.selection = set()
+                self.selection = RangeSet()
         elif modifiers in (Qt.NoModifier, Qt.ShiftModifier) and \
                 isUnicodeChar(event.text()):
             # adapted from defconAppkit
@@ -302,52 +821,13 @@ class GlyphCollectionWidget(QWidget):
             self._lastKeyInputTime = rightNow
             self._inputString = self._inputString + event.text()
 
-            match = None
-            matchIndex = None
-            lastResort = None
-            lastResortIndex = None
-            for index, glyph in enumerate(self._glyphs):
-                item = glyph.name
-                # if the item starts with the input string, it is considered
-                # a match
-                if item.startswith(self._inputString):
-                    if match is None:
-                        match = item
-                        matchIndex = index
-                        continue
-                    # only if the item is less than the previous match is it
-                    # a more relevant match
-                    # example:
-                    # given this order: sys, signal
-                    # and this input string: s
-                    # sys will be the first match, but signal is the more
-                    # accurate match
-                    if item < match:
-                        match = item
-                        matchIndex = index
-                        continue
-                # if the item is greater than the input string,it can be used
-                # as a last resort
-                # example:
-                # given this order: vanilla, zipimport
-                # and this input string: x
-                # zipimport will be used as the last resort
-                if item > self._inputString:
-                    if lastResort is None:
-                        lastResort = item
-                        lastResortIndex = index
-                        continue
-                    # if existing the last resort is greater than the item
-                    # the item is a closer match to the input string
-                    if lastResort > item:
-                        lastResort = item
-                        lastResortIndex = index
-                        continue
-
-            if matchIndex is not None:
-                newSelection = matchIndex
-            elif lastResortIndex is not None:
-                newSelection = lastResortIndex
+            # the glyph whose name is the smallest that starts with the
+            # input string, or else the smallest that is greater than it
+            # example:
+            # given this order: sys, signal
+            # and this input string: s
+            # signal is the most accurate match
+            newSelection = self.glyphIndex().typeAhead(self._inputString)
             if newSelection is not None:
                 self.selection = {newSelection}
                 self.lastSelectedCell = newSelection
@@ -364,29 +844,28 @@ class GlyphCollectionWidget(QWidget):
         return index
 
     def _linearSelection(self, index):
+        newSelection = self._selection.copy()
         if not self._selection:
-            newSelection = {index}
+            newSelection.add(index)
+        elif index < self.lastSelectedCell:
+            newSelection.addRange(index, self.lastSelectedCell + 1)
         else:
-            if index < self.lastSelectedCell:
-                newSelection = self._selection | set(
-                    range(index, self.lastSelectedCell + 1))
-            else:
-                newSelection = self._selection | set(
-                    range(self.lastSelectedCell, index + 1))
+            newSelection.addRange(self.lastSelectedCell, index + 1)
         return newSelection
 
     # TODO: in mousePressEvent and mouseMoveEvent below, self._lastSelectedCell
     # must be updated at all exit points
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
-            self._oldSelection = self._selection
+            # the selection is mutated in place below, keep a copy
+            self._oldSelection = self._selection.copy()
             index = self._findEventIndex(event)
             modifiers = event.modifiers()
             event.accept()
             if index >= len(self._glyphs):
                 if not (modifiers & Qt.ControlModifier or
                         modifiers & Qt.ShiftModifier):
-                    self.selection = set()
+                    self.selection = RangeSet()
                 self.lastSelectedCell = index
                 return
 
@@ -484,145 +963,115 @@ class GlyphCollectionWidget(QWidget):
         beginColumn = redrawRect.left() // self.squareSize
         endColumn = redrawRect.right() // self.squareSize
 
-        gradient = QLinearGradient(0, 0, 0, GlyphCellHeaderHeight)
-        gradient.setColorAt(0.0, cellHeaderBaseColor)
-        gradient.setColorAt(1.0, cellHeaderLineColor)
-        dirtyGradient = QLinearGradient(0, 0, 0, GlyphCellHeaderHeight)
-        dirtyGradient.setColorAt(0.0, cellHeaderBaseColor.darker(125))
-        dirtyGradient.setColorAt(1.0, cellHeaderLineColor.darker(125))
-        markGradient = QLinearGradient(
-            0, 0, 0, self.squareSize - GlyphCellHeaderHeight)
-        voidFont.setPointSize(.425 * self.squareSize)
+        squareSize = self.squareSize
+        bodySize = QSize(squareSize, squareSize - GlyphCellHeaderHeight)
+        devicePixelRatio = self.devicePixelRatio()
+        verticalMetrics = None
 
+        # lay out the cells, then paint them in passes that share painter
+        # state
+        cells = []
         for row in range(beginRow, endRow + 1):
             for column in range(beginColumn, endColumn + 1):
                 key = row * self._columns + column
                 if key >= len(self._glyphs):
                     break
                 glyph = self._glyphs[key]
+                self._observeGlyph(glyph, key)
+                if verticalMetrics is None:
+                    verticalMetrics = _glyphCellVerticalMetrics(glyph)
+                cells.append((key, glyph, column * squareSize,
+                              row * squareSize) + self._cellLayout(glyph))
 
-                painter.save()
-                painter.translate(column * self.squareSize,
-                                  row * self.squareSize)
-                painter.fillRect(0, 0, self.squareSize,
-                                 self.squareSize, Qt.white)
-                # prepare header colors
-                brushColor = gradient
-                linesColor = cellHeaderHighlightLineColor
-                # mark color
+        # glyph bodies, served from the cell cache
+        for key, glyph, x, y, _, _ in cells:
+            pixmap = self._glyphCellPixmap(
+                key, bodySize, devicePixelRatio, verticalMetrics)
+            if pixmap is not None:
+                painter.drawPixmap(x, y + GlyphCellHeaderHeight, pixmap)
+            else:
+                # placeholder until the renderer is done
+                color = Qt.white
                 if not glyph.template and glyph.markColor is not None:
-                    markColor = QColor.fromRgbF(*tuple(glyph.markColor))
-                    markGradient.setColorAt(1.0, markColor)
-                    markGradient.setColorAt(0.0, markColor.lighter(125))
-                    painter.fillRect(0, GlyphCellHeaderHeight, self.squareSize,
-                                     self.squareSize - GlyphCellHeaderHeight,
-                                     QBrush(markGradient))
-                if not glyph.template and glyph.dirty:
-                    brushColor = dirtyGradient
-                    linesColor = cellHeaderHighlightLineColor.darker(110)
-
-                # header gradient
-                painter.fillRect(0, 0, self.squareSize, GlyphCellHeaderHeight,
-                                 QBrush(brushColor))
-                # header lines
-                painter.setPen(linesColor)
-                minOffset = painter.pen().width()
-                # disable antialiasing to avoid lines bleeding over background
-                painter.setRenderHint(QPainter.Antialiasing, False)
-                painter.drawLine(0, 0, 0, GlyphCellHeaderHeight - 1)
-                painter.drawLine(self.squareSize - 2, 0,
-                                 self.squareSize - 2,
-                                 GlyphCellHeaderHeight - 1)
-                painter.setPen(QColor(170, 170, 170))
-                painter.drawLine(0, GlyphCellHeaderHeight,
-                                 self.squareSize, GlyphCellHeaderHeight)
-                painter.setRenderHint(QPainter.Antialiasing)
-                # header text
-                painter.setFont(headerFont)
-                painter.setPen(QColor(80, 80, 80))
-                name = metrics.elidedText(
-                    glyph.name, Qt.ElideRight, self.squareSize - 2)
-                painter.drawText(1, 0, self.squareSize - 2,
-                                 GlyphCellHeaderHeight - minOffset,
-                                 Qt.TextSingleLine | Qt.AlignCenter,
-                                 name)
-                painter.restore()
-
-                painter.setPen(cellGridColor)
-                rightEdgeX = column * self.squareSize + self.squareSize
-                bottomEdgeY = row * self.squareSize + self.squareSize
-                painter.drawLine(rightEdgeX, row *
-                                 self.squareSize + 1, rightEdgeX, bottomEdgeY)
-                painter.drawLine(rightEdgeX, bottomEdgeY,
-                                 column * self.squareSize + 1, bottomEdgeY)
-                if self._currentDropIndex is not None:
-                    painter.setPen(Qt.green)
-                    if self._currentDropIndex == key:
+                    color = QColor.fromRgbF(
+                        *tuple(glyph.markColor)).lighter(125)
+                painter.fillRect(
+                    x, y + GlyphCellHeaderHeight,
+                    bodySize.width(), bodySize.height(), color)
+
+        # headers
+        lines = []
+        dirtyLines = []
+        separators = []
+        for _, _, x, y, _, dirty in cells:
+            if dirty:
+                brush = cellHeaderDirtyBrush
+                cellLines = dirtyLines
+            else:
+                brush = cellHeaderBrush
+                cellLines = lines
+            painter.fillRect(x, y, squareSize, GlyphCellHeaderHeight, brush)
+            cellLines.append(QLine(x, y, x, y + GlyphCellHeaderHeight - 1))
+            cellLines.append(QLine(
+                x + squareSize - 2, y,
+                x + squareSize - 2, y + GlyphCellHeaderHeight - 1))
+            separators.append(QLine(
+                x, y + GlyphCellHeaderHeight,
+                x + squareSize, y + GlyphCellHeaderHeight))
+        painter.save()
+        # disable antialiasing to avoid lines bleeding over background
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        for color, cellLines in (
+                (cellHeaderHighlightLineColor, lines),
+                (cellHeaderHighlightLineColor.darker(110), dirtyLines),
+                (QColor(170, 170, 170), separators)):
+            if cellLines:
+                painter.setPen(color)
+                painter.drawLines(cellLines)
+        painter.restore()
+        # header text
+        painter.setFont(headerFont)
+        painter.setPen(QColor(80, 80, 80))
+        for _, _, x, y, name, _ in cells:
+            painter.drawText(x + 1, y, squareSize - 2,
+                             GlyphCellHeaderHeight - 1,
+                             Qt.TextSingleLine | Qt.AlignCenter, name)
+
+        # grid
+        gridLines = []
+        for _, _, x, y, _, _ in cells:
+            rightEdgeX = x + squareSize
+            bottomEdgeY = y + squareSize
+            gridLines.append(
+                QLine(rightEdgeX, y + 1, rightEdgeX, bottomEdgeY))
+            gridLines.append(
+                QLine(rightEdgeX, bottomEdgeY, x + 1, bottomEdgeY))
+        if gridLines:
+            painter.setPen(cellGridColor)
+            painter.drawLines(gridLines)
+
+        if self._currentDropIndex is not None:
+            painter.setPen(Qt.green)
+            for key, _, x, y, _, _ in cells:
+                bottomEdgeY = y + squareSize
+                if self._currentDropIndex == key:
+                    painter.drawLine(x, y, x, bottomEdgeY)
+                # special-case the end-column
+                elif (x // squareSize == endColumn and
+                        self._currentDropIndex == key + 1):
+                    yPos = self.mapFromGlobal(QCursor.pos()).y()
+                    if y // squareSize == yPos // squareSize:
+                        rightEdgeX = x + squareSize
                         painter.drawLine(
-                            column * self.squareSize, row * self.squareSize,
-                            column * self.squareSize, bottomEdgeY)
-                    # special-case the end-column
-                    elif (column == endColumn and
-                            self._currentDropIndex == key + 1):
-                        yPos = self.mapFromGlobal(QCursor.pos()).y()
-                        if row == yPos // self.squareSize:
-                            painter.drawLine(
-                                rightEdgeX - 1, row * self.squareSize,
-                                rightEdgeX - 1, bottomEdgeY)
-
-                # selection code
-                if key in self._selection:
-                    painter.setRenderHint(QPainter.Antialiasing, False)
-                    painter.fillRect(column * self.squareSize + 1,
-                                     row * self.squareSize + 1,
-                                     self.squareSize - 3,
-                                     self.squareSize - 3,
-                                     cellSelectionColor)
-                    painter.setRenderHint(QPainter.Antialiasing)
-
-                if not glyph.template:
-                    font = glyph.getParent()
-                    outline = glyph.getRepresentation("defconQt.QPainterPath")
-                    uPM = font.info.unitsPerEm
-                    if uPM is None or not uPM > 0:
-                        uPM = 1000
-                    descender = font.info.descender
-                    if descender is None or not descender < 0:
-                        descender = -250
-                    factor = (self.squareSize - GlyphCellHeaderHeight) / \
-                        (uPM * (1 + 2 * GlyphCellBufferHeight))
-                    x_offset = (self.squareSize - glyph.width * factor) / 2
-                    # If the glyph overflows horizontally we need to adjust the
-                    # scaling factor
-                    if x_offset < 0:
-                        factor *= 1 + 2 * x_offset / (glyph.width * factor)
-                        x_offset = 0
-                    # TODO: the * 1.8 below is somewhat artificial
-                    y_offset = descender * factor * 1.8
-                    painter.save()
-                    painter.setClipRect(
-                        column * self.squareSize,
-                        row * self.squareSize + GlyphCellHeaderHeight,
-                        self.squareSize,
-                        self.squareSize - GlyphCellHeaderHeight)
-                    painter.translate(
-                        column * self.squareSize + x_offset,
-                        row * self.squareSize + self.squareSize + y_offset)
-                    painter.scale(factor, -factor)
-                    painter.fillPath(outline, Qt.black)
-                    painter.restore()
-                else:
-                    painter.save()
-                    painter.setFont(voidFont)
-                    painter.setPen(QPen(Qt.lightGray))
-                    rect = QRectF(
-                        column * self.squareSize,
-                        row * self.squareSize + GlyphCellHeaderHeight,
-                        self.squareSize,
-                        self.squareSize - GlyphCellHeaderHeight)
-                    if glyph.unicode is not None:
-                        text = chr(glyph.unicode)
-                    else:
-                        text = "✌"
-                    painter.drawText(rect, Qt.AlignCenter, text)
-                    painter.restore()
+                            rightEdgeX - 1, y, rightEdgeX - 1, bottomEdgeY)
+
+        # selection code
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        for key, _, x, y, _, _ in cells:
+            if key in self._selection:
+                painter.fillRect(x + 1, y + 1, squareSize - 3,
+                                 squareSize - 3, cellSelectionColor)
+        painter.restore()
+
+        self._pruneCellIndexes()
@@ -1,5 +1,6 @@
 from defconQt.glyphCollectionView import headerFont
 from defconQt.objects.defcon import TGlyph
+from defconQt.objects.spatialIndex import GlyphSpatialIndex
 from defconQt.objects.glyphDialogs import (
     GotoDialog, AddLayerDialog, LayerActionsDialog)
 # TODO: make stdTools reexport?
@@ -10,9 +11,10 @@ from defconQt.tools.rulerTool import RulerTool
 from defconQt.tools.knifeTool import KnifeTool
 from defconQt.tools.removeOverlapButton import RemoveOverlapButton
 from defconQt.util import drawing
-from PyQt5.QtCore import QEvent, QMimeData, QPointF, QSize, Qt
+from defconQt.util.refreshScheduler import refreshScheduler
+from PyQt5.QtCore import QEvent, QMimeData, QPointF, QRectF, QSize, Qt
 from PyQt5.QtGui import (
-    QIcon, QKeySequence, QMouseEvent, QPainter, QPainterPath)
+    QIcon, QKeySequence, QMouseEvent, QPainter, QPainterPath, QPixmap)
 from PyQt5.QtWidgets import (
     QActionGroup, QApplication, QComboBox, QMainWindow, QMenu, QScrollArea,
     QSizePolicy, QToolBar, QWidget)
@@ -277,15 +279,16 @@ class MainGlyphWindow(QMainWindow):
             self._unsubscribeFromFontAndLayerSet(glyph.font)
 
     def _glyphChanged(self, notification):
-        self.view.glyphChanged()
+        refreshScheduler().schedule(self, "glyph", self.view.glyphChanged)
 
     def _glyphNameChanged(self, notification):
         glyph = self.view.glyph()
         self.setWindowTitle(glyph.name, glyph.font)
 
     def _glyphSelectionChanged(self, notification):
-        self._updateSelection()
-        self.view.glyphChanged()
+        scheduler = refreshScheduler()
+        scheduler.schedule(self, "selection", self._updateSelection)
+        scheduler.schedule(self, "glyph", self.view.glyphChanged)
 
     def _fontInfoChanged(self, notification):
         self.view.fontInfoChanged()
@@ -445,6 +448,9 @@ class MainGlyphWindow(QMainWindow):
     def closeEvent(self, event):
         glyph = self.view.glyph()
         self._unsubscribeFromGlyph(glyph)
+        self.view.closeSpatialIndex()
+        self.view.invalidateStaticLayers()
+        refreshScheduler().cancel(self)
         event.accept()
 
     def setWindowTitle(self, title, font=None):
@@ -460,6 +466,11 @@ class GlyphView(QWidget):
         super().__init__(parent)
         self._currentTool = BaseTool()
         self._glyph = None
+        self._glyphSpatialIndex = None
+        # static layers cache
+        self._staticLayers = None
+        self._staticLayersKey = None
+        self._staticObservations = []
 
         # drawing attributes
         self._layerDrawingAttributes = {}
@@ -487,6 +498,7 @@ class GlyphView(QWidget):
 
         # drawing data cache
         self._drawingRect = None
+        self._paintRect = None
         self._scale = 1.0
         self._inverseScale = 0.1
         self._impliedPointSize = 1000
@@ -552,6 +564,9 @@ class GlyphView(QWidget):
         return self._glyph
 
     def setGlyph(self, glyph):
+        if glyph is not self._glyph:
+            self.closeSpatialIndex()
+        self.invalidateStaticLayers()
         self._glyph = glyph
         self._font = None
         if glyph is not None:
@@ -584,6 +599,52 @@ class GlyphView(QWidget):
     def fontInfoChanged(self):
         self.setGlyph(self._glyph)
 
+    def _spatialIndex(self):
+        if self._glyphSpatialIndex is None:
+            self._glyphSpatialIndex = GlyphSpatialIndex(self._glyph)
+        return self._glyphSpatialIndex
+
+    def closeSpatialIndex(self):
+        """
+        Stops the hit-testing index from observing the glyph. It is rebuilt
+        on the next query.
+        """
+        if self._glyphSpatialIndex is not None:
+            self._glyphSpatialIndex.close()
+            self._glyphSpatialIndex = None
+
+    def invalidateStaticLayers(self):
+        """
+        Drops the cached rendering of the static layers, i.e. everything but
+        the outline, points and anchors of the current glyph.
+        """
+        self._staticLayers = None
+        self._unobserveStaticLayers()
+
+    def _staticLayersChanged(self, notification):
+        self.invalidateStaticLayers()
+        self.update()
+
+    def _observeStaticLayers(self, observations):
+        self._unobserveStaticLayers()
+        dispatcher = self._glyph.dispatcher
+        if dispatcher is None:
+            return
+        for notification, observable in observations:
+            dispatcher.addObserver(
+                observer=self, methodName="_staticLayersChanged",
+                notification=notification, observable=observable)
+        self._staticObservations = [
+            (dispatcher, notification, observable)
+            for notification, observable in observations]
+
+    def _unobserveStaticLayers(self):
+        for dispatcher, notification, observable in self._staticObservations:
+            dispatcher.removeObserver(
+                observer=self, notification=notification,
+                observable=observable)
+        self._staticObservations = []
+
     # ---------------
     # Display Control
     # ---------------
@@ -601,6 +662,7 @@ class GlyphView(QWidget):
             if layerName not in self._layerDrawingAttributes:
                 self._layerDrawingAttributes[layerName] = {}
             self._layerDrawingAttributes[layerName][attr] = value
+        self.invalidateStaticLayers()
         self.update()
 
     def showFill(self):
@@ -677,32 +739,32 @@ class GlyphView(QWidget):
 
     def drawImage(self, painter, glyph, layerName):
         drawing.drawGlyphImage(
-            painter, glyph, self._inverseScale, self._drawingRect)
+            painter, glyph, self._inverseScale, self._paintRect)
 
     def drawBlues(self, painter, glyph, layerName):
         drawing.drawFontPostscriptBlues(
-            painter, glyph, self._inverseScale, self._drawingRect)
+            painter, glyph, self._inverseScale, self._paintRect)
 
     def drawFamilyBlues(self, painter, glyph, layerName):
         drawing.drawFontPostscriptFamilyBlues(
-            painter, glyph, self._inverseScale, self._drawingRect)
+            painter, glyph, self._inverseScale, self._paintRect)
 
     def drawVerticalMetrics(self, painter, glyph, layerName):
         drawText = self._impliedPointSize > 175
         drawing.drawFontVerticalMetrics(
-            painter, glyph, self._inverseScale, self._drawingRect,
+            painter, glyph, self._inverseScale, self._paintRect,
             drawText=drawText)
 
     def drawMargins(self, painter, glyph, layerName):
         drawing.drawGlyphMargins(
-            painter, glyph, self._inverseScale, self._drawingRect)
+            painter, glyph, self._inverseScale, self._paintRect)
 
     def drawFillAndStroke(self, painter, glyph, layerName):
         partialAliasing = self._impliedPointSize > 175
         showFill = self.drawingAttribute("showGlyphFill", layerName)
         showStroke = self.drawingAttribute("showGlyphStroke", layerName)
         drawing.drawGlyphFillAndStroke(
-            painter, glyph, self._inverseScale, self._drawingRect,
+            painter, glyph, self._inverseScale, self._paintRect,
             drawFill=showFill, drawStroke=showStroke,
             partialAliasing=partialAliasing)
 
@@ -719,7 +781,7 @@ class GlyphView(QWidget):
             "showGlyphPointCoordinates", layerName) and \
             self._impliedPointSize > 250
         drawing.drawGlyphPoints(
-            painter, glyph, self._inverseScale, self._drawingRect,
+            painter, glyph, self._inverseScale, self._paintRect,
             drawStartPoints=drawStartPoints, drawOnCurves=drawOnCurves,
             drawOffCurves=drawOffCurves, drawCoordinates=drawCoordinates,
             backgroundColor=Qt.white)
@@ -728,25 +790,66 @@ class GlyphView(QWidget):
         if not self._impliedPointSize > 175:
             return
         drawing.drawGlyphAnchors(
-            painter, glyph, self._inverseScale, self._drawingRect)
+            painter, glyph, self._inverseScale, self._paintRect)
 
     # ---------------
     # QWidget methods
     # ---------------
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setFont(headerFont)
-        painter.setRenderHint(QPainter.Antialiasing)
-        rect = self.rect()
-
-        # draw the background
-        painter.fillRect(rect, Qt.white)
-        if self._glyph is None:
-            return
+    def _drawStaticParts(self, painter, glyph, layerName):
+        # draw the image
+        if self.drawingAttribute("showGlyphImage", layerName):
+            self.drawImage(painter, glyph, layerName)
+        # draw the blues
+        if layerName is None and self.drawingAttribute(
+                "showFontPostscriptBlues", None):
+            self.drawBlues(painter, glyph, layerName)
+        if layerName is None and self.drawingAttribute(
+                "showFontPostscriptFamilyBlues", None):
+            self.drawFamilyBlues(painter, glyph, layerName)
+        # draw the margins
+        if self.drawingAttribute("showGlyphMargins", layerName):
+            self.drawMargins(painter, glyph, layerName)
+        # draw the vertical metrics
+        if layerName is None and self.drawingAttribute(
+                "showFontVerticalMetrics", None):
+            self.drawVerticalMetrics(painter, glyph, layerName)
+
+    def _drawLiveParts(self, painter, glyph, layerName):
+        # draw the glyph
+        if self.drawingAttribute("showGlyphFill", layerName) or \
+                self.drawingAttribute("showGlyphStroke", layerName):
+            # XXX: trying to debug an assertion failure
+            try:
+                self.drawFillAndStroke(painter, glyph, layerName)
+            except AssertionError as e:
+                import traceback
+                print("**********")
+                print("Internal error:", str(e))
+                print()
+                print(traceback.print_exc())
+                print()
+                for contour in self._glyph:
+                    for point in contour:
+                        print(point)
+                    print()
+                print("**********")
+                return False
+        if self.drawingAttribute("showGlyphOnCurvePoints", layerName) or \
+                self.drawingAttribute("showGlyphOffCurvePoints",
+                                      layerName):
+            self.drawPoints(painter, glyph, layerName)
+        if self.drawingAttribute("showGlyphAnchors", layerName):
+            self.drawAnchors(painter, glyph, layerName)
+        return True
+
+    def _drawLayers(self, painter, layers):
+        for glyph, layerName in layers:
+            self._drawStaticParts(painter, glyph, layerName)
+            if not self._drawLiveParts(painter, glyph, layerName):
+                return
 
-        # apply the overall scale
-        painter.save()
+    def _transformPainter(self, painter):
         # + translate and flip
         painter.translate(0, self.height())
         painter.scale(self._scale, -self._scale)
@@ -768,6 +871,83 @@ class GlyphView(QWidget):
         h *= self._inverseScale
         self._drawingRect = (-xOffset, -yOffset, w, h)
 
+    def _setPaintRect(self, rect):
+        # store the canvas rect of the widget *rect* being painted
+        rect = QRectF(rect)
+        topLeft = self.mapToCanvas(rect.topLeft())
+        bottomRight = self.mapToCanvas(rect.bottomRight())
+        self._paintRect = (
+            topLeft.x(), bottomRight.y(), bottomRight.x() - topLeft.x(),
+            topLeft.y() - bottomRight.y())
+
+    def _renderStaticLayers(self, rect, layers, background):
+        pixelRatio = self.devicePixelRatioF()
+        pixmap = QPixmap(rect.size() * pixelRatio)
+        pixmap.setDevicePixelRatio(pixelRatio)
+        pixmap.fill(background)
+        painter = QPainter(pixmap)
+        painter.setFont(headerFont)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.translate(-rect.x(), -rect.y())
+        self._transformPainter(painter)
+        self._setPaintRect(rect)
+        for glyph, layerName in layers:
+            self._drawStaticParts(painter, glyph, layerName)
+            if layerName is not None:
+                self._drawLiveParts(painter, glyph, layerName)
+        painter.end()
+        return pixmap
+
+    def _updateStaticLayers(self, rect, layers):
+        """
+        Renders the layers below and above the current glyph along with its
+        own image, blues, margins and metrics into pixmaps of the visible
+        *rect*, unless those of the last paint are still valid.
+        """
+        key = (rect.getRect(), self.width(), self.height(), self._scale,
+               self._verticalCenterYBuffer, self._descender,
+               self._glyph.width, self.devicePixelRatioF())
+        if self._staticLayers is not None and key == self._staticLayersKey:
+            return
+        index = [layerName for _, layerName in layers].index(None)
+        below = layers[:index + 1]
+        above = layers[index + 1:]
+        self._staticLayers = (
+            self._renderStaticLayers(rect, below, Qt.white),
+            above and self._renderStaticLayers(rect, above, Qt.transparent))
+        self._staticLayersKey = key
+        # watch for changes to what is in the pixmaps
+        glyph = self._glyph
+        observations = [
+            ("Glyph.WidthChanged", glyph),
+            ("Glyph.ImageChanged", glyph),
+        ]
+        layerSet = glyph.layerSet
+        if layerSet is not None:
+            observations.extend([
+                ("LayerSet.LayersChanged", layerSet),
+                ("LayerSet.LayerOrderChanged", layerSet),
+            ])
+            for layer in layerSet:
+                for notification in ("Layer.GlyphAdded", "Layer.GlyphDeleted",
+                                     "Layer.ColorChanged"):
+                    observations.append((notification, layer))
+        for other, layerName in layers:
+            if layerName is not None:
+                observations.append(("Glyph.Changed", other))
+        self._observeStaticLayers(observations)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setFont(headerFont)
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = self.rect()
+
+        # draw the background
+        painter.fillRect(rect, Qt.white)
+        if self._glyph is None:
+            return
+
         # gather the layers
         layerSet = self._glyph.layerSet
         if layerSet is None:
@@ -784,50 +964,34 @@ class GlyphView(QWidget):
                     layerName = None
                 layers.append((glyph, layerName))
 
-        for glyph, layerName in layers:
-            # draw the image
-            if self.drawingAttribute("showGlyphImage", layerName):
-                self.drawImage(painter, glyph, layerName)
-            # draw the blues
-            if layerName is None and self.drawingAttribute(
-                    "showFontPostscriptBlues", None):
-                self.drawBlues(painter, glyph, layerName)
-            if layerName is None and self.drawingAttribute(
-                    "showFontPostscriptFamilyBlues", None):
-                self.drawFamilyBlues(painter, glyph, layerName)
-            # draw the margins
-            if self.drawingAttribute("showGlyphMargins", layerName):
-                self.drawMargins(painter, glyph, layerName)
-            # draw the vertical metrics
-            if layerName is None and self.drawingAttribute(
-                    "showFontVerticalMetrics", None):
-                self.drawVerticalMetrics(painter, glyph, layerName)
-            # draw the glyph
-            if self.drawingAttribute("showGlyphFill", layerName) or \
-                    self.drawingAttribute("showGlyphStroke", layerName):
-                # XXX: trying to debug an assertion failure
-                try:
-                    self.drawFillAndStroke(painter, glyph, layerName)
-                except AssertionError as e:
-                    import traceback
-                    print("**********")
-                    print("Internal error:", str(e))
-                    print()
-                    print(traceback.print_exc())
-                    print()
-                    for contour in self._glyph:
-                        for point in contour:
-                            print(point)
-                        print()
-                    print("**********")
-                    painter.restore()
-                    return
-            if self.drawingAttribute("showGlyphOnCurvePoints", layerName) or \
-                    self.drawingAttribute("showGlyphOffCurvePoints",
-                                          layerName):
-                self.drawPoints(painter, glyph, layerName)
-            if self.drawingAttribute("showGlyphAnchors", layerName):
-                self.drawAnchors(painter, glyph, layerName)
+        visibleRect = self.visibleRegion().boundingRect().united(
+            event.rect())
+        if visibleRect.isEmpty() or None not in (
+                layerName for _, layerName in layers):
+            # nothing worth caching
+            painter.save()
+            self._transformPainter(painter)
+            self._setPaintRect(event.rect())
+            self._drawLayers(painter, layers)
+            self._currentTool.paint(painter)
+            painter.restore()
+            return
+
+        # blit the static layers, only draw the current glyph on top
+        self._updateStaticLayers(visibleRect, layers)
+        below, above = self._staticLayers
+        painter.drawPixmap(visibleRect.topLeft(), below)
+        painter.save()
+        self._transformPainter(painter)
+        self._setPaintRect(event.rect())
+        ok = self._drawLiveParts(painter, self._glyph, None)
+        painter.restore()
+        if not ok:
+            return
+        if above:
+            painter.drawPixmap(visibleRect.topLeft(), above)
+        painter.save()
+        self._transformPainter(painter)
         self._currentTool.paint(painter)
         painter.restore()
 
@@ -971,10 +1135,10 @@ class GlyphView(QWidget):
 
     def _itemsAt(self, func, obj, justOne=True):
         """
-        Go through all anchors, points and components (in this order) in the
-        glyph, construct their canvas path and list items for which
-        *func(path, obj)* returns True, or only return the first item if
-        *justOne* is set to True.
+        Go through the anchors, points and components (in this order) of the
+        glyph that the spatial index finds around *obj*, construct their
+        canvas path and list items for which *func(path, obj)* returns True,
+        or only return the first item if *justOne* is set to True.
 
         An item is a (point, contour) or (anchor, None) or (component, None)
         tuple. The second argument permits accessing parent contour to post
@@ -1010,7 +1174,18 @@ class GlyphView(QWidget):
                 points=[],
                 components=[],
             )
-        for anchor in reversed(self._glyph.anchors):
+        # only test the items the spatial index puts near obj
+        if isinstance(obj, QPainterPath):
+            rect = obj.boundingRect()
+        elif isinstance(obj, QRectF):
+            rect = obj
+        else:
+            rect = QRectF(obj, obj)
+        margin = max(anchorHalfSize, offHalf, onHalf, smoothHalf)
+        bounds = (rect.left() - margin, rect.top() - margin,
+                  rect.right() + margin, rect.bottom() + margin)
+        anchors, points, components = self._spatialIndex().query(bounds)
+        for anchor in anchors:
             path = QPainterPath()
             path.addEllipse(anchor.x - anchorHalfSize,
                             anchor.y - anchorHalfSize, anchorSize, anchorSize)
@@ -1018,27 +1193,26 @@ class GlyphView(QWidget):
                 if justOne:
                     return (anchor, None)
                 ret["anchors"].append(anchor)
-        for contour in reversed(self._glyph):
-            for point in contour:
-                path = QPainterPath()
-                if point.segmentType is None:
-                    x = point.x - offHalf
-                    y = point.y - offHalf
-                    path.addEllipse(x, y, offWidth, offWidth)
-                elif point.smooth:
-                    x = point.x - smoothHalf
-                    y = point.y - smoothHalf
-                    path.addEllipse(x, y, smoothWidth, smoothWidth)
-                else:
-                    x = point.x - onHalf
-                    y = point.y - onHalf
-                    path.addRect(x, y, onWidth, onWidth)
-                if func(path, obj):
-                    if justOne:
-                        return (point, contour)
-                    ret["contours"].append(contour)
-                    ret["points"].append(point)
-        for component in reversed(self._glyph.components):
+        for point, contour in points:
+            path = QPainterPath()
+            if point.segmentType is None:
+                x = point.x - offHalf
+                y = point.y - offHalf
+                path.addEllipse(x, y, offWidth, offWidth)
+            elif point.smooth:
+                x = point.x - smoothHalf
+                y = point.y - smoothHalf
+                path.addEllipse(x, y, smoothWidth, smoothWidth)
+            else:
+                x = point.x - onHalf
+                y = point.y - onHalf
+                path.addRect(x, y, onWidth, onWidth)
+            if func(path, obj):
+                if justOne:
+                    return (point, contour)
+                ret["contours"].append(contour)
+                ret["points"].append(point)
+        for component in components:
             path = component.getRepresentation("defconQt.QPainterPath")
             if func(path, obj):
                 if justOne:
@@ -2,6 +2,7 @@ from defconQt import icons_db  # noqa
 from defconQt.glyphCollectionView import cellSelectionColor
 from defconQt.glyphView import MainGlyphWindow
 from defconQt.objects.defcon import TGlyph
+from defconQt.util.refreshScheduler import refreshScheduler
 from getpass import getuser
 from PyQt5.QtCore import QEvent, QSettings, QSize, Qt
 from PyQt5.QtGui import (
@@ -91,6 +92,7 @@ class MainMetricsWindow(QWidget):
     def closeEvent(self, event):
         self.font.info.removeObserver(self, "Info.Changed")
         self._unsubscribeFromGlyphs()
+        refreshScheduler().cancel(self)
 
     def _fontInfoChanged(self, notification):
         self.canvas.fetchFontMetrics()
@@ -100,7 +102,9 @@ class MainMetricsWindow(QWidget):
     def _glyphChanged(self, notification):
         self.canvas.update()
         if not self.table._editing:
-            self.table.updateCells(self.canvas._editing)
+            keepColor = self.canvas._editing
+            refreshScheduler().schedule(
+                self, "table", lambda: self.table.updateCells(keepColor))
 
     def _glyphOpened(self, glyph):
         glyphViewWindow = MainGlyphWindow(glyph, self.parent())
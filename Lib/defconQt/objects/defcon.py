@@ -1,9 +1,37 @@
 from booleanOperations.booleanGlyph import BooleanGlyph
 from defcon import Font, Contour, Glyph, Anchor, Component, Point
 from defcon.objects.base import BaseObject
-from PyQt5.QtCore import pyqtSignal, QObject
+from defconQt.objects.notificationProfiler import ProfilingNotificationCenter
+from defconQt.objects.undoManager import (
+    FontUndoManager, UndoJournal, UndoManager)
 from PyQt5.QtWidgets import QApplication
+from collections.abc import MutableSequence
+from contextlib import contextmanager
 import fontTools
+import weakref
+
+
+@contextmanager
+def _batchNotifications(observables):
+    """
+    Holds the notifications of *observables*, releasing them in order on
+    exit. Children should come before their parents, so that the parents'
+    reaction to the children notifications is held as well.
+    """
+    held = []
+    try:
+        for observable in observables:
+            dispatcher = observable.dispatcher
+            if dispatcher is None:
+                continue
+            dispatcher.holdNotifications(
+                observable=observable, note="batchNotifications")
+            held.append(observable)
+        yield
+    finally:
+        for observable in held:
+            observable.dispatcher.releaseHeldNotifications(
+                observable=observable)
 
 
 class TFont(Font):
@@ -20,6 +48,15 @@ class TFont(Font):
         if "glyphPointClass" not in kwargs:
             kwargs["glyphPointClass"] = TPoint
         super(TFont, self).__init__(*args, **kwargs)
+        self._undoManager = FontUndoManager(self)
+        self._undoJournal = None
+
+    def beginSelfNotificationObservation(self):
+        # the dispatcher is made in Font.__init__ right before this is
+        # called, replace it before anything observes through it
+        if not isinstance(self._dispatcher, ProfilingNotificationCenter):
+            self._dispatcher = ProfilingNotificationCenter()
+        super(TFont, self).beginSelfNotificationObservation()
 
     def newStandardGlyph(self, name, override=False, addUnicode=True,
                          asTemplate=False, width=500):
@@ -33,20 +70,85 @@ class TFont(Font):
         glyph.template = asTemplate
         return glyph
 
+    def _get_undoJournal(self):
+        if self._undoJournal is None:
+            self._undoJournal = UndoJournal()
+            weakref.finalize(self, self._undoJournal.close)
+        return self._undoJournal
+
+    undoJournal = property(
+        _get_undoJournal, doc="The on-disk store the undo history of the "
+        "font glyphs spills into. Created on first access.")
+
+    def batchNotifications(self, glyphs=()):
+        """
+        Returns a context manager that holds the notifications of *glyphs*,
+        i.e. the glyphs about to be edited, and of the font, its layers and
+        other objects for the duration of a bulk edit. On exit, each held
+        notification is posted once.
+        """
+        observables = list(glyphs)
+        observables.extend(self.layers)
+        observables.extend((
+            self.layers, self.info, self.kerning, self.groups, self.features,
+            self.lib, self))
+        return _batchNotifications(observables)
+
+    @contextmanager
+    def undoTransaction(self, title=None):
+        """
+        Groups the glyph changes made within the context into a single undo
+        step of the font. Glyphs must be prepared with prepareUndo() before
+        they are changed.
+        """
+        self.undoManager.beginTransaction(title)
+        try:
+            yield
+        finally:
+            self.undoManager.endTransaction()
+
     # TODO: stop using that workaround now that we're ufo3
     def save(self, path=None, formatVersion=None):
-        for glyph in self:
+        # glyphs that weren't loaded can't be templates nor modified, don't
+        # load them
+        for glyph in self.layers.defaultLayer._glyphs.values():
             if glyph.template:
                 glyph.dirty = False
         super(TFont, self).save(path, formatVersion)
 
+    # defcon always writes info, groups and lib; skip them when they are
+    # unchanged, as it already does for kerning, features and glyphs
+
+    def _saveInfo(self, writer, saveAs=False, progressBar=None):
+        if self.info.dirty or saveAs:
+            super(TFont, self)._saveInfo(writer, saveAs, progressBar)
+
+    def _saveGroups(self, writer, saveAs=False, progressBar=None):
+        if self.groups.dirty or saveAs:
+            super(TFont, self)._saveGroups(writer, saveAs, progressBar)
+
+    def _saveLib(self, writer, saveAs=False, progressBar=None):
+        if self.lib.dirty or saveAs:
+            super(TFont, self)._saveLib(writer, saveAs, progressBar)
+
 
 class TGlyph(Glyph):
 
     def __init__(self, *args, **kwargs):
         super(TGlyph, self).__init__(*args, **kwargs)
         self._template = False
-        self._undoManager = UndoManager(self)
+
+    # the undo manager is made on first use, so that it belongs to the thread
+    # that uses it rather than to the one that loaded the glyph
+
+    def _get_undoManager(self):
+        if self._undoManager is None:
+            self._undoManager = UndoManager(self)
+        return self._undoManager
+
+    undoManager = property(
+        _get_undoManager, Glyph._set_undoManager,
+        doc="The undo manager of the glyph. Created on first access.")
 
     # observe anchor selection
 
@@ -104,6 +206,14 @@ class TGlyph(Glyph):
             return
         self.postNotification(notification="Glyph.SelectionChanged")
 
+    def batchNotifications(self):
+        """
+        Returns a context manager that holds the glyph notifications for the
+        duration of a bulk edit. On exit, each held notification is posted
+        once.
+        """
+        return _batchNotifications((self,))
+
     def _get_selected(self):
         for contour in self:
             if not contour.selected:
@@ -111,8 +221,9 @@ class TGlyph(Glyph):
         return True
 
     def _set_selected(self, value):
-        for contour in self:
-            contour.selected = value
+        with self.batchNotifications():
+            for contour in self:
+                contour.selected = value
 
     selected = property(
         _get_selected, _set_selected, doc="The selected state of the contour. "
@@ -122,14 +233,32 @@ class TGlyph(Glyph):
     def _get_selection(self):
         selection = set()
         for contour in self:
-            selection.update(contour.selection)
+            selection.update(contour.pointSelection())
         return selection
 
     def _set_selection(self, selection):
-        if selection == self.selection:
+        # only visit the points whose state changes, grouped by contour
+        selection = set(selection)
+        current = self.selection
+        changed = dict()
+        for point in current - selection:
+            contour = point._selection.contour()
+            changed.setdefault(contour, []).append((point, False))
+        for point in selection - current:
+            pointSelection = getattr(point, "_selection", None)
+            if pointSelection is None:
+                continue
+            contour = pointSelection.contour()
+            if contour is not None and contour.glyph is self:
+                changed.setdefault(contour, []).append((point, True))
+        if not changed:
             return
-        for contour in self:
-            contour.selection = selection
+        with self.batchNotifications():
+            for contour, points in changed.items():
+                for point, value in points:
+                    point.selected = value
+                contour.postNotification(
+                    notification="Contour.SelectionChanged")
 
     selection = property(_get_selection, _set_selection,
                          doc="A list of children points that are selected.")
@@ -151,6 +280,27 @@ class TGlyph(Glyph):
 
     dirty = property(BaseObject._get_dirty, _set_dirty)
 
+    def _get_undoJournal(self):
+        font = self.getParent()
+        return getattr(font, "undoJournal", None)
+
+    undoJournal = property(
+        _get_undoJournal, doc="The undo journal of the parent font, if any.")
+
+    def prepareUndo(self, title=None, coalesce=None):
+        """
+        Records the glyph state before a change. When an undo transaction is
+        open on the font, the change becomes part of it.
+
+        *coalesce* merges repeated edits, see UndoManager.prepareTarget().
+        """
+        font = self.getParent()
+        if font is not None and font.undoManager is not None and \
+                font.undoManager.inTransaction():
+            font.undoManager.prepareTarget(self)
+        else:
+            self.undoManager.prepareTarget(title, coalesce)
+
     def autoUnicodes(self):
         app = QApplication.instance()
         if app.GL2UV is not None:
@@ -186,22 +336,86 @@ class TGlyph(Glyph):
             self.dirty = True
 
 
+class _PointSelection(set):
+    """
+    The set of the selected points of a contour. Its points refer to it, so
+    that selecting a point updates the set.
+    """
+    __slots__ = ["contour"]
+
+    def __init__(self, contour):
+        super(_PointSelection, self).__init__()
+        self.contour = weakref.ref(contour)
+
+
 class TContour(Contour):
 
     def __init__(self, *args, **kwargs):
         if not "pointClass" in kwargs:
             kwargs["pointClass"] = TPoint
+        self._pointSelection = _PointSelection(self)
+        # False when points may have been added without going through
+        # insertPoint()
+        self._pointSelectionValid = True
         super().__init__(*args, **kwargs)
 
+    def pointSelection(self):
+        """
+        Returns the set of the selected points, maintained as points are
+        selected. Don't modify it.
+        """
+        pointSelection = self._pointSelection
+        if not self._pointSelectionValid:
+            pointSelection.clear()
+            for point in self._points:
+                point._selection = pointSelection
+                if point._selected:
+                    pointSelection.add(point)
+            self._pointSelectionValid = True
+        return pointSelection
+
+    def insertPoint(self, index, point):
+        point._selection = self._pointSelection
+        if point.selected:
+            self._pointSelection.add(point)
+        super().insertPoint(index, point)
+
+    def removePoint(self, point):
+        self._pointSelection.discard(point)
+        super().removePoint(point)
+        point._selection = None
+
+    def _clear(self, postNotification=True):
+        for point in self._points:
+            point._selection = None
+        self._pointSelection.clear()
+        super()._clear(postNotification)
+
+    # the following replace points without insertPoint()
+
+    def reverse(self):
+        self._pointSelectionValid = False
+        super().reverse()
+
+    def removeSegment(self, segmentIndex, preserveCurve=False):
+        self._pointSelectionValid = False
+        super().removeSegment(segmentIndex, preserveCurve)
+
+    def _splitAndInsertAtSegmentAndT(self, segmentIndex, t, insert):
+        self._pointSelectionValid = False
+        return super()._splitAndInsertAtSegmentAndT(segmentIndex, t, insert)
+
     def _get_selected(self):
-        for point in self:
-            if not point.selected:
-                return False
-        return True
+        return len(self.pointSelection()) == len(self._points)
 
     def _set_selected(self, value):
-        for point in self:
-            point.selected = value
+        pointSelection = self.pointSelection()
+        for point in self._points:
+            point._selected = value
+        if value:
+            pointSelection.update(self._points)
+        else:
+            pointSelection.clear()
         self.postNotification(notification="Contour.SelectionChanged")
 
     selected = property(
@@ -209,18 +423,22 @@ class TContour(Contour):
         "Selected state corresponds to all children points being selected.")
 
     def _get_selection(self):
-        selection = set()
-        for point in self:
-            if point.selected:
-                selection.add(point)
-        return selection
+        return set(self.pointSelection())
 
     def _set_selection(self, selection):
-        if selection == self.selection:
-            return
-        for point in self:
-            point.selected = point in selection
-        self.postNotification(notification="Contour.SelectionChanged")
+        selection = set(selection)
+        pointSelection = self.pointSelection()
+        changed = False
+        for point in pointSelection - selection:
+            point.selected = False
+            changed = True
+        for point in selection:
+            if getattr(point, "_selection", None) is pointSelection and \
+                    not point._selected:
+                point.selected = True
+                changed = True
+        if changed:
+            self.postNotification(notification="Contour.SelectionChanged")
 
     selection = property(_get_selection, _set_selection,
                          doc="A list of children points that are selected.")
@@ -288,17 +506,25 @@ class TComponent(Component):
 
 
 class TPoint(Point):
-    __slots__ = ["_selected"]
+    __slots__ = ["_selected", "_selection"]
 
     def __init__(self, pt, selected=False, **kwargs):
         super(TPoint, self).__init__(pt, **kwargs)
         self._selected = selected
+        # the selection set of the parent contour
+        self._selection = None
 
     def _get_selected(self):
         return self._selected
 
     def _set_selected(self, value):
         self._selected = value
+        selection = self._selection
+        if selection is not None:
+            if value:
+                selection.add(self)
+            else:
+                selection.discard(self)
 
     # TODO: add to repr
     selected = property(
@@ -331,70 +557,68 @@ class GlyphSet(object):
                           doc="List of glyph names.")
 
 
-class UndoManager(QObject):
-    canUndoChanged = pyqtSignal(bool)
-    canRedoChanged = pyqtSignal(bool)
-
-    def __init__(self, parent):
-        super().__init__()
-        self._undoStack = []
-        self._redoStack = []
-        self._parent = parent
-        self._shouldBackupCurrent = False
-
-    def prepareTarget(self, title=None):
-        data = self._parent.serialize()
-        undoWasLocked = not self.canUndo()
-        redoWasEnabled = self.canRedo()
-        # prune eventual redo and add push state
-        self._redoStack = []
-        self._undoStack.append((data, title))
-        # set ptr to current state
-        self._shouldBackupCurrent = True
-        if undoWasLocked:
-            self.canUndoChanged.emit(True)
-        if redoWasEnabled:
-            self.canRedoChanged.emit(False)
-
-    def canUndo(self):
-        return bool(len(self._undoStack))
-
-    def getUndoTitle(self, index):
-        data = self._undoStack[index]
-        return data[1]
-
-    def undo(self, index):
-        data = self._undoStack[index]
-        redoWasLocked = not self.canRedo()
-        if self._shouldBackupCurrent:
-            forwardData = self._parent.serialize()
-            self._redoStack.append((forwardData, None))
-        self._parent.deserialize(data[0])
-        self._redoStack = self._undoStack[index:] + self._redoStack
-        self._undoStack = self._undoStack[:index]
-        self._shouldBackupCurrent = False
-        if redoWasLocked:
-            self.canRedoChanged.emit(True)
-        if not self.canUndo():
-            self.canUndoChanged.emit(False)
-
-    def canRedo(self):
-        return bool(len(self._redoStack))
-
-    def getRedoTitle(self, index):
-        data = self._redoStack[index]
-        return data[1]
-
-    def redo(self, index):
-        data = self._redoStack[index]
-        undoWasLocked = not self.canUndo()
-        self._parent.deserialize(data[0])
-        self._undoStack = self._undoStack + self._redoStack[:index+1]
-        if index + 1 < len(self._redoStack):
-            self._redoStack = self._redoStack[index+1:]
+class LazyGlyphList(MutableSequence):
+    """
+    A list of the glyphs of *font* that only holds their names; glyphs are
+    fetched from the font (and thus loaded from disk) when they are
+    accessed. Glyphs can be assigned or inserted, their name is stored.
+    """
+    __slots__ = ["_font", "_glyphNames"]
+
+    def __init__(self, font, glyphNames=None):
+        self._font = font
+        if glyphNames is None:
+            glyphNames = []
+        self._glyphNames = list(glyphNames)
+
+    def _get_font(self):
+        return self._font
+
+    font = property(_get_font, doc="The font glyphs are taken from.")
+
+    def glyphNames(self):
+        return self._glyphNames
+
+    def loadedGlyph(self, index):
+        """
+        Returns the glyph at *index* if it is loaded already, None otherwise.
+        """
+        name = self._glyphNames[index]
+        return self._font.layers.defaultLayer._glyphs.get(name)
+
+    def _glyph(self, name):
+        if name is None:
+            return None
+        return self._font[name]
+
+    @staticmethod
+    def _name(glyph):
+        if glyph is None:
+            return None
+        return glyph.name
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._glyph(name) for name in self._glyphNames[index]]
+        return self._glyph(self._glyphNames[index])
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self._glyphNames[index] = [self._name(glyph) for glyph in value]
         else:
-            self._redoStack = []
-        if undoWasLocked:
-            self.canUndoChanged.emit(True)
-        if not self.canRedo():
-            self.canRedoChanged.emit(False)
+            self._glyphNames[index] = self._name(value)
+
+    def __delitem__(self, index):
+        del self._glyphNames[index]
+
+    def __len__(self):
+        return len(self._glyphNames)
+
+    def __contains__(self, glyph):
+        return self._name(glyph) in self._glyphNames
+
+    def index(self, glyph, *args):
+        return self._glyphNames.index(self._name(glyph), *args)
+
+    def insert(self, index, glyph):
+        self._glyphNames.insert(index, self._name(glyph))
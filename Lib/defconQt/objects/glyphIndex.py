@@ -0,0 +1,222 @@
+from defconQt.objects.defcon import LazyGlyphList
+from bisect import bisect_left, bisect_right, insort
+
+
+def maskFromPositions(positions, size):
+    """
+    Returns an int whose bit *i* is set for every *i* in *positions*.
+    """
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, "little")
+
+
+def positionsFromMask(mask):
+    """
+    Returns the sorted list of the bits set in *mask*.
+    """
+    # bin() reversed puts bit i at string index i
+    bits = bin(mask)[:1:-1]
+    positions = []
+    position = bits.find("1")
+    while position >= 0:
+        positions.append(position)
+        position = bits.find("1", position + 1)
+    return positions
+
+
+class GlyphIndex(object):
+    """
+    Indexes a list of glyphs on name, unicodes and dirty, template and marked
+    flags. Queries answer with positions in the list.
+
+    The index observes *Glyph.Changed* to stay up-to-date with glyph edits;
+    changes to the list itself aren't tracked, build a new index then (and
+    close() the former one).
+
+    Glyphs of a LazyGlyphList aren't loaded until a flag query needs them,
+    their unicodes are taken from the font's unicodeData.
+    """
+    flagNames = ("dirty", "template", "marked")
+
+    def __init__(self, glyphs):
+        self._glyphs = glyphs
+        lazy = isinstance(glyphs, LazyGlyphList)
+        if lazy:
+            names = glyphs.glyphNames()
+            cmap = glyphs.font.unicodeData
+            unicodes = dict()
+            for code, glyphNames in cmap.items():
+                for glyphName in glyphNames:
+                    unicodes.setdefault(glyphName, []).append(code)
+        else:
+            names = [glyph.name for glyph in glyphs]
+        self._size = len(names)
+        self._names = list(names)
+        self._sortedNames = sorted(zip(names, range(self._size)))
+        self._unicodes = [()] * self._size
+        self._codes = []
+        self._positions = dict()
+        self._flags = dict((flag, 0) for flag in self.flagNames)
+        # positions of the glyphs we don't observe yet
+        self._unresolved = list(range(self._size))
+        for position, name in enumerate(names):
+            if lazy:
+                codes = tuple(sorted(unicodes.get(name, ())))
+            else:
+                codes = tuple(sorted(glyphs[position].unicodes))
+            self._unicodes[position] = codes
+            self._codes.extend((code, position) for code in codes)
+        self._codes.sort()
+        self._adoptGlyphs(load=not lazy)
+
+    def close(self):
+        """
+        Stops observing glyphs.
+        """
+        for glyph in self._positions:
+            glyph.removeObserver(self, "Glyph.Changed")
+        self._positions = dict()
+
+    def __len__(self):
+        return self._size
+
+    # --------
+    # Indexing
+    # --------
+
+    @staticmethod
+    def _glyphFlags(glyph):
+        template = glyph.template
+        return dict(
+            dirty=not template and glyph.dirty,
+            template=template,
+            marked=not template and glyph.markColor is not None,
+        )
+
+    def _indexFlags(self, glyph, position):
+        bit = 1 << position
+        for flag, value in self._glyphFlags(glyph).items():
+            if value:
+                self._flags[flag] |= bit
+            else:
+                self._flags[flag] &= ~bit
+
+    def _adoptGlyphs(self, load=False):
+        """
+        Starts observing the glyphs of the list that were loaded since we
+        last looked, or all of them if *load* is True.
+        """
+        flagged = dict((flag, []) for flag in self.flagNames)
+        unresolved = []
+        for position in self._unresolved:
+            if load:
+                glyph = self._glyphs[position]
+            else:
+                glyph = self._glyphs.loadedGlyph(position)
+                if glyph is None:
+                    unresolved.append(position)
+                    continue
+            self._positions[glyph] = position
+            glyph.addObserver(self, "_glyphChanged", "Glyph.Changed")
+            # the glyph may have been edited while we weren't looking
+            self._indexAttributes(glyph, position)
+            for flag, value in self._glyphFlags(glyph).items():
+                if value:
+                    flagged[flag].append(position)
+        # glyphs we didn't observe have no flag set so far
+        for flag, positions in flagged.items():
+            self._flags[flag] |= maskFromPositions(positions, self._size)
+        self._unresolved = unresolved
+
+    def _sync(self, load=False):
+        if self._unresolved:
+            self._adoptGlyphs(load)
+
+    def _indexAttributes(self, glyph, position):
+        name = glyph.name
+        oldName = self._names[position]
+        if name != oldName:
+            del self._sortedNames[
+                bisect_left(self._sortedNames, (oldName, position))]
+            insort(self._sortedNames, (name, position))
+            self._names[position] = name
+        codes = tuple(sorted(glyph.unicodes))
+        oldCodes = self._unicodes[position]
+        if codes != oldCodes:
+            for code in oldCodes:
+                del self._codes[bisect_left(self._codes, (code, position))]
+            for code in codes:
+                insort(self._codes, (code, position))
+            self._unicodes[position] = codes
+
+    def _glyphChanged(self, notification):
+        glyph = notification.object
+        position = self._positions.get(glyph)
+        if position is None:
+            return
+        self._indexFlags(glyph, position)
+        self._indexAttributes(glyph, position)
+
+    # -------
+    # Queries
+    # -------
+
+    def allMask(self):
+        return (1 << self._size) - 1
+
+    def typeAhead(self, text):
+        """
+        Returns the position of the glyph whose name is the smallest one that
+        starts with *text*, or else the smallest one greater than *text*.
+        None if there is no such glyph.
+        """
+        self._sync()
+        # the names that start with text immediately follow it in sort order
+        index = bisect_left(self._sortedNames, (text,))
+        if index == len(self._sortedNames):
+            return None
+        return self._sortedNames[index][1]
+
+    def prefixMask(self, prefix):
+        self._sync()
+        sortedNames = self._sortedNames
+        start = bisect_left(sortedNames, (prefix,))
+        stop = start
+        count = len(sortedNames)
+        while stop < count and sortedNames[stop][0].startswith(prefix):
+            stop += 1
+        return maskFromPositions(
+            (position for _, position in sortedNames[start:stop]),
+            self._size)
+
+    def unicodeMask(self, first, last):
+        """
+        Returns the mask of glyphs with a unicode in [*first*, *last*].
+        """
+        self._sync()
+        start = bisect_left(self._codes, (first,))
+        stop = bisect_right(self._codes, (last, self._size))
+        return maskFromPositions(
+            (position for _, position in self._codes[start:stop]),
+            self._size)
+
+    def flagMask(self, flag):
+        self._sync(load=True)
+        return self._flags[flag]
+
+    def filter(self, prefix=None, unicodeRange=None, flag=None):
+        """
+        Returns the sorted positions of the glyphs whose name starts with
+        *prefix*, that have a unicode within *unicodeRange*, a (first, last)
+        tuple, and have *flag* set. Criteria that are None are ignored.
+        """
+        mask = self.allMask()
+        if prefix:
+            mask &= self.prefixMask(prefix)
+        if unicodeRange is not None:
+            mask &= self.unicodeMask(*unicodeRange)
+        if flag is not None:
+            mask &= self.flagMask(flag)
+        return positionsFromMask(mask)
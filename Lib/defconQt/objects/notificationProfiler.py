@@ -0,0 +1,234 @@
+from defcon.tools.notifications import Notification, NotificationCenter
+from PyQt5.QtCore import QCoreApplication, QThread, QTimer
+import json
+import time
+import weakref
+
+
+def describe(observable):
+    """
+    Returns a short string that identifies *observable* in reports.
+    """
+    name = getattr(observable, "name", None)
+    if name is None:
+        return type(observable).__name__
+    return "%s %r" % (type(observable).__name__, name)
+
+
+class NotificationProfiler(object):
+    """
+    Collects statistics on the notifications posted through a
+    ProfilingNotificationCenter while enabled: how many times each
+    notification was posted, the time spent in each observer callback and
+    storms, i.e. a notification posted over *stormThreshold* times for the
+    same object within a single run of the event loop.
+
+    Only notifications posted from the main thread are recorded.
+    """
+    stormThreshold = 20
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        # name -> [count, time]
+        self._notifications = dict()
+        # (observer, methodName, notification) -> [calls, time, max]
+        self._callbacks = dict()
+        # (notification, observable) -> [ticks, max count]
+        self._storms = dict()
+        # (notification, observable) -> count, for the current tick
+        self._tick = dict()
+        self._tickPending = False
+
+    def isRecording(self):
+        if not self.enabled:
+            return False
+        app = QCoreApplication.instance()
+        return app is None or QThread.currentThread() == app.thread()
+
+    # ---------
+    # Recording
+    # ---------
+
+    def recordNotification(self, notification, observable, elapsed):
+        stats = self._notifications.get(notification)
+        if stats is None:
+            stats = self._notifications[notification] = [0, 0.]
+        stats[0] += 1
+        stats[1] += elapsed
+        key = (notification, describe(observable))
+        self._tick[key] = self._tick.get(key, 0) + 1
+        if not self._tickPending:
+            self._tickPending = True
+            QTimer.singleShot(0, self.endTick)
+
+    def recordCallback(self, observer, methodName, notification, elapsed):
+        key = (type(observer).__name__, methodName, notification)
+        stats = self._callbacks.get(key)
+        if stats is None:
+            stats = self._callbacks[key] = [0, 0., 0.]
+        stats[0] += 1
+        stats[1] += elapsed
+        if elapsed > stats[2]:
+            stats[2] = elapsed
+
+    def endTick(self):
+        """
+        Closes the current event loop run. Called by a zero-timer after the
+        first notification of a run.
+        """
+        for key, count in self._tick.items():
+            if count < self.stormThreshold:
+                continue
+            stats = self._storms.get(key)
+            if stats is None:
+                stats = self._storms[key] = [0, 0]
+            stats[0] += 1
+            if count > stats[1]:
+                stats[1] = count
+        self._tick = dict()
+        self._tickPending = False
+
+    # -------
+    # Reports
+    # -------
+
+    def notifications(self):
+        """
+        Returns a list of per-notification dicts, most posted first.
+        """
+        records = [
+            dict(notification=name, count=count, time=elapsed)
+            for name, (count, elapsed) in self._notifications.items()]
+        records.sort(key=lambda record: record["count"], reverse=True)
+        return records
+
+    def callbacks(self):
+        """
+        Returns a list of per-observer callback dicts, most expensive first.
+        """
+        records = [
+            dict(observer=observer, method=methodName,
+                 notification=notification, calls=calls, time=elapsed,
+                 maxTime=maxTime)
+            for (observer, methodName, notification),
+            (calls, elapsed, maxTime) in self._callbacks.items()]
+        records.sort(key=lambda record: record["time"], reverse=True)
+        return records
+
+    def storms(self):
+        """
+        Returns a list of storm dicts, the largest first. Notifications of
+        the current event loop run are included.
+        """
+        self.endTick()
+        records = [
+            dict(notification=notification, observable=observable,
+                 ticks=ticks, maxCount=maxCount)
+            for (notification, observable), (ticks, maxCount)
+            in self._storms.items()]
+        records.sort(key=lambda record: record["maxCount"], reverse=True)
+        return records
+
+    def report(self):
+        return dict(
+            notifications=self.notifications(),
+            callbacks=self.callbacks(),
+            storms=self.storms(),
+            stormThreshold=self.stormThreshold,
+        )
+
+    def dump(self, path):
+        """
+        Writes the report to *path* as JSON.
+        """
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+profiler = NotificationProfiler()
+
+
+class ProfilingNotificationCenter(NotificationCenter):
+    """
+    A NotificationCenter that reports to the profiler when it is enabled.
+
+    Observers are registered as with NotificationCenter. While the profiler
+    records, notifications are delivered by a copy of the base dispatch
+    loop that times each callback; otherwise the base one is used as is.
+    """
+
+    def postNotification(self, notification, observable, data=None):
+        if not profiler.enabled or not profiler.isRecording():
+            super(ProfilingNotificationCenter, self).postNotification(
+                notification, observable, data)
+            return
+        start = time.perf_counter()
+        self._postTimedNotification(notification, observable, data)
+        profiler.recordNotification(
+            notification, observable, time.perf_counter() - start)
+
+    def _suspension(self, keys, notification, observableRef, data):
+        """
+        Returns whether the notification is disabled or held for one of
+        *keys*, queuing it in the latter case.
+        """
+        for key in keys:
+            if key in self._disabled:
+                return True
+        for key in keys:
+            if key in self._holds:
+                n = (notification, observableRef, data)
+                notifications = self._holds[key]["notifications"]
+                if n not in notifications:
+                    notifications.append(n)
+                return True
+        return False
+
+    def _postTimedNotification(self, notification, observable, data):
+        # mirrors NotificationCenter.postNotification, keep them in sync
+        assert notification is not None
+        assert observable is not None
+        observableRef = weakref.ref(observable)
+        if self._holds or self._disabled:
+            keys = (
+                (None, None, None),
+                (notification, None, None),
+                (None, observableRef, None),
+                (notification, observableRef, None),
+            )
+            if self._suspension(keys, notification, observableRef, data):
+                return
+        notificationObj = Notification(notification, observableRef, data)
+        registryKeys = (
+            (None, None),
+            (None, observableRef),
+            (notification, None),
+            (notification, observableRef),
+        )
+        for registryKey in registryKeys:
+            if registryKey not in self._registry:
+                continue
+            for observerRef, methodName in list(
+                    self._registry[registryKey].items()):
+                if self._holds or self._disabled:
+                    keys = (
+                        (None, None, observerRef),
+                        (notification, None, observerRef),
+                        (None, observableRef, observerRef),
+                        (notification, observableRef, observerRef),
+                    )
+                    if self._suspension(
+                            keys, notification, observableRef, data):
+                        continue
+                observer = observerRef()
+                if observer is None:
+                    continue
+                callback = getattr(observer, methodName)
+                start = time.perf_counter()
+                callback(notificationObj)
+                profiler.recordCallback(
+                    observer, methodName, notification,
+                    time.perf_counter() - start)
@@ -0,0 +1,208 @@
+from math import floor
+
+
+class SpatialIndex(object):
+    """
+    A uniform grid over items with (xMin, yMin, xMax, yMax) bounds.
+
+    query() returns the items whose bounds intersect a rectangle by looking
+    only at the grid cells the rectangle covers. Items are compared by
+    equality, so they should be hashable and unique.
+    """
+
+    def __init__(self, cellSize=64):
+        self._cellSize = cellSize
+        # cell -> set of items
+        self._cells = dict()
+        # item -> (bounds, cells)
+        self._items = dict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def _cellRange(self, bounds):
+        xMin, yMin, xMax, yMax = bounds
+        size = self._cellSize
+        return (int(floor(xMin / size)), int(floor(yMin / size)),
+                int(floor(xMax / size)), int(floor(yMax / size)))
+
+    def insert(self, item, bounds):
+        if item in self._items:
+            self.remove(item)
+        cXMin, cYMin, cXMax, cYMax = self._cellRange(bounds)
+        cells = []
+        for cX in range(cXMin, cXMax + 1):
+            for cY in range(cYMin, cYMax + 1):
+                cell = (cX, cY)
+                self._cells.setdefault(cell, set()).add(item)
+                cells.append(cell)
+        self._items[item] = (bounds, cells)
+
+    def remove(self, item):
+        _, cells = self._items.pop(item)
+        for cell in cells:
+            items = self._cells[cell]
+            items.discard(item)
+            if not items:
+                del self._cells[cell]
+
+    def clear(self):
+        self._cells = dict()
+        self._items = dict()
+
+    def query(self, bounds):
+        """
+        Returns the set of items whose bounds intersect *bounds*.
+        """
+        xMin, yMin, xMax, yMax = bounds
+        cXMin, cYMin, cXMax, cYMax = self._cellRange(bounds)
+        candidates = set()
+        cells = self._cells
+        if (cXMax - cXMin + 1) * (cYMax - cYMin + 1) > len(cells):
+            # cheaper to walk the occupied cells
+            for (cX, cY), items in cells.items():
+                if cXMin <= cX <= cXMax and cYMin <= cY <= cYMax:
+                    candidates.update(items)
+        else:
+            for cX in range(cXMin, cXMax + 1):
+                for cY in range(cYMin, cYMax + 1):
+                    items = cells.get((cX, cY))
+                    if items:
+                        candidates.update(items)
+        ret = set()
+        for item in candidates:
+            iXMin, iYMin, iXMax, iYMax = self._items[item][0]
+            if iXMin <= xMax and xMin <= iXMax and \
+                    iYMin <= yMax and yMin <= iYMax:
+                ret.add(item)
+        return ret
+
+
+class GlyphSpatialIndex(object):
+    """
+    Indexes the points, anchors and components of *glyph* for hit-testing.
+
+    The index follows glyph notifications: a changed contour only has its
+    own points reindexed, and that lazily, on the next query().
+    Call close() once done with it.
+    """
+
+    def __init__(self, glyph, cellSize=64):
+        self._glyph = glyph
+        self._points = SpatialIndex(cellSize)
+        self._others = SpatialIndex(cellSize)
+        # id(contour) -> (contour, items)
+        self._contours = dict()
+        self._dirtyContours = set()
+        self._contoursDirty = True
+        self._othersDirty = True
+        glyph.addObserver(self, "_contoursChanged", "Glyph.ContoursChanged")
+        for notification in ("Glyph.AnchorsChanged",
+                             "Glyph.ComponentsChanged"):
+            glyph.addObserver(self, "_othersChanged", notification)
+
+    def close(self):
+        glyph = self._glyph
+        glyph.removeObserver(self, "Glyph.ContoursChanged")
+        for notification in ("Glyph.AnchorsChanged",
+                             "Glyph.ComponentsChanged"):
+            glyph.removeObserver(self, notification)
+        for contour, _ in self._contours.values():
+            self._unobserveContour(contour)
+        self._contours = dict()
+        self._points.clear()
+        self._others.clear()
+
+    # -------------
+    # Notifications
+    # -------------
+
+    def _contoursChanged(self, notification):
+        self._contoursDirty = True
+
+    def _contourChanged(self, notification):
+        self._dirtyContours.add(id(notification.object))
+
+    def _othersChanged(self, notification):
+        self._othersDirty = True
+
+    def _observeContour(self, contour):
+        self._glyph.dispatcher.addObserver(
+            observer=self, methodName="_contourChanged",
+            notification="Contour.Changed", observable=contour)
+
+    def _unobserveContour(self, contour):
+        # the contour may have left the glyph, and its dispatcher with it
+        self._glyph.dispatcher.removeObserver(
+            observer=self, notification="Contour.Changed", observable=contour)
+
+    # --------
+    # Indexing
+    # --------
+
+    def _indexContour(self, contour):
+        items = []
+        for pointIndex, point in enumerate(contour):
+            item = (pointIndex, point, contour)
+            self._points.insert(item, (point.x, point.y, point.x, point.y))
+            items.append(item)
+        self._contours[id(contour)] = (contour, items)
+
+    def _unindexContour(self, key):
+        _, items = self._contours.pop(key)
+        for item in items:
+            self._points.remove(item)
+
+    def _sync(self):
+        if self._contoursDirty:
+            current = dict((id(contour), contour) for contour in self._glyph)
+            for key in list(self._contours):
+                if key not in current:
+                    self._unobserveContour(self._contours[key][0])
+                    self._unindexContour(key)
+            for key, contour in current.items():
+                if key not in self._contours:
+                    self._observeContour(contour)
+                    self._indexContour(contour)
+            self._contoursDirty = False
+        for key in self._dirtyContours:
+            if key in self._contours:
+                contour = self._contours[key][0]
+                self._unindexContour(key)
+                self._indexContour(contour)
+        self._dirtyContours.clear()
+        if self._othersDirty:
+            self._others.clear()
+            glyph = self._glyph
+            for index, anchor in enumerate(glyph.anchors):
+                self._others.insert(
+                    ((0, -index), anchor),
+                    (anchor.x, anchor.y, anchor.x, anchor.y))
+            for index, component in enumerate(glyph.components):
+                bounds = component.bounds
+                if bounds is not None:
+                    self._others.insert(((1, -index), component), bounds)
+            self._othersDirty = False
+
+    def query(self, bounds):
+        """
+        Returns the anchors, (point, contour) pairs and components whose
+        position or bounds intersect *bounds* as three lists, in hit-testing
+        order: last to first for anchors and components, and for points,
+        from the last contour to the first.
+        """
+        self._sync()
+        others = sorted(self._others.query(bounds), key=lambda item: item[0])
+        anchors = [item[1] for item in others if not item[0][0]]
+        components = [item[1] for item in others if item[0][0]]
+        points = self._points.query(bounds)
+        if points:
+            contourIndexes = dict(
+                (id(contour), index) for index, contour in
+                enumerate(self._glyph))
+            points = sorted(points, key=lambda item: (
+                -contourIndexes[id(item[2])], item[0]))
+        return anchors, [item[1:] for item in points], components
@@ -0,0 +1,790 @@
+from PyQt5.QtCore import pyqtSignal, QObject
+from collections import OrderedDict, deque
+import heapq
+import itertools
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import time
+import weakref
+
+# memory budget of the undo history of all objects, in bytes
+_globalMaxCost = 64 * 1024 * 1024
+# cost of all managers, kept up to date by _updateCost()
+_globalCost = 0
+# (oldest order, serial, manager ref) heap of the managers that hold history
+# in memory. Orders move as history is freed, entries are checked when they
+# come up.
+_holders = []
+_holderSerial = itertools.count()
+# orders history entries across managers
+_entryCounter = itertools.count()
+
+# ------
+# Deltas
+# ------
+
+# A delta turns a piece of serialized data into another one. It is None when
+# both are equal, else a tuple:
+# - ("v", value): replace with value
+# - ("d", changed, removed): dict, changed maps keys to deltas (or "v" deltas
+#   for new keys), removed lists the keys to delete
+# - ("l", changed): list or tuple of the same length, changed lists (index,
+#   delta) pairs
+# - ("s", start, stop, items): list or tuple, replace [start:stop] with items
+
+
+def diffData(old, new):
+    """
+    Returns the delta that turns *old* into *new*.
+    """
+    if type(old) is not type(new):
+        return ("v", new)
+    if isinstance(old, dict):
+        changed = dict()
+        for key, value in new.items():
+            if key in old:
+                delta = diffData(old[key], value)
+                if delta is not None:
+                    changed[key] = delta
+            else:
+                changed[key] = ("v", value)
+        removed = [key for key in old if key not in new]
+        if not (changed or removed):
+            return None
+        return ("d", changed, removed)
+    if isinstance(old, (list, tuple)):
+        if len(old) == len(new):
+            changed = []
+            for index, (oldItem, newItem) in enumerate(zip(old, new)):
+                delta = diffData(oldItem, newItem)
+                if delta is not None:
+                    changed.append((index, delta))
+            if not changed:
+                return None
+            # a whole new sequence is cheaper than patching all of its items
+            if len(changed) == len(old) and \
+                    all(delta[0] == "v" for _, delta in changed):
+                return ("v", new)
+            return ("l", changed)
+        # splice what lies between the common head and tail
+        start = 0
+        count = min(len(old), len(new))
+        while start < count and old[start] == new[start]:
+            start += 1
+        end = 0
+        while end < count - start and old[-end - 1] == new[-end - 1]:
+            end += 1
+        return ("s", start, len(old) - end, new[start:len(new) - end])
+    if old == new:
+        return None
+    return ("v", new)
+
+
+def applyDelta(data, delta):
+    """
+    Returns *data* with *delta* applied. *data* isn't modified, the parts of
+    it that the delta doesn't touch are shared with the result.
+    """
+    if delta is None:
+        return data
+    kind = delta[0]
+    if kind == "v":
+        return delta[1]
+    if kind == "d":
+        _, changed, removed = delta
+        result = dict(data)
+        for key, itemDelta in changed.items():
+            result[key] = applyDelta(data.get(key), itemDelta)
+        for key in removed:
+            del result[key]
+        return result
+    if kind == "l":
+        result = list(data)
+        for index, itemDelta in delta[1]:
+            result[index] = applyDelta(data[index], itemDelta)
+    else:
+        _, start, stop, items = delta
+        result = list(data[:start]) + list(items) + list(data[stop:])
+    if isinstance(data, tuple):
+        return tuple(result)
+    return result
+
+
+def _dumps(data):
+    return pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+# -------
+# Journal
+# -------
+
+
+class UndoJournal(object):
+    """
+    An append-only binary log of undo deltas, read back through a memory
+    map.
+
+    Records are a (key length, step, data length) header followed by the
+    UTF-8 key (e.g. a glyph name) and the pickled delta. With no *path*, the
+    log goes to a temporary file that is removed on close().
+    """
+    _header = struct.Struct("<IQI")
+
+    def __init__(self, path=None):
+        self._temporary = path is None
+        if self._temporary:
+            fd, path = tempfile.mkstemp(prefix="trufont-undo-", suffix=".log")
+            self._file = os.fdopen(fd, "w+b")
+        else:
+            self._file = open(path, "a+b")
+        self._path = path
+        self._file.seek(0, os.SEEK_END)
+        self._size = self._file.tell()
+        self._map = None
+
+    def path(self):
+        return self._path
+
+    def append(self, key, step, data):
+        """
+        Writes a record and returns its offset.
+        """
+        keyData = key.encode("utf-8")
+        offset = self._size
+        self._file.write(
+            self._header.pack(len(keyData), step, len(data)) + keyData + data)
+        self._size += self._header.size + len(keyData) + len(data)
+        return offset
+
+    def _record(self, offset):
+        if self._map is None or len(self._map) < self._size:
+            self._file.flush()
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        keyLength, step, dataLength = self._header.unpack_from(
+            self._map, offset)
+        start = offset + self._header.size
+        key = self._map[start:start + keyLength].decode("utf-8")
+        start += keyLength
+        return key, step, start, dataLength
+
+    def read(self, offset):
+        """
+        Returns the data of the record at *offset*.
+        """
+        _, _, start, length = self._record(offset)
+        return self._map[start:start + length]
+
+    def records(self):
+        """
+        Yields the (offset, key, step) of all records, in writing order.
+        """
+        offset = 0
+        while offset < self._size:
+            key, step, start, length = self._record(offset)
+            yield offset, key, step
+            offset = start + length
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+        if self._temporary:
+            os.remove(self._path)
+
+# -------
+# History
+# -------
+
+
+class _History(object):
+    """
+    A stack of states where only the top state is stored whole, the others
+    as deltas to the state above them. Everything is kept pickled, so that
+    the history doesn't share data with the live object.
+
+    Entries are [title, delta, cost, order] lists, from bottom to top. The
+    deltas of the oldest entries may be spilled to an UndoJournal, then
+    delta is the offset of their record and cost 0.
+    """
+
+    def __init__(self):
+        self._entries = deque()
+        self._top = None
+        self._cost = 0
+        # count of bottom entries in the journal
+        self._spilled = 0
+        self._journal = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def memoryCount(self):
+        """
+        Returns the number of entries held in memory.
+        """
+        return len(self._entries) - self._spilled
+
+    def spillOldest(self, journal, key):
+        """
+        Moves the delta of the oldest entry held in memory to *journal*. The
+        top entry can't be spilled.
+        """
+        entry = self._entries[self._spilled]
+        entry[1] = journal.append(key, entry[3], entry[1])
+        self._cost -= entry[2]
+        entry[2] = 0
+        self._spilled += 1
+        self._journal = journal
+
+    def _delta(self, entry):
+        delta = entry[1]
+        if isinstance(delta, int):
+            delta = self._journal.read(delta)
+        return pickle.loads(delta)
+
+    def cost(self):
+        if self._top is None:
+            return self._cost
+        return self._cost + len(self._top)
+
+    def topCost(self):
+        if self._top is None:
+            return 0
+        return len(self._top)
+
+    def spilledCount(self):
+        return self._spilled
+
+    def title(self, index):
+        return self._entries[index][0]
+
+    def oldestOrder(self):
+        """
+        Returns the order of the oldest entry held in memory.
+        """
+        return self._entries[self._spilled][3]
+
+    def newestOrder(self):
+        return self._entries[-1][3]
+
+    def push(self, title, data):
+        if self._entries:
+            entry = self._entries[-1]
+            entry[1] = _dumps(diffData(data, pickle.loads(self._top)))
+            entry[2] = len(entry[1])
+            self._cost += entry[2]
+        self._entries.append([title, None, 0, next(_entryCounter)])
+        self._top = _dumps(data)
+
+    def pop(self):
+        """
+        Removes the top state and returns its (title, data).
+        """
+        title = self._entries.pop()[0]
+        data = pickle.loads(self._top)
+        if self._entries:
+            entry = self._entries[-1]
+            self._top = _dumps(applyDelta(data, self._delta(entry)))
+            self._cost -= entry[2]
+            entry[1] = None
+            entry[2] = 0
+            self._spilled = min(self._spilled, len(self._entries) - 1)
+        else:
+            self.clear()
+        return title, data
+
+    def dropOldest(self):
+        if len(self._entries) > 1:
+            self._cost -= self._entries.popleft()[2]
+            self._spilled = max(self._spilled - 1, 0)
+        else:
+            self.clear()
+
+    def clear(self):
+        self._entries.clear()
+        self._top = None
+        self._cost = 0
+        # records left in the journal are just dead weight
+        self._spilled = 0
+
+
+class UndoManager(QObject):
+    """
+    Keeps the undo and redo history of an object that implements
+    getDataForSerialization() and setDataFromSerialization().
+
+    States are stored as deltas to the next one, and the oldest history is
+    dropped once the manager weighs more than *maxCost* bytes or all
+    managers more than the global budget (see setGlobalMaxCost()). If the
+    parent has an *undoJournal* attribute that isn't None, the history is
+    spilled there instead of being dropped, and read back as needed.
+
+    Repeated small edits can be merged into a single step, see
+    prepareTarget().
+    """
+    canUndoChanged = pyqtSignal(bool)
+    canRedoChanged = pyqtSignal(bool)
+
+    # memory budget of a single manager, in bytes
+    maxCost = 8 * 1024 * 1024
+    # delay within which edits of the same kind are merged, in seconds
+    coalesceInterval = 1.
+    # when the parent has an undoJournal, number of steps kept in memory,
+    # older ones are spilled to the journal
+    memorySteps = 64
+
+    def __init__(self, parent):
+        super().__init__()
+        self._undoStack = _History()
+        self._redoStack = _History()
+        self._parent = parent
+        # key and time of the last edit that may be merged with the next
+        self._coalesceKey = None
+        self._coalesceTime = None
+        _trackCost(self)
+
+    def cost(self):
+        return self._undoStack.cost() + self._redoStack.cost()
+
+    def prepareTarget(self, title=None, coalesce=None):
+        """
+        Records the current state as an undo step titled *title*.
+
+        If *coalesce* is not None and equals the *coalesce* key of the
+        previous call, made less than coalesceInterval seconds ago, the edit
+        is merged in the previous step and nothing is recorded. Callers can
+        put in the key the kind of edit (“nudge”, “width”…) and whatever
+        must stay the same for the edits to merge, like the selection.
+        """
+        now = time.monotonic()
+        if coalesce is not None and coalesce == self._coalesceKey and \
+                now - self._coalesceTime < self.coalesceInterval and \
+                self.canUndo():
+            self._coalesceTime = now
+            return
+        self._coalesceKey = coalesce
+        self._coalesceTime = now
+        data = self._parent.getDataForSerialization()
+        undoWasLocked = not self.canUndo()
+        redoWasEnabled = self.canRedo()
+        # prune eventual redo and push state
+        self._redoStack.clear()
+        self._undoStack.push(title, data)
+        self._enforceBudget()
+        if undoWasLocked:
+            self.canUndoChanged.emit(True)
+        if redoWasEnabled:
+            self.canRedoChanged.emit(False)
+
+    def canUndo(self):
+        return bool(len(self._undoStack))
+
+    def getUndoTitle(self, index):
+        return self._undoStack.title(index)
+
+    def undo(self, index=-1):
+        """
+        Restores the state at *index* of the undo stack, by default the last
+        one.
+        """
+        count = len(self._undoStack)
+        if index < 0:
+            index += count
+        self._coalesceKey = None
+        redoWasLocked = not self.canRedo()
+        # the redo stack gets the states that follow the restored one, each
+        # titled with the action that leads to it
+        data = self._parent.getDataForSerialization()
+        for _ in range(count - index):
+            title, previousData = self._undoStack.pop()
+            self._redoStack.push(title, data)
+            data = previousData
+        self._parent.setDataFromSerialization(data)
+        _updateCost(self)
+        if redoWasLocked:
+            self.canRedoChanged.emit(True)
+        if not self.canUndo():
+            self.canUndoChanged.emit(False)
+
+    def canRedo(self):
+        return bool(len(self._redoStack))
+
+    def getRedoTitle(self, index):
+        # the next redo comes first
+        return self._redoStack.title(-1 - index)
+
+    def redo(self, index=0):
+        """
+        Restores the state at *index* of the redo stack, by default the next
+        one.
+        """
+        self._coalesceKey = None
+        undoWasLocked = not self.canUndo()
+        data = self._parent.getDataForSerialization()
+        for _ in range(index + 1):
+            title, nextData = self._redoStack.pop()
+            self._undoStack.push(title, data)
+            data = nextData
+        self._parent.setDataFromSerialization(data)
+        self._enforceBudget()
+        if undoWasLocked:
+            self.canUndoChanged.emit(True)
+        if not self.canRedo():
+            self.canRedoChanged.emit(False)
+
+    def clear(self):
+        canUndo, canRedo = self.canUndo(), self.canRedo()
+        self._undoStack.clear()
+        self._redoStack.clear()
+        self._coalesceKey = None
+        _updateCost(self)
+        if canUndo:
+            self.canUndoChanged.emit(False)
+        if canRedo:
+            self.canRedoChanged.emit(False)
+
+    def undoOrder(self):
+        """
+        Returns a number that is greater for the managers whose next undo
+        was recorded later, or None if there is no undo.
+        """
+        if not self.canUndo():
+            return None
+        return self._undoStack.newestOrder()
+
+    def redoOrder(self):
+        """
+        Returns a number that is greater for the managers whose next redo
+        was undone later, or None if there is no redo.
+        """
+        if not self.canRedo():
+            return None
+        return self._redoStack.newestOrder()
+
+    def _oldestOrder(self):
+        # order of what _evict() frees first
+        if self._undoStack.memoryCount() > 1 or not self.canRedo():
+            return self._undoStack.oldestOrder()
+        return self._redoStack.oldestOrder()
+
+    def _evictableCost(self):
+        # the top state can only go with the whole undo stack, and that
+        # must not lose the history spilled to the journal
+        if self._undoStack.spilledCount():
+            return self.cost() - self._undoStack.topCost()
+        return self.cost()
+
+    def _journal(self):
+        return getattr(self._parent, "undoJournal", None)
+
+    def _journalKey(self):
+        return getattr(self._parent, "name", None) or ""
+
+    def _dropOldest(self):
+        """
+        Frees the oldest step held in memory, by spilling it to the journal
+        if there is one and dropping it otherwise. The top step can't be.
+        """
+        undoStack = self._undoStack
+        journal = self._journal()
+        if journal is not None:
+            undoStack.spillOldest(journal, self._journalKey())
+        else:
+            undoStack.dropOldest()
+
+    def _evict(self):
+        """
+        Frees some of the history held in memory for the global budget:
+        the oldest step if the undo stack has more than one in memory, else
+        the redo stack, else the undo stack unless it has spilled history.
+        """
+        if self._undoStack.memoryCount() > 1:
+            self._dropOldest()
+        elif self.canRedo():
+            self._redoStack.clear()
+            self.canRedoChanged.emit(False)
+        elif not self._undoStack.spilledCount():
+            self._undoStack.clear()
+            self.canUndoChanged.emit(False)
+
+    def _enforceBudget(self):
+        undoStack = self._undoStack
+        journal = self._journal()
+        if journal is not None:
+            key = self._journalKey()
+            while undoStack.memoryCount() > max(self.memorySteps, 1):
+                undoStack.spillOldest(journal, key)
+        # keep at least the last step around
+        while undoStack.memoryCount() > 1 and self.cost() > self.maxCost:
+            self._dropOldest()
+        _updateCost(self)
+        _enforceGlobalBudget()
+
+
+class FontUndoManager(QObject):
+    """
+    Keeps the undo and redo history of changes that span several glyphs
+    of a font.
+
+    Changes are recorded in transactions, each of which makes a single
+    undo step::
+
+        with font.undoTransaction("Paste"):
+            for glyph in glyphs:
+                glyph.prepareUndo()
+                ...
+
+    The state of an object is only captured the first time it is prepared
+    within a transaction, so that objects not touched cost nothing.
+    """
+    canUndoChanged = pyqtSignal(bool)
+    canRedoChanged = pyqtSignal(bool)
+
+    # memory budget of the font history, in bytes
+    maxCost = 32 * 1024 * 1024
+
+    def __init__(self, parent):
+        super().__init__()
+        # entries are [title, states, cost, order] lists where states maps
+        # id(obj) to (obj, pickled data)
+        self._undoStack = deque()
+        self._redoStack = deque()
+        self._parent = parent
+        self._transaction = None
+        self._transactionDepth = 0
+        self._cost = 0
+        _trackCost(self)
+
+    def cost(self):
+        return self._cost
+
+    # ------------
+    # Transactions
+    # ------------
+
+    def beginTransaction(self, title=None):
+        """
+        Opens a transaction, or joins the one already open.
+        """
+        if self._transactionDepth == 0:
+            self._transaction = [title, OrderedDict(), 0, None]
+        self._transactionDepth += 1
+
+    def endTransaction(self):
+        """
+        Closes the transaction opened by beginTransaction(), making it an
+        undo step if any object was prepared.
+        """
+        self._transactionDepth -= 1
+        if self._transactionDepth:
+            return
+        transaction = self._transaction
+        self._transaction = None
+        if not transaction[1]:
+            return
+        undoWasLocked = not self.canUndo()
+        redoWasEnabled = self.canRedo()
+        transaction[3] = next(_entryCounter)
+        self._undoStack.append(transaction)
+        self._cost += transaction[2]
+        self._clearRedo()
+        self._enforceBudget()
+        if undoWasLocked:
+            self.canUndoChanged.emit(True)
+        if redoWasEnabled:
+            self.canRedoChanged.emit(False)
+
+    def inTransaction(self):
+        return self._transaction is not None
+
+    def _clearRedo(self):
+        self._cost -= sum(entry[2] for entry in self._redoStack)
+        self._redoStack.clear()
+
+    def prepareTarget(self, obj):
+        """
+        Records the state of *obj* in the open transaction, unless it was
+        already.
+        """
+        states = self._transaction[1]
+        if id(obj) in states:
+            return
+        data = _dumps(obj.getDataForSerialization())
+        states[id(obj)] = (obj, data)
+        self._transaction[2] += len(data)
+
+    # ---------
+    # Undo/redo
+    # ---------
+
+    def canUndo(self):
+        return bool(len(self._undoStack))
+
+    def getUndoTitle(self, index):
+        return self._undoStack[index][0]
+
+    def _swapStates(self, entry):
+        # restore the recorded states and return an entry with the current
+        # ones
+        states = OrderedDict()
+        cost = 0
+        for key, (obj, data) in entry[1].items():
+            currentData = _dumps(obj.getDataForSerialization())
+            states[key] = (obj, currentData)
+            cost += len(currentData)
+            obj.setDataFromSerialization(pickle.loads(data))
+        self._cost += cost - entry[2]
+        return [entry[0], states, cost, next(_entryCounter)]
+
+    def undo(self, index=-1):
+        """
+        Undoes the transactions down to *index* of the undo stack, by
+        default the last one.
+        """
+        if index < 0:
+            index += len(self._undoStack)
+        redoWasLocked = not self.canRedo()
+        while len(self._undoStack) > index:
+            self._redoStack.append(self._swapStates(self._undoStack.pop()))
+        _updateCost(self)
+        if redoWasLocked:
+            self.canRedoChanged.emit(True)
+        if not self.canUndo():
+            self.canUndoChanged.emit(False)
+
+    def canRedo(self):
+        return bool(len(self._redoStack))
+
+    def getRedoTitle(self, index):
+        # the next redo comes first
+        return self._redoStack[-1 - index][0]
+
+    def redo(self, index=0):
+        """
+        Redoes the transactions up to *index* of the redo stack, by default
+        the next one.
+        """
+        undoWasLocked = not self.canUndo()
+        for _ in range(index + 1):
+            self._undoStack.append(self._swapStates(self._redoStack.pop()))
+        self._enforceBudget()
+        if undoWasLocked:
+            self.canUndoChanged.emit(True)
+        if not self.canRedo():
+            self.canRedoChanged.emit(False)
+
+    def clear(self):
+        canUndo, canRedo = self.canUndo(), self.canRedo()
+        self._undoStack.clear()
+        self._redoStack.clear()
+        self._cost = 0
+        _updateCost(self)
+        if canUndo:
+            self.canUndoChanged.emit(False)
+        if canRedo:
+            self.canRedoChanged.emit(False)
+
+    def undoOrder(self):
+        if not self.canUndo():
+            return None
+        return self._undoStack[-1][3]
+
+    def redoOrder(self):
+        if not self.canRedo():
+            return None
+        return self._redoStack[-1][3]
+
+    def _oldestOrder(self):
+        if self.canUndo():
+            return self._undoStack[0][3]
+        return self._redoStack[0][3]
+
+    def _evictableCost(self):
+        return self._cost
+
+    def _dropOldest(self):
+        self._cost -= self._undoStack.popleft()[2]
+        if not self.canUndo():
+            self.canUndoChanged.emit(False)
+
+    def _evict(self):
+        if self.canUndo():
+            self._dropOldest()
+        else:
+            self._clearRedo()
+            self.canRedoChanged.emit(False)
+
+    def _enforceBudget(self):
+        # keep at least the last step around
+        while len(self._undoStack) > 1 and self.cost() > self.maxCost:
+            self._dropOldest()
+        _updateCost(self)
+        _enforceGlobalBudget()
+
+
+def globalMaxCost():
+    return _globalMaxCost
+
+
+def setGlobalMaxCost(maxCost):
+    """
+    Sets the memory budget of the undo history of all objects, in bytes.
+    """
+    global _globalMaxCost
+    _globalMaxCost = maxCost
+    _enforceGlobalBudget()
+
+
+def _trackCost(manager):
+    # the cost reported to _globalCost, taken off when the manager goes
+    manager._reportedCost = [0]
+    manager._isHolder = False
+    weakref.finalize(manager, _releaseCost, manager._reportedCost)
+
+
+def _releaseCost(reportedCost):
+    global _globalCost
+    _globalCost -= reportedCost[0]
+
+
+def _updateCost(manager):
+    """
+    Reports the history of *manager* changed to the global budget.
+    """
+    global _globalCost
+    reportedCost = manager._reportedCost
+    cost = manager.cost()
+    _globalCost += cost - reportedCost[0]
+    reportedCost[0] = cost
+    if not manager._isHolder and manager._evictableCost():
+        manager._isHolder = True
+        heapq.heappush(_holders, (
+            manager._oldestOrder(), next(_holderSerial),
+            weakref.ref(manager)))
+
+
+def _enforceGlobalBudget():
+    while _globalCost > _globalMaxCost and _holders:
+        order, _, ref = _holders[0]
+        manager = ref()
+        if manager is None:
+            heapq.heappop(_holders)
+            continue
+        if not manager._evictableCost():
+            # nothing left in memory to free
+            heapq.heappop(_holders)
+            manager._isHolder = False
+            continue
+        oldestOrder = manager._oldestOrder()
+        if oldestOrder != order:
+            heapq.heapreplace(
+                _holders, (oldestOrder, next(_holderSerial), ref))
+            continue
+        manager._evict()
+        _updateCost(manager)
@@ -0,0 +1,119 @@
+from defconQt.objects.notificationProfiler import profiler
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import (
+    QCheckBox, QFileDialog, QHBoxLayout, QPushButton, QTabWidget,
+    QTreeWidget, QTreeWidgetItem, QVBoxLayout, QWidget)
+
+
+class ProfilerWindow(QWidget):
+    """
+    Shows the statistics of the notification profiler, refreshed every
+    *refreshInterval* ms while recording.
+    """
+    refreshInterval = 1000
+
+    def __init__(self, parent=None):
+        super(ProfilerWindow, self).__init__(parent, Qt.Window)
+        self.setWindowTitle("Notification Profiler")
+
+        self.recordBox = QCheckBox("Record", self)
+        self.recordBox.setChecked(profiler.enabled)
+        self.recordBox.toggled.connect(self._recordToggled)
+        resetButton = QPushButton("Reset", self)
+        resetButton.clicked.connect(self.reset)
+        dumpButton = QPushButton("Dump to JSON…", self)
+        dumpButton.clicked.connect(self.dump)
+
+        self.notificationsTree = self._makeTree(
+            ["Notification", "Count", "Time (ms)"])
+        self.callbacksTree = self._makeTree(
+            ["Observer", "Method", "Notification", "Calls", "Time (ms)",
+             "Max (ms)"])
+        self.stormsTree = self._makeTree(
+            ["Notification", "Object", "Ticks", "Max per tick"])
+        tabWidget = QTabWidget(self)
+        tabWidget.addTab(self.notificationsTree, "Notifications")
+        tabWidget.addTab(self.callbacksTree, "Observers")
+        tabWidget.addTab(self.stormsTree, "Storms")
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.refreshInterval)
+        self._timer.timeout.connect(self.refresh)
+
+        buttonsLayout = QHBoxLayout()
+        buttonsLayout.addWidget(self.recordBox)
+        buttonsLayout.addStretch()
+        buttonsLayout.addWidget(resetButton)
+        buttonsLayout.addWidget(dumpButton)
+        layout = QVBoxLayout(self)
+        layout.addLayout(buttonsLayout)
+        layout.addWidget(tabWidget)
+        self.setLayout(layout)
+        self.resize(640, 420)
+        self.refresh()
+
+    def _makeTree(self, labels):
+        tree = QTreeWidget(self)
+        tree.setHeaderLabels(labels)
+        tree.setRootIsDecorated(False)
+        tree.setSortingEnabled(True)
+        return tree
+
+    def _fillTree(self, tree, rows):
+        tree.setSortingEnabled(False)
+        tree.clear()
+        for row in rows:
+            item = QTreeWidgetItem()
+            for column, value in enumerate(row):
+                if isinstance(value, float):
+                    # seconds
+                    value = round(value * 1000, 2)
+                if isinstance(value, str):
+                    item.setText(column, value)
+                else:
+                    # so that sorting is numeric
+                    item.setData(column, Qt.DisplayRole, value)
+                if column:
+                    item.setTextAlignment(column, Qt.AlignRight)
+            tree.addTopLevelItem(item)
+        tree.setSortingEnabled(True)
+
+    def refresh(self):
+        self._fillTree(self.notificationsTree, (
+            (record["notification"], record["count"], record["time"])
+            for record in profiler.notifications()))
+        self._fillTree(self.callbacksTree, (
+            (record["observer"], record["method"], record["notification"],
+             record["calls"], record["time"], record["maxTime"])
+            for record in profiler.callbacks()))
+        self._fillTree(self.stormsTree, (
+            (record["notification"], record["observable"], record["ticks"],
+             record["maxCount"])
+            for record in profiler.storms()))
+
+    def reset(self):
+        profiler.reset()
+        self.refresh()
+
+    def dump(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Dump Profile", None, "JSON file (*.json)")
+        if path:
+            profiler.dump(path)
+
+    def _recordToggled(self, checked):
+        profiler.enabled = checked
+        self.refresh()
+        if checked and self.isVisible():
+            self._timer.start()
+        else:
+            self._timer.stop()
+
+    def showEvent(self, event):
+        if profiler.enabled:
+            self._timer.start()
+        super(ProfilerWindow, self).showEvent(event)
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        super(ProfilerWindow, self).hideEvent(event)
@@ -4,29 +4,47 @@ from defconQt.representationFactories.qPainterPathFactory import (
 from defconQt.representationFactories.glyphViewFactory import (
     NoComponentsQPainterPathFactory, OnlyComponentsQPainterPathFactory,
     SplitLinesQPainterPathFactory, ComponentQPainterPathFactory,
+    ContourQPainterPathsFactory, ContourSegmentsFactory,
     FilterSelectionFactory, FilterSelectionQPainterPathFactory,
-    OutlineInformationFactory, QPixmapFactory, StartPointsInformationFactory)
+    OutlineInformationFactory, QPixmapFactory,
+    SelectedPointsInformationFactory,
+    StartPointsInformationFactory)
 
 # TODO: add a glyph pixmap factory parametrized on glyph size
-# TODO: fine-tune the destructive notifications
+# Each representation is destroyed by the notifications of the glyph parts
+# it draws from, so that metadata edits (name, width, mark color, lib...)
+# keep them.
+_contourNotifications = ("Glyph.ContoursChanged",)
+_componentNotifications = (
+    "Glyph.ComponentsChanged", "Glyph.ComponentBaseGlyphDataChanged")
+_outlineNotifications = _contourNotifications + _componentNotifications
 _glyphFactories = {
-    "defconQt.QPainterPath": (QPainterPathFactory, None),
+    "defconQt.QPainterPath": (QPainterPathFactory, _outlineNotifications),
     "defconQt.OnlyComponentsQPainterPath": (
-        OnlyComponentsQPainterPathFactory, None),
+        OnlyComponentsQPainterPathFactory, _componentNotifications),
     "defconQt.NoComponentsQPainterPath": (
-        NoComponentsQPainterPathFactory, None),
+        NoComponentsQPainterPathFactory, _contourNotifications),
     "defconQt.SplitLinesQPainterPath": (
-        SplitLinesQPainterPathFactory, None),
+        SplitLinesQPainterPathFactory, _contourNotifications),
+    "defconQt.ContourQPainterPaths": (
+        ContourQPainterPathsFactory, _contourNotifications),
+    # geometry representations only go away with outline changes, the
+    # selection ones are cheap to rebuild from the contours selection sets
+    "defconQt.ContourSegments": (
+        ContourSegmentsFactory, _contourNotifications),
     "defconQt.FilterSelection": (
-        FilterSelectionFactory, ("Glyph.Changed", "Glyph.SelectionChanged")),
+        FilterSelectionFactory, _outlineNotifications + (
+            "Glyph.AnchorsChanged", "Glyph.SelectionChanged")),
     "defconQt.FilterSelectionQPainterPath": (
-        FilterSelectionQPainterPathFactory,
-        ("Glyph.Changed", "Glyph.SelectionChanged")),
+        FilterSelectionQPainterPathFactory, _outlineNotifications + (
+            "Glyph.AnchorsChanged", "Glyph.SelectionChanged")),
     "defconQt.OutlineInformation": (
-        OutlineInformationFactory,
-        ("Glyph.Changed", "Glyph.SelectionChanged")),
+        OutlineInformationFactory, _outlineNotifications),
+    "defconQt.SelectedPointsInformation": (
+        SelectedPointsInformationFactory,
+        _contourNotifications + ("Glyph.SelectionChanged",)),
     "defconQt.StartPointsInformation": (
-        StartPointsInformationFactory, None),
+        StartPointsInformationFactory, _contourNotifications),
 }
 _componentFactories = {
     "defconQt.QPainterPath": (
@@ -66,6 +66,19 @@ class OnlyComponentsQtPen(BasePen):
 # ---------------
 
 
+def ContourSegmentsFactory(glyph):
+    """
+    The segments and on-curve point count of each contour. Doesn't depend on
+    the selection.
+    """
+    data = []
+    for contour in glyph:
+        segments = contour.segments
+        onCurveCount = sum(1 for point in contour if point.segmentType)
+        data.append((segments, onCurveCount))
+    return data
+
+
 def FilterSelectionFactory(glyph):
     # TODO: somehow make this all a pen?
     # I'm wary of doing it because it warrants reordering and so on
@@ -81,17 +94,17 @@ def FilterSelectionFactory(glyph):
                 identifier=anchor.identifier,
             )
             copyGlyph.appendAnchor(anchorDict)
-    for contour in glyph:
-        onCurvesSelected = True
-        for point in contour:
-            if point.segmentType and not point.selected:
-                onCurvesSelected = False
-                break
-        if onCurvesSelected:
+    contourSegments = glyph.getRepresentation("defconQt.ContourSegments")
+    for contour, (segments, onCurveCount) in zip(glyph, contourSegments):
+        selection = contour.pointSelection()
+        if not selection:
+            continue
+        onCurvesSelected = sum(
+            1 for point in selection if point.segmentType)
+        if onCurvesSelected == onCurveCount:
             contour.drawPoints(pen)
         else:
             lastSubcontour = None
-            segments = contour.segments
             # put start point at the beginning of a subcontour
             for index, segment in reversed(list(enumerate(segments))):
                 if segment[-1].selected:
@@ -201,6 +214,29 @@ class SplitLinesFromPathQtPen(QtPen):
                                self._initPos[0], self._initPos[1]))
         self._initPos = None
 
+# -----------------
+# per-contour paths
+# -----------------
+
+
+def ContourQPainterPathsFactory(glyph):
+    """
+    A (bounds, path, curvePath, lines) tuple for each contour, where *path*
+    is its part of NoComponentsQPainterPath and *curvePath* and *lines* its
+    part of SplitLinesQPainterPath. Used to only draw the visible contours.
+    """
+    data = []
+    for contour in glyph:
+        bounds = contour.bounds
+        if bounds is None:
+            continue
+        pen = QtPen(glyph.layer)
+        contour.draw(pen)
+        splitPen = SplitLinesFromPathQtPen(glyph.layer)
+        contour.draw(splitPen)
+        data.append((bounds, pen.path, splitPen.path, splitPen.lines))
+    return data
+
 # ------------
 # start points
 # ------------
@@ -337,9 +373,10 @@ class OutlineInformationPen(AbstractPointPen):
         pass
 
     def addPoint(self, pt, segmentType=None, smooth=False, name=None,
-                 selected=False, **kwargs):
-        d = dict(point=pt, segmentType=segmentType, smooth=smooth, name=name,
-                 selected=selected)
+                 **kwargs):
+        # the selected state is left to SelectedPointsInformation, so that
+        # this survives selection changes
+        d = dict(point=pt, segmentType=segmentType, smooth=smooth, name=name)
         self._rawPointData[-1].append(d)
 
     def addComponent(self, baseGlyphName, transformation):
@@ -351,6 +388,23 @@ def OutlineInformationFactory(glyph):
     glyph.drawPoints(pen)
     return pen.getData()
 
+
+def SelectedPointsInformationFactory(glyph):
+    """
+    The selected points in the format of OutlineInformation, taken from the
+    contours selection sets.
+    """
+    data = dict(onCurvePoints=[], offCurvePoints=[])
+    for contour in glyph:
+        for point in contour.pointSelection():
+            d = dict(point=(point.x, point.y), segmentType=point.segmentType,
+                     smooth=point.smooth, name=point.name)
+            if point.segmentType is None:
+                data["offCurvePoints"].append(d)
+            else:
+                data["onCurvePoints"].append(d)
+    return data
+
 # -----
 # image
 # -----
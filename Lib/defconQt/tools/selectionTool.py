@@ -102,35 +102,39 @@ class SelectionTool(BaseTool):
             # TODO: prune
             glyph.prepareUndo()
             preserveShape = not event.modifiers() & Qt.ShiftModifier
-            for anchor in glyph.anchors:
-                if anchor.selected:
-                    glyph.removeAnchor(anchor)
-            for contour in reversed(glyph):
-                removeUISelection(contour, preserveShape)
-            for component in glyph.components:
-                if component.selected:
-                    glyph.removeComponent(component)
+            with glyph.batchNotifications():
+                for anchor in glyph.anchors:
+                    if anchor.selected:
+                        glyph.removeAnchor(anchor)
+                for contour in reversed(glyph):
+                    removeUISelection(contour, preserveShape)
+                for component in glyph.components:
+                    if component.selected:
+                        glyph.removeComponent(component)
         elif key in arrowKeys:
             # TODO: prune
-            self._glyph.prepareUndo()
+            # successive nudges of the same selection undo at once
+            self._glyph.prepareUndo(
+                "Nudge", coalesce=("nudge", frozenset(self._glyph.selection)))
             delta = self._moveForEvent(event)
             # TODO: seems weird that glyph.selection and selected don't incl.
             # anchors and components while glyph.move does... see what glyphs
             # does
             hadSelection = False
-            for anchor in self._glyph.anchors:
-                if anchor.selected:
-                    anchor.move(delta)
-                    hadSelection = True
-            for contour in self._glyph:
-                moveUISelection(contour, delta)
-                # XXX: shouldn't have to recalc this
-                if contour.selection:
-                    hadSelection = True
-            for component in self._glyph.components:
-                if component.selected:
-                    component.move(delta)
-                    hadSelection = True
+            with self._glyph.batchNotifications():
+                for anchor in self._glyph.anchors:
+                    if anchor.selected:
+                        anchor.move(delta)
+                        hadSelection = True
+                for contour in self._glyph:
+                    moveUISelection(contour, delta)
+                    # XXX: shouldn't have to recalc this
+                    if contour.selection:
+                        hadSelection = True
+                for component in self._glyph.components:
+                    if component.selected:
+                        component.move(delta)
+                        hadSelection = True
             if not hadSelection:
                 event.ignore()
         elif key in navKeys:
@@ -186,14 +190,15 @@ class SelectionTool(BaseTool):
                 self._shouldPrepareUndo = False
             dx = canvasPos.x() - self._origin.x()
             dy = canvasPos.y() - self._origin.y()
-            for anchor in self._glyph.anchors:
-                if anchor.selected:
-                    anchor.move((dx, dy))
-            for contour in self._glyph:
-                moveUISelection(contour, (dx, dy))
-            for component in self._glyph.components:
-                if component.selected:
-                    component.move((dx, dy))
+            with self._glyph.batchNotifications():
+                for anchor in self._glyph.anchors:
+                    if anchor.selected:
+                        anchor.move((dx, dy))
+                for contour in self._glyph:
+                    moveUISelection(contour, (dx, dy))
+                for component in self._glyph.components:
+                    if component.selected:
+                        component.move((dx, dy))
             self._origin = canvasPos
         else:
             self._rubberBandRect = QRectF(self._origin, canvasPos).normalized()
@@ -204,10 +209,8 @@ class SelectionTool(BaseTool):
             # TODO: fine-tune this more, maybe add optional args to items...
             if event.modifiers() & Qt.AltModifier:
                 points = set(pt for pt in points if pt.segmentType)
-            if points != self._glyph.selection:
-                # TODO: doing this takes more time than by-contour
-                # discrimination for large point count
-                self._glyph.selection = points
+            # the setter only touches what changed
+            self._glyph.selection = points
         widget.update()
 
     def mouseReleaseEvent(self, event):
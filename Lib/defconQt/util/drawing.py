@@ -1,7 +1,12 @@
 from defcon import Color
-from PyQt5.QtCore import QRectF, Qt
+from PyQt5.QtCore import QLineF, QPointF, QRectF, Qt
 from PyQt5.QtGui import (
-    QBrush, QColor, QPainter, QPainterPath, QPen, QTransform)
+    QBrush, QColor, QPainter, QPainterPath, QPen, QPolygonF, QStaticText,
+    QTransform)
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 """
 Adapted from DefconAppKit.
@@ -102,9 +107,73 @@ def drawLine(painter, x1, y1, x2, y2, lineWidth=1.0):
     painter.restore()
 
 
+def drawLines(painter, lines, lineWidth=1.0):
+    """
+    Draws a sequence of ((x1, y1), (x2, y2)) *lines* like drawLine() would,
+    in two calls: horizontal and vertical lines, then the other ones.
+    """
+    straightLines = []
+    otherLines = []
+    for (x1, y1), (x2, y2) in lines:
+        line = QLineF(x1, y1, x2, y2)
+        if x1 == x2 or y1 == y2:
+            straightLines.append(line)
+        else:
+            otherLines.append(line)
+    painter.save()
+    pen = painter.pen()
+    if otherLines:
+        pen.setWidthF(lineWidth)
+        painter.setPen(pen)
+        painter.drawLines(otherLines)
+    if straightLines:
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        if lineWidth == 1.0:
+            # cosmetic pen
+            lineWidth = 0
+        pen.setWidthF(lineWidth)
+        painter.setPen(pen)
+        painter.drawLines(straightLines)
+    painter.restore()
+
+
+def _pointsPolygon(points):
+    # QPolygonF stores (x, y) doubles contiguously, so numpy can fill it in
+    # one go
+    if numpy is None:
+        return QPolygonF([QPointF(x, y) for x, y in points])
+    coordinates = numpy.array(points, dtype=numpy.float64)
+    polygon = QPolygonF(len(points))
+    data = polygon.data()
+    data.setsize(coordinates.nbytes)
+    numpy.frombuffer(data, numpy.float64)[:] = coordinates.ravel()
+    return polygon
+
+
+def _drawDots(painter, points, diameter, color):
+    # a round-capped point is a filled circle, drawPoints() does them all at
+    # once
+    if not points:
+        return
+    pen = QPen(color)
+    pen.setWidthF(diameter)
+    pen.setCapStyle(Qt.RoundCap)
+    painter.setPen(pen)
+    painter.drawPoints(_pointsPolygon(points))
+
+
+def _squares(points, width):
+    half = width / 2.0
+    return [QRectF(x - half, y - half, width, width) for x, y in points]
+
+
 def drawGlyphWithAliasedLines(painter, glyph):
     curvePath, lines = glyph.getRepresentation(
         "defconQt.SplitLinesQPainterPath")
+    _drawWithAliasedLines(painter, curvePath, lines)
+
+
+def _drawWithAliasedLines(painter, curvePath, lines):
     painter.drawPath(curvePath)
     painter.save()
     # antialiased drawing blend a little in color with the background
@@ -115,16 +184,43 @@ def drawGlyphWithAliasedLines(painter, glyph):
     pen.setColor(color)
     painter.setPen(pen)
     # TODO: maybe switch to QLineF for this repr
-    for x1, y1, x2, y2 in lines:
-        drawLine(painter, x1, y1, x2, y2, painter.pen().widthF())
+    drawLines(painter, (((x1, y1), (x2, y2)) for x1, y1, x2, y2 in lines),
+              pen.widthF())
     painter.restore()
 
 
+# (text, font key) -> (QStaticText, width, ascent, line spacing)
+_staticTexts = dict()
+_staticTextsLimit = 4096
+
+
+def _staticText(painter, text):
+    # QStaticText keeps its layout, so a label that didn't change isn't laid
+    # out again
+    font = painter.font()
+    key = (text, font.key())
+    entry = _staticTexts.get(key)
+    if entry is None:
+        if len(_staticTexts) >= _staticTextsLimit:
+            _staticTexts.clear()
+        staticText = QStaticText(text)
+        staticText.setTextFormat(Qt.PlainText)
+        fM = painter.fontMetrics()
+        entry = _staticTexts[key] = (
+            staticText, fM.width(text), fM.ascent(), fM.lineSpacing())
+    return entry
+
+
 def drawTextAtPoint(painter, text, x, y, scale, xAlign="left", yAlign="bottom",
                     flipped=True):
-    if xAlign != "left" or yAlign != "bottom":
+    # XXX: multiline text (the ruler's) isn't cached, it changes all the time
+    if "\n" in text:
+        staticText = None
         fM = painter.fontMetrics()
-        width, height = fM.width(text), fM.lineSpacing()
+        width, ascent, height = fM.width(text), fM.ascent(), fM.lineSpacing()
+    else:
+        staticText, width, ascent, height = _staticText(painter, text)
+    if xAlign != "left" or yAlign != "bottom":
         width *= scale
         height *= scale
         if xAlign == "center":
@@ -139,16 +235,66 @@ def drawTextAtPoint(painter, text, x, y, scale, xAlign="left", yAlign="bottom",
     painter.save()
     if flipped:
         s = -scale
-        fM = painter.fontMetrics()
-        height = fM.ascent() * scale
-        y -= height
+        y -= ascent * scale
     else:
         s = scale
     painter.translate(x, y)
     painter.scale(scale, s)
-    painter.drawText(0, 0, text)
+    if staticText is None:
+        painter.drawText(0, 0, text)
+    else:
+        # static text is positioned by its top
+        painter.drawStaticText(QPointF(0, -ascent), staticText)
     painter.restore()
 
+# -------
+# Culling
+# -------
+
+# The rect argument is an (x, y, width, height) tuple, bounds are
+# (xMin, yMin, xMax, yMax) tuples.
+
+
+def _intersects(bounds, rect, margin=0):
+    x, y, w, h = rect
+    xMin, yMin, xMax, yMax = bounds
+    return xMin <= x + w + margin and xMax >= x - margin and \
+        yMin <= y + h + margin and yMax >= y - margin
+
+
+def _contains(rect, bounds, margin=0):
+    x, y, w, h = rect
+    xMin, yMin, xMax, yMax = bounds
+    return xMin >= x + margin and xMax <= x + w - margin and \
+        yMin >= y + margin and yMax <= y + h - margin
+
+
+def _cullPoints(data, rect, margin):
+    # filter OutlineInformation-like *data* down to what is in rect
+    x, y, w, h = rect
+    xMin, yMin = x - margin, y - margin
+    xMax, yMax = x + w + margin, y + h + margin
+
+    def visible(point):
+        px, py = point
+        return xMin <= px <= xMax and yMin <= py <= yMax
+
+    culled = dict(data)
+    for key in ("onCurvePoints", "offCurvePoints"):
+        if key in data:
+            culled[key] = [
+                point for point in data[key] if visible(point["point"])]
+    if "startPoints" in data:
+        culled["startPoints"] = [
+            item for item in data["startPoints"] if visible(item[0])]
+    if "bezierHandles" in data:
+        culled["bezierHandles"] = [
+            ((x1, y1), (x2, y2)) for (x1, y1), (x2, y2)
+            in data["bezierHandles"] if _intersects(
+                (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)), rect,
+                margin)]
+    return culled
+
 # ----
 # Font
 # ----
@@ -181,10 +327,14 @@ def drawFontVerticalMetrics(painter, glyph, scale, rect, drawLines=True,
             positions[position] = []
         positions[position].append(name)
     # create lines
-    xMin = rect[0]
-    xMax = xMin + rect[2]
+    xMin, yMin, w, h = rect
+    xMax = xMin + w
+    # the titles hang below the lines
+    margin = 2 * painter.fontMetrics().lineSpacing() * scale
     lines = []
     for y, names in positions.items():
+        if not yMin - margin <= y <= yMin + h + margin:
+            continue
         names = ", ".join(names)
         if y != 0:
             names = "%s (%d)" % (names, y)
@@ -239,9 +389,10 @@ def drawFontPostscriptFamilyBlues(painter, glyph, scale, rect, color=None):
 
 
 def _drawBlues(painter, blues, rect, color):
-    x = rect[0]
-    w = rect[2]
+    x, y, w, h = rect
     for yMin, yMax in zip(blues[::2], blues[1::2]):
+        if not _intersects((x, yMin, x + w, yMax), rect):
+            continue
         painter.fillRect(x, yMin, w, yMax - yMin, color)
 
 # Image
@@ -250,9 +401,13 @@ def _drawBlues(painter, blues, rect, color):
 def drawGlyphImage(painter, glyph, scale, rect):
     if glyph.image.fileName is None:
         return
-    painter.save()
-    painter.setTransform(QTransform(*glyph.image.transformation), True)
+    transform = QTransform(*glyph.image.transformation)
     image = glyph.image.getRepresentation("defconQt.QPixmap")
+    bounds = transform.mapRect(QRectF(image.rect())).getCoords()
+    if not _intersects(bounds, rect):
+        return
+    painter.save()
+    painter.setTransform(transform, True)
     painter.drawPixmap(0, 0, image)
     painter.restore()
 
@@ -268,14 +423,17 @@ def drawGlyphMargins(painter, glyph, scale, rect, drawFill=True,
     x, y, w, h = rect
     painter.save()
     if drawFill:
-        left = QRectF(x, y, -x, h)
-        right = QRectF(glyph.width, y, w - glyph.width, h)
-        for rect in (left, right):
-            painter.fillRect(rect, fillColor)
+        # only the parts of the margins that are in rect
+        if x < 0:
+            painter.fillRect(QRectF(x, y, min(0, x + w) - x, h), fillColor)
+        if x + w > glyph.width:
+            left = max(glyph.width, x)
+            painter.fillRect(QRectF(left, y, x + w - left, h), fillColor)
     if drawStroke:
         painter.setPen(strokeColor)
-        drawLine(painter, 0, y, 0, y + h)
-        drawLine(painter, glyph.width, y, glyph.width, y + h)
+        for lineX in (0, glyph.width):
+            if x <= lineX <= x + w:
+                drawLine(painter, lineX, y, lineX, y + h)
     painter.restore()
 
 # Fill and Stroke
@@ -294,9 +452,37 @@ def drawGlyphFillAndStroke(
     if selectionColor is None:
         selectionColor = defaultColor("glyphSelection")
     # get the paths
-    contourPath = glyph.getRepresentation("defconQt.NoComponentsQPainterPath")
-    componentPath = glyph.getRepresentation(
-        "defconQt.OnlyComponentsQPainterPath")
+    # the selection is the widest stroke
+    margin = 5.0 * scale
+    bounds = glyph.bounds
+    splitLines = None
+    if bounds is None or _contains(rect, bounds, margin):
+        contourPath = glyph.getRepresentation(
+            "defconQt.NoComponentsQPainterPath")
+        componentPath = glyph.getRepresentation(
+            "defconQt.OnlyComponentsQPainterPath")
+    else:
+        # only take the contours and components that are in rect
+        contourPath = QPainterPath()
+        contourPath.setFillRule(Qt.WindingFill)
+        curvePath = QPainterPath()
+        curvePath.setFillRule(Qt.WindingFill)
+        lines = []
+        for contourBounds, path, contourCurvePath, contourLines in \
+                glyph.getRepresentation("defconQt.ContourQPainterPaths"):
+            if _intersects(contourBounds, rect, margin):
+                contourPath.addPath(path)
+                curvePath.addPath(contourCurvePath)
+                lines.extend(contourLines)
+        splitLines = (curvePath, lines)
+        componentPath = QPainterPath()
+        componentPath.setFillRule(Qt.WindingFill)
+        for component in glyph.components:
+            componentBounds = component.bounds
+            if componentBounds is not None and _intersects(
+                    componentBounds, rect, margin):
+                componentPath.addPath(
+                    component.getRepresentation("defconQt.QPainterPath"))
     selectionPath = glyph.getRepresentation(
         "defconQt.FilterSelectionQPainterPath")
     painter.save()
@@ -315,7 +501,8 @@ def drawGlyphFillAndStroke(
         componentFillColor = defaultColor("glyphComponentFill")
     painter.fillPath(componentPath, QBrush(componentFillColor))
     # selection
-    if drawSelection:
+    if drawSelection and _intersects(
+            selectionPath.controlPointRect().getCoords(), rect, margin):
         pen = QPen(selectionColor)
         pen.setWidthF(5.0 * scale)
         painter.setPen(pen)
@@ -331,7 +518,9 @@ def drawGlyphFillAndStroke(
         pen = QPen(contourStrokeColor)
         pen.setWidthF(contourStrokeWidth * scale)
         painter.setPen(pen)
-        if partialAliasing:
+        if partialAliasing and splitLines is not None:
+            _drawWithAliasedLines(painter, *splitLines)
+        elif partialAliasing:
             drawGlyphWithAliasedLines(painter, glyph)
         else:
             painter.drawPath(contourPath)
@@ -358,6 +547,18 @@ def drawGlyphPoints(
         backgroundColor = defaultColor("background")
     # get the outline data
     outlineData = glyph.getRepresentation("defconQt.OutlineInformation")
+    # the selection is drawn over the outline points
+    selectionData = glyph.getRepresentation(
+        "defconQt.SelectedPointsInformation")
+    # only draw what is in rect, give or take a start point or a label
+    margin = 15 * scale
+    if drawCoordinates:
+        margin = max(
+            margin, painter.fontMetrics().width("-00000  -00000") * scale)
+    bounds = glyph.controlPointBounds
+    if bounds is not None and not _contains(rect, bounds, margin):
+        outlineData = _cullPoints(outlineData, rect, margin)
+        selectionData = _cullPoints(selectionData, rect, margin)
     points = []
     # start points
     if drawStartPoints and outlineData["startPoints"]:
@@ -378,69 +579,62 @@ def drawGlyphPoints(
         aF = startPointColor.alphaF()
         startPointColor.setAlphaF(aF * .3)
         painter.fillPath(path, startPointColor)
+    # points are drawn in batches, see drawLines(), _drawDots() and
+    # _squares()
     # off curve
     if drawOffCurves and outlineData["offCurvePoints"]:
         # lines
         painter.save()
         painter.setPen(otherColor)
-        for pt1, pt2 in outlineData["bezierHandles"]:
-            x1, y1 = pt1
-            x2, y2 = pt2
-            # TODO: should lineWidth account scale by default
-            drawLine(painter, x1, y1, x2, y2, 1.0 * scale)
+        # TODO: should lineWidth account scale by default
+        drawLines(painter, outlineData["bezierHandles"], 1.0 * scale)
         # points
         offWidth = 5 * scale
-        offHalf = offWidth / 2.0
-        path = QPainterPath()
-        selectedPath = QPainterPath()
-        for point in outlineData["offCurvePoints"]:
-            x, y = point["point"]
-            points.append((x, y))
-            pointPath = QPainterPath()
-            x -= offHalf
-            y -= offHalf
-            pointPath.addEllipse(x, y, offWidth, offWidth)
-            if point["selected"]:
-                selectedPath.addPath(pointPath)
-            else:
-                path.addPath(pointPath)
-        pen = QPen(otherColor)
-        pen.setWidthF(3.0 * scale)
-        painter.setPen(pen)
-        painter.drawPath(path)
-        painter.fillPath(path, QBrush(backgroundColor))
-        painter.drawPath(selectedPath)
-        painter.fillPath(selectedPath, QBrush(otherColor))
+        strokeWidth = 3 * scale
+        offPoints = [point["point"] for point in outlineData["offCurvePoints"]]
+        points.extend(offPoints)
+        _drawDots(painter, offPoints, offWidth + strokeWidth, otherColor)
+        _drawDots(painter, offPoints, offWidth, backgroundColor)
+        _drawDots(painter, [
+            point["point"] for point in selectionData["offCurvePoints"]],
+            offWidth + strokeWidth, otherColor)
         painter.restore()
     # on curve
     if drawOnCurves and outlineData["onCurvePoints"]:
         width = 7 * scale
-        half = width / 2.0
         smoothWidth = 8 * scale
         smoothHalf = smoothWidth / 2.0
+
+        def splitSmooth(data):
+            smooth, corners = [], []
+            for point in data:
+                if point["smooth"]:
+                    smooth.append(point["point"])
+                else:
+                    corners.append(point["point"])
+            return smooth, corners
+
+        smoothPoints, cornerPoints = splitSmooth(outlineData["onCurvePoints"])
+        points.extend(point["point"] for point in outlineData["onCurvePoints"])
+        selectedSmooth, selectedCorners = splitSmooth(
+            selectionData["onCurvePoints"])
         painter.save()
-        path = QPainterPath()
-        selectedPath = QPainterPath()
-        for point in outlineData["onCurvePoints"]:
-            x, y = point["point"]
-            points.append((x, y))
-            pointPath = QPainterPath()
-            if point["smooth"]:
-                x -= smoothHalf
-                y -= smoothHalf
-                pointPath.addEllipse(x, y, smoothWidth, smoothWidth)
-            else:
-                x -= half
-                y -= half
-                pointPath.addRect(x, y, width, width)
-            if point["selected"]:
-                selectedPath.addPath(pointPath)
-            path.addPath(pointPath)
+        if selectedCorners:
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(onCurveColor)
+            painter.drawRects(_squares(selectedCorners, width))
+        _drawDots(painter, selectedSmooth, smoothWidth, onCurveColor)
         pen = QPen(onCurveColor)
         pen.setWidthF(1.5 * scale)
         painter.setPen(pen)
-        painter.fillPath(selectedPath, onCurveColor)
-        painter.drawPath(path)
+        painter.setBrush(Qt.NoBrush)
+        if cornerPoints:
+            painter.drawRects(_squares(cornerPoints, width))
+        # Qt can't batch outlined ellipses, but drawing them one by one
+        # still beats stroking a path made of all of them
+        for x, y in smoothPoints:
+            painter.drawEllipse(QRectF(
+                x - smoothHalf, y - smoothHalf, smoothWidth, smoothWidth))
         painter.restore()
     # coordinates
     if drawCoordinates:
@@ -448,6 +642,9 @@ def drawGlyphPoints(
         otherColor.setAlphaF(otherColor.alphaF() * .6)
         painter.save()
         painter.setPen(otherColor)
+        # this is drawTextAtPoint(xAlign="center", yAlign="top") with the
+        # text transform applied once for all labels
+        painter.scale(scale, -scale)
         for x, y in points:
             posX = x
             # TODO: We use + here because we align on top. Consider abstracting
@@ -460,8 +657,9 @@ def drawGlyphPoints(
             if int(y) == y:
                 y = int(y)
             text = "%d  %d" % (x, y)
-            drawTextAtPoint(painter, text, posX, posY, scale,
-                            xAlign="center", yAlign="top")
+            staticText, width, _, height = _staticText(painter, text)
+            painter.drawStaticText(QPointF(
+                posX / scale - width / 2, -posY / scale - height), staticText)
         painter.restore()
 
 # Anchors
@@ -476,7 +674,16 @@ def drawGlyphAnchors(painter, glyph, scale, rect, drawAnchors=True,
     fallbackColor = color
     anchorSize = 6 * scale
     anchorHalfSize = anchorSize / 2
+    fM = painter.fontMetrics()
     for anchor in glyph.anchors:
+        # the name is centered above the anchor
+        margin = anchorSize
+        if drawText and anchor.name:
+            margin += max(fM.width(anchor.name) / 2,
+                          fM.lineSpacing()) * scale
+        if not _intersects(
+                (anchor.x, anchor.y, anchor.x, anchor.y), rect, margin):
+            continue
         if anchor.color is not None:
             color = colorToQColor(anchor.color)
         else:
@@ -0,0 +1,232 @@
+from bisect import bisect_left, bisect_right
+from collections.abc import MutableSet, Set
+
+
+class RangeSet(MutableSet):
+    """
+    A set of integers stored as sorted, disjoint [start, stop) ranges, so that
+    runs of consecutive integers only cost a pair of bounds.
+
+    Membership tests are O(log ranges) and set operations between two
+    RangeSets are O(ranges).
+    """
+    __slots__ = ["_starts", "_stops"]
+
+    def __init__(self, iterable=None):
+        self._starts = []
+        self._stops = []
+        if iterable is None:
+            return
+        if isinstance(iterable, RangeSet):
+            self._starts = list(iterable._starts)
+            self._stops = list(iterable._stops)
+            return
+        for value in iterable:
+            self.addRange(value, value + 1)
+
+    @classmethod
+    def fromRange(cls, start, stop):
+        rangeSet = cls()
+        rangeSet.addRange(start, stop)
+        return rangeSet
+
+    def copy(self):
+        return self.__class__(self)
+
+    def ranges(self):
+        """
+        Returns a list of the (start, stop) ranges of the set, in ascending
+        order.
+        """
+        return list(zip(self._starts, self._stops))
+
+    # ------------
+    # Range access
+    # ------------
+
+    def addRange(self, start, stop):
+        """
+        Adds the integers of [*start*, *stop*) to the set.
+        """
+        if start >= stop:
+            return
+        starts, stops = self._starts, self._stops
+        # touching ranges are merged as well
+        i = bisect_left(stops, start)
+        j = bisect_right(starts, stop)
+        if i < j:
+            start = min(start, starts[i])
+            stop = max(stop, stops[j - 1])
+        starts[i:j] = [start]
+        stops[i:j] = [stop]
+
+    def removeRange(self, start, stop):
+        """
+        Removes the integers of [*start*, *stop*) from the set.
+        """
+        if start >= stop:
+            return
+        starts, stops = self._starts, self._stops
+        i = bisect_right(stops, start)
+        j = bisect_left(starts, stop)
+        if i >= j:
+            return
+        newStarts = []
+        newStops = []
+        if starts[i] < start:
+            newStarts.append(starts[i])
+            newStops.append(start)
+        if stops[j - 1] > stop:
+            newStarts.append(stop)
+            newStops.append(stops[j - 1])
+        starts[i:j] = newStarts
+        stops[i:j] = newStops
+
+    def deleteRange(self, start, stop):
+        """
+        Removes the integers of [*start*, *stop*) from the set and shifts
+        those after them down, as when deleting items from a list.
+        """
+        if start >= stop:
+            return
+        self.removeRange(start, stop)
+        starts, stops = self._starts, self._stops
+        shift = stop - start
+        i = bisect_left(starts, stop)
+        starts[i:] = [value - shift for value in starts[i:]]
+        stops[i:] = [value - shift for value in stops[i:]]
+        # the ranges on either side of the deletion may now touch
+        if 0 < i < len(starts) and stops[i - 1] == starts[i]:
+            stops[i - 1] = stops[i]
+            del starts[i]
+            del stops[i]
+
+    def insertRange(self, start, stop):
+        """
+        Shifts the integers from *start* on up by *stop* - *start*, as when
+        inserting items in a list. [*start*, *stop*) is left out of the set.
+        """
+        if start >= stop:
+            return
+        starts, stops = self._starts, self._stops
+        shift = stop - start
+        i = bisect_right(stops, start)
+        if i < len(starts) and starts[i] < start:
+            # split the range the insertion falls in
+            starts.insert(i + 1, start)
+            stops.insert(i + 1, stops[i])
+            stops[i] = start
+            i += 1
+        starts[i:] = [value + shift for value in starts[i:]]
+        stops[i:] = [value + shift for value in stops[i:]]
+
+    # --------------
+    # Set operations
+    # --------------
+
+    def __contains__(self, value):
+        i = bisect_right(self._starts, value) - 1
+        return i >= 0 and value < self._stops[i]
+
+    def __iter__(self):
+        for start, stop in zip(self._starts, self._stops):
+            yield from range(start, stop)
+
+    def __reversed__(self):
+        for start, stop in zip(reversed(self._starts), reversed(self._stops)):
+            yield from range(stop - 1, start - 1, -1)
+
+    def __len__(self):
+        return sum(self._stops) - sum(self._starts)
+
+    def __bool__(self):
+        return bool(self._starts)
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.ranges())
+
+    def __eq__(self, other):
+        if isinstance(other, RangeSet):
+            return self._starts == other._starts and \
+                self._stops == other._stops
+        if isinstance(other, Set):
+            return len(self) == len(other) and all(
+                value in self for value in other)
+        return NotImplemented
+
+    def add(self, value):
+        self.addRange(value, value + 1)
+
+    def discard(self, value):
+        self.removeRange(value, value + 1)
+
+    def remove(self, value):
+        if value not in self:
+            raise KeyError(value)
+        self.removeRange(value, value + 1)
+
+    def clear(self):
+        self._starts = []
+        self._stops = []
+
+    def _combine(self, other, keep):
+        # sweep over the bounds of both sets, between two consecutive bounds
+        # membership is constant and *keep* tells whether the span goes in
+        # the result
+        if not isinstance(other, RangeSet):
+            other = RangeSet(other)
+        bounds = sorted(set(
+            self._starts + self._stops + other._starts + other._stops))
+        result = self.__class__()
+        for start, stop in zip(bounds, bounds[1:]):
+            if keep(start in self, start in other):
+                result.addRange(start, stop)
+        return result
+
+    def __or__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return self._combine(other, lambda a, b: a or b)
+
+    __ror__ = __or__
+
+    def __and__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return self._combine(other, lambda a, b: a and b)
+
+    __rand__ = __and__
+
+    def __xor__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return self._combine(other, lambda a, b: a != b)
+
+    __rxor__ = __xor__
+
+    def __sub__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return self._combine(other, lambda a, b: a and not b)
+
+    def __rsub__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return RangeSet(other) - self
+
+    def _update(self, result):
+        self._starts = result._starts
+        self._stops = result._stops
+        return self
+
+    def __ior__(self, other):
+        return self._update(self | RangeSet(other))
+
+    def __iand__(self, other):
+        return self._update(self & RangeSet(other))
+
+    def __ixor__(self, other):
+        return self._update(self ^ RangeSet(other))
+
+    def __isub__(self, other):
+        return self._update(self - RangeSet(other))
@@ -0,0 +1,114 @@
+from collections import OrderedDict
+from PyQt5.QtCore import QEvent, QObject, QTimer
+
+
+class RefreshScheduler(QObject):
+    """
+    Coalesces UI refreshes requested from notification observers.
+
+    schedule() marks a (*widget*, *key*) pair dirty along with the callback
+    that refreshes it; every dirty pair is refreshed once, with the latest
+    callback, when control returns to the event loop. Refreshes of widgets
+    that aren't visible then wait until the widget is shown.
+    """
+
+    def __init__(self, parent=None):
+        super(RefreshScheduler, self).__init__(parent)
+        self._pending = OrderedDict()
+        # widget -> OrderedDict(key -> callback)
+        self._hidden = dict()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self.flush)
+
+    def schedule(self, widget, key, callback):
+        """
+        Calls *callback* at the next idle tick, or when *widget* is next
+        shown. Scheduling *key* again for *widget* before that replaces its
+        callback.
+        """
+        self._pending.pop((widget, key), None)
+        self._pending[widget, key] = callback
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def cancel(self, widget, key=None):
+        """
+        Drops the refreshes pending for *widget*, or only the one for *key*.
+        """
+        for widgetKey in list(self._pending):
+            if widgetKey[0] is widget and key in (None, widgetKey[1]):
+                del self._pending[widgetKey]
+        hidden = self._hidden.get(widget)
+        if hidden is None:
+            return
+        if key is None:
+            hidden.clear()
+        else:
+            hidden.pop(key, None)
+        if not hidden:
+            self._forgetHidden(widget)
+
+    def isPending(self, widget, key):
+        return (widget, key) in self._pending or \
+            key in self._hidden.get(widget, ())
+
+    def flush(self):
+        """
+        Runs the refreshes of visible widgets now.
+        """
+        self._timer.stop()
+        pending = self._pending
+        self._pending = OrderedDict()
+        for (widget, key), callback in pending.items():
+            try:
+                visible = widget.isVisible()
+            except RuntimeError:
+                # the widget was deleted
+                continue
+            if visible:
+                callback()
+                continue
+            hidden = self._hidden.get(widget)
+            if hidden is None:
+                self._pruneHidden()
+                hidden = self._hidden[widget] = OrderedDict()
+                widget.installEventFilter(self)
+            hidden.pop(key, None)
+            hidden[key] = callback
+
+    def _pruneHidden(self):
+        for widget in list(self._hidden):
+            try:
+                widget.isVisible()
+            except RuntimeError:
+                del self._hidden[widget]
+
+    def _forgetHidden(self, widget):
+        del self._hidden[widget]
+        try:
+            widget.removeEventFilter(self)
+        except RuntimeError:
+            pass
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Show and obj in self._hidden:
+            hidden = self._hidden[obj]
+            self._forgetHidden(obj)
+            for callback in hidden.values():
+                callback()
+        return False
+
+
+_scheduler = None
+
+
+def refreshScheduler():
+    """
+    Returns the scheduler shared by the application windows.
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = RefreshScheduler()
+    return _scheduler
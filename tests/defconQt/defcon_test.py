@@ -0,0 +1,117 @@
+import unittest
+from defconQt.objects.defcon import TFont
+
+
+class NotificationCounter(object):
+
+    def __init__(self):
+        self.counts = dict()
+
+    def count(self, notification):
+        name = notification.name
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+
+class BatchNotificationsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.font = TFont()
+        self.counter = NotificationCounter()
+        for name in ("a", "b"):
+            glyph = self.font.newGlyph(name)
+            pen = glyph.getPen()
+            for index in range(3):
+                pen.moveTo((0, 0))
+                pen.lineTo((10, 10))
+                pen.lineTo((20, 0))
+                pen.closePath()
+            for notification in ("Glyph.Changed", "Glyph.SelectionChanged"):
+                glyph.addObserver(self.counter, "count", notification)
+        self.font.addObserver(self.counter, "count", "Font.Changed")
+
+    def test_glyph(self):
+        glyph = self.font["a"]
+        with glyph.batchNotifications():
+            glyph.move((10, 0))
+            glyph.selected = True
+            self.assertEqual(self.counter.counts, dict())
+        self.assertEqual(self.counter.counts["Glyph.Changed"], 1)
+        self.assertEqual(self.counter.counts["Glyph.SelectionChanged"], 1)
+
+    def test_font(self):
+        glyphs = list(self.font)
+        with self.font.batchNotifications(glyphs):
+            for glyph in glyphs:
+                glyph.move((10, 0))
+            self.assertEqual(self.counter.counts, dict())
+            # glyphs stay up-to-date within the batch
+            self.assertEqual(self.font["a"].bounds, (10, 0, 30, 10))
+        self.assertEqual(self.counter.counts["Glyph.Changed"], 2)
+        self.assertEqual(self.counter.counts["Font.Changed"], 1)
+
+    def test_fontUntouchedGlyphs(self):
+        # glyphs left out of the batch post as usual
+        with self.font.batchNotifications([self.font["a"]]):
+            self.font["a"].move((10, 0))
+            self.font["b"].width = 100
+            self.assertEqual(self.counter.counts["Glyph.Changed"], 1)
+        self.assertEqual(self.counter.counts["Glyph.Changed"], 2)
+        self.assertEqual(self.counter.counts["Font.Changed"], 1)
+
+
+class SelectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.font = TFont()
+        self.glyph = self.font.newGlyph("a")
+        pen = self.glyph.getPen()
+        for index in range(3):
+            pen.moveTo((0, 0))
+            pen.lineTo((10, 10))
+            pen.lineTo((20, 0))
+            pen.closePath()
+        self.counter = NotificationCounter()
+        self.glyph.addObserver(
+            self.counter, "count", "Glyph.SelectionChanged")
+        for contour in self.glyph:
+            contour.addObserver(
+                self.counter, "count", "Contour.SelectionChanged")
+
+    def test_selection(self):
+        first, second, third = self.glyph
+        points = {first[0], second[1]}
+        self.glyph.selection = points
+        self.assertEqual(self.glyph.selection, points)
+        self.assertEqual(second.selection, {second[1]})
+        # the third contour isn't touched
+        self.assertEqual(self.counter.counts, {
+            "Glyph.SelectionChanged": 1, "Contour.SelectionChanged": 2})
+        self.glyph.selection = points
+        self.assertEqual(self.counter.counts["Glyph.SelectionChanged"], 1)
+        # points selected directly are tracked as well
+        third[2].selected = True
+        self.assertEqual(self.glyph.selection, points | {third[2]})
+        first.selected = True
+        self.assertTrue(first.selected)
+        self.assertFalse(self.glyph.selected)
+
+    def test_pointChanges(self):
+        contour = self.glyph[0]
+        contour.selected = True
+        point = contour[0]
+        contour.removePoint(point)
+        self.assertNotIn(point, self.glyph.selection)
+        self.assertEqual(len(contour.selection), 2)
+        contour.appendPoint(point)
+        self.assertIn(point, contour.selection)
+        # reversing replaces the points, their selected state is kept
+        contour.reverse()
+        self.assertNotIn(point, contour.selection)
+        self.assertEqual(len(contour.selection), 3)
+        self.assertTrue(contour.selected)
+        contour.clear()
+        self.assertEqual(self.glyph.selection, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
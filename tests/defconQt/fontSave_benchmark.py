@@ -0,0 +1,74 @@
+"""
+Compares incremental saving of a UFO after a single glyph edit against
+writing the whole font.
+
+    python tests/defconQt/fontSave_benchmark.py [glyphCount] [rounds]
+"""
+from defconQt.objects.defcon import TFont
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+def makeFont(glyphCount):
+    font = TFont()
+    font.info.unitsPerEm = 1000
+    font.info.familyName = "Benchmark"
+    for index in range(glyphCount):
+        glyph = font.newGlyph("glyph%d" % index)
+        glyph.width = 500
+        glyph.unicode = 0xE000 + index
+        pen = glyph.getPen()
+        for offset in range(0, 400, 100):
+            pen.moveTo((offset, 0))
+            pen.curveTo((offset, 300), (offset + 80, 500), (offset + 80, 700))
+            pen.lineTo((offset + 40, 0))
+            pen.closePath()
+    font.groups["group"] = ["glyph0", "glyph1"]
+    font.kerning["glyph0", "glyph1"] = -20
+    font.features.text = "languagesystem DFLT dflt;"
+    return font
+
+
+def timeSave(font, path, rounds):
+    best = None
+    for index in range(rounds):
+        font["glyph0"].width += 1
+        start = time.perf_counter()
+        font.save(path)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main(glyphCount=5000, rounds=5):
+    tempDir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tempDir, "benchmark.ufo")
+        makeFont(glyphCount).save(path)
+        font = TFont(path)
+        incremental = timeSave(font, path, rounds)
+        # saving to another path writes everything, like the former save
+        # did for in-place saves
+        full = None
+        for index in range(rounds):
+            otherPath = os.path.join(tempDir, "full%d.ufo" % index)
+            font["glyph0"].width += 1
+            start = time.perf_counter()
+            font.save(otherPath)
+            elapsed = time.perf_counter() - start
+            if full is None or elapsed < full:
+                full = elapsed
+        print("%d glyphs, best of %d rounds" % (glyphCount, rounds))
+        print("full save:        %.4fs" % full)
+        print("incremental save: %.4fs (%.1fx)" % (
+            incremental, full / incremental))
+    finally:
+        shutil.rmtree(tempDir)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,44 @@
+import sys
+import unittest
+from defconQt.fontView import Application, MainWindow
+from defconQt.objects.defcon import TFont
+
+
+class GlyphOrderTest(unittest.TestCase):
+
+    app = Application(sys.argv)
+
+    def setUp(self):
+        self.font = TFont()
+        for name in "abcde":
+            self.font.newGlyph(name)
+        # a partial glyph order, the other glyphs are listed after it
+        self.font.glyphOrder = ["b", "a"]
+        self.mainWindow = MainWindow(self.font)
+        self.collectionWidget = self.mainWindow.collectionWidget
+
+    def assertDisplaysFont(self):
+        self.assertEqual(self.collectionWidget.glyphNames(),
+                         self.mainWindow._glyphNamesFromFont())
+
+    def test_partialOrder(self):
+        unordered = self.collectionWidget.glyphNames()[2:]
+        self.collectionWidget.selection = {0, 4}
+        glyphs = self.collectionWidget.glyphs
+        # names appended to the order move up from the unordered glyphs
+        self.font.glyphOrder = ["b", "a", unordered[0]]
+        self.assertDisplaysFont()
+        self.font.newGlyph("z")
+        self.assertDisplaysFont()
+        del self.font["a"]
+        self.assertDisplaysFont()
+        # patched in place, with the selection kept
+        self.assertIs(self.collectionWidget.glyphs, glyphs)
+        self.assertEqual(
+            set(glyph.name for glyph in
+                self.collectionWidget.getSelectedGlyphs()),
+            set(["b", unordered[2]]))
+
+
+if __name__ == "__main__":
+    unittest.main()
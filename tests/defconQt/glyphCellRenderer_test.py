@@ -0,0 +1,79 @@
+import sys
+import threading
+import unittest
+from PyQt5.QtCore import QRunnable, QSize
+from PyQt5.QtWidgets import QApplication
+from defconQt.glyphCollectionView import GlyphCellRenderer
+from defconQt.objects.defcon import TFont
+
+
+class _BlockingJob(QRunnable):
+
+    def __init__(self, event):
+        super(_BlockingJob, self).__init__()
+        self.event = event
+
+    def run(self):
+        self.event.wait()
+
+
+class GlyphCellRendererTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        self.font = TFont()
+        self.glyphs = []
+        for name in ("a", "b", "c"):
+            glyph = self.font.newGlyph(name)
+            glyph.template = True
+            self.glyphs.append(glyph)
+        self.renderer = GlyphCellRenderer()
+        self.rendered = []
+        self.renderer.cellRendered.connect(
+            lambda key, index, image: self.rendered.append(key[0].name))
+        # hold the only worker so that jobs stay queued
+        self.event = threading.Event()
+        self.renderer._threadPool.setMaxThreadCount(1)
+        self.renderer._threadPool.start(_BlockingJob(self.event))
+
+    def _request(self):
+        for index, glyph in enumerate(self.glyphs):
+            key = (glyph, 20, 20, 1.0)
+            self.renderer.request(key, index, QSize(20, 20), 1.0, (1000, 0))
+
+    def _finish(self):
+        self.event.set()
+        self.renderer._threadPool.waitForDone()
+        QApplication.processEvents()
+
+    def test_discardQueued(self):
+        self._request()
+        self.glyphs[1].width = 250
+        self.assertFalse(self.renderer.isPending((self.glyphs[1], 20, 20, 1.)))
+        self._finish()
+        self.assertEqual(sorted(self.rendered), ["a", "c"])
+
+    def test_discardRunning(self):
+        self._request()
+        # let the jobs run, but don't deliver them yet
+        self.event.set()
+        self.renderer._threadPool.waitForDone()
+        self.renderer.clear()
+        self.assertEqual(len(self.renderer._inFlight), 3)
+        QApplication.processEvents()
+        self.assertEqual(self.rendered, [])
+        self.assertEqual(len(self.renderer._inFlight), 0)
+
+    def test_clearQueued(self):
+        self._request()
+        self.renderer.clear()
+        # queued jobs are taken back from the pool
+        self.assertEqual(self.renderer._threadPool.activeThreadCount(), 1)
+        self.assertEqual(len(self.renderer._inFlight), 0)
+        self._finish()
+        self.assertEqual(self.rendered, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
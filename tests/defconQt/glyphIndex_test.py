@@ -0,0 +1,49 @@
+import unittest
+from defconQt.objects.defcon import TFont
+from defconQt.objects.glyphIndex import (
+    GlyphIndex, maskFromPositions, positionsFromMask)
+
+
+class GlyphIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.font = TFont()
+        for name, code in (("a", 0x61), ("b", 0x62), ("ab", None),
+                           ("A", 0x41), ("space", 0x20)):
+            glyph = self.font.newGlyph(name)
+            if code is not None:
+                glyph.unicode = code
+        self.glyphs = [self.font[name] for name in ("a", "b", "ab", "A",
+                                                    "space")]
+        for glyph in self.glyphs:
+            glyph.dirty = False
+
+    def test_masks(self):
+        positions = [0, 3, 9, 64]
+        self.assertEqual(
+            positionsFromMask(maskFromPositions(positions, 65)), positions)
+        self.assertEqual(positionsFromMask(0), [])
+
+    def test_filter(self):
+        index = GlyphIndex(self.glyphs)
+        self.assertEqual(index.filter(prefix="a"), [0, 2])
+        self.assertEqual(index.filter(unicodeRange=(0x41, 0x61)), [0, 3])
+        self.assertEqual(index.filter(flag="dirty"), [])
+        self.assertEqual(index.typeAhead("b"), 1)
+        self.assertEqual(index.typeAhead("c"), 4)
+        self.assertIsNone(index.typeAhead("z"))
+        index.close()
+
+    def test_glyphChanged(self):
+        index = GlyphIndex(self.glyphs)
+        glyph = self.glyphs[1]
+        glyph.name = "aa"
+        glyph.unicode = 0x42
+        self.assertEqual(index.filter(prefix="a"), [0, 1, 2])
+        self.assertEqual(index.filter(unicodeRange=(0x42, 0x42)), [1])
+        self.assertEqual(index.filter(flag="dirty"), [1])
+        index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import json
+import os
+import tempfile
+import unittest
+from defconQt.objects.defcon import TFont
+from defconQt.objects.notificationProfiler import profiler
+
+
+class Observer(object):
+
+    def __init__(self):
+        self.calls = 0
+
+    def widthChanged(self, notification):
+        self.calls += 1
+
+
+class NotificationProfilerTest(unittest.TestCase):
+
+    def setUp(self):
+        profiler.reset()
+        profiler.enabled = True
+
+    def tearDown(self):
+        profiler.enabled = False
+        profiler.reset()
+
+    def test_counts(self):
+        font = TFont()
+        glyph = font.newGlyph("a")
+        profiler.reset()
+        glyph.width = 100
+        glyph.width = 200
+        counts = dict(
+            (record["notification"], record["count"])
+            for record in profiler.notifications())
+        self.assertEqual(counts["Glyph.WidthChanged"], 2)
+        self.assertIn("Glyph.Changed", counts)
+        callbacks = profiler.callbacks()
+        self.assertTrue(callbacks)
+        self.assertTrue(all(record["calls"] for record in callbacks))
+
+    def test_observers(self):
+        font = TFont()
+        glyph = font.newGlyph("a")
+        observer = Observer()
+        glyph.addObserver(observer, "widthChanged", "Glyph.WidthChanged")
+        self.assertTrue(glyph.hasObserver(observer, "Glyph.WidthChanged"))
+        glyph.width = 100
+        self.assertEqual(observer.calls, 1)
+        self.assertIn(
+            ("Observer", "widthChanged", "Glyph.WidthChanged"),
+            [(record["observer"], record["method"], record["notification"])
+             for record in profiler.callbacks()])
+        glyph.disableNotifications(observer=observer)
+        glyph.width = 200
+        self.assertEqual(observer.calls, 1)
+        glyph.enableNotifications(observer=observer)
+        glyph.removeObserver(observer, "Glyph.WidthChanged")
+        self.assertFalse(glyph.hasObserver(observer, "Glyph.WidthChanged"))
+        glyph.width = 300
+        self.assertEqual(observer.calls, 1)
+
+    def test_held(self):
+        font = TFont()
+        glyph = font.newGlyph("a")
+        observer = Observer()
+        glyph.addObserver(observer, "widthChanged", "Glyph.WidthChanged")
+        self.assertEqual(
+            glyph.dispatcher.findObservations(observer=observer)[0][
+                "observer"], observer)
+        glyph.holdNotifications()
+        glyph.width = 100
+        self.assertEqual(observer.calls, 0)
+        glyph.releaseHeldNotifications()
+        self.assertEqual(observer.calls, 1)
+        glyph.removeObserver(observer, "Glyph.WidthChanged")
+
+    def test_disabled(self):
+        font = TFont()
+        glyph = font.newGlyph("a")
+        profiler.enabled = False
+        profiler.reset()
+        glyph.width = 100
+        self.assertEqual(profiler.notifications(), [])
+
+    def test_storms(self):
+        font = TFont()
+        glyph = font.newGlyph("a")
+        profiler.reset()
+        for width in range(1, profiler.stormThreshold + 1):
+            glyph.width = width
+        profiler.endTick()
+        glyph.width = 0
+        storms = profiler.storms()
+        names = set(record["notification"] for record in storms)
+        self.assertIn("Glyph.WidthChanged", names)
+        for record in storms:
+            self.assertEqual(record["ticks"], 1)
+            self.assertEqual(record["maxCount"], profiler.stormThreshold)
+
+    def test_dump(self):
+        font = TFont()
+        font.newGlyph("a").width = 100
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            profiler.dump(path)
+            with open(path) as f:
+                report = json.load(f)
+        finally:
+            os.remove(path)
+        self.assertIn("Glyph.WidthChanged", [
+            record["notification"] for record in report["notifications"]])
+        self.assertEqual(
+            sorted(report),
+            ["callbacks", "notifications", "stormThreshold", "storms"])
@@ -0,0 +1,66 @@
+import unittest
+from defconQt.objects.defcon import TFont
+from defconQt.objects.spatialIndex import GlyphSpatialIndex, SpatialIndex
+
+
+class SpatialIndexTest(unittest.TestCase):
+
+    def test_query(self):
+        index = SpatialIndex(cellSize=10)
+        index.insert("a", (0, 0, 5, 5))
+        index.insert("b", (100, 100, 100, 100))
+        index.insert("c", (-50, 0, 50, 0))
+        self.assertEqual(index.query((4, -1, 6, 1)), {"a", "c"})
+        self.assertEqual(index.query((90, 90, 110, 110)), {"b"})
+        self.assertEqual(index.query((-1000, -1000, 1000, 1000)),
+                         {"a", "b", "c"})
+        index.remove("c")
+        self.assertEqual(index.query((4, -1, 6, 1)), {"a"})
+        self.assertEqual(len(index), 2)
+
+
+class GlyphSpatialIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.font = TFont()
+        self.glyph = self.font.newGlyph("a")
+        pen = self.glyph.getPen()
+        for offset in (0, 10):
+            pen.moveTo((offset, 0))
+            pen.lineTo((offset + 100, 0))
+            pen.lineTo((offset + 100, 100))
+            pen.closePath()
+        self.glyph.appendAnchor(dict(name="top", x=0, y=0))
+        self.index = GlyphSpatialIndex(self.glyph)
+
+    def tearDown(self):
+        self.index.close()
+
+    def test_order(self):
+        first, second = self.glyph
+        anchors, points, components = self.index.query((-5, -5, 15, 5))
+        self.assertEqual(anchors, [self.glyph.anchors[0]])
+        self.assertEqual(points, [
+            (second[0], second), (first[0], first)])
+        self.assertEqual(components, [])
+
+    def test_contourChanged(self):
+        first, second = self.glyph
+        self.index.query((0, 0, 0, 0))
+        first[2].x = 500
+        first.dirty = True
+        _, points, _ = self.index.query((495, 95, 505, 105))
+        self.assertEqual(points, [(first[2], first)])
+        _, points, _ = self.index.query((99, 99, 101, 101))
+        self.assertEqual(points, [])
+
+    def test_contourRemoved(self):
+        first, second = self.glyph
+        self.index.query((0, 0, 0, 0))
+        self.glyph.removeContour(second)
+        _, points, _ = self.index.query((-5, -5, 15, 5))
+        self.assertEqual(points, [(first[0], first)])
+
+
+if __name__ == "__main__":
+    unittest.main()
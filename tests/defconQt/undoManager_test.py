@@ -0,0 +1,211 @@
+import threading
+import unittest
+from PyQt5.QtCore import QThread
+from defconQt.objects import undoManager
+from defconQt.objects.defcon import TFont
+from defconQt.objects.undoManager import (
+    UndoJournal, UndoManager, applyDelta, diffData)
+
+
+class Target(object):
+
+    def __init__(self):
+        self.data = dict(points=[(0, 0), (10, 0), (10, 10)], width=500)
+
+    def getDataForSerialization(self):
+        return dict(points=list(self.data["points"]),
+                    width=self.data["width"])
+
+    def setDataFromSerialization(self, data):
+        self.data = data
+
+
+class UndoManagerTest(unittest.TestCase):
+
+    def test_delta(self):
+        old = dict(a=[1, 2, 3, (4, 5)], b="x", c=None)
+        for new in (dict(a=[1, 2, 3, (4, 6)], b="x", c=None),
+                    dict(a=[1, 3, (4, 5)], b="y"),
+                    dict(a=[0, 1, 2, 3, (4, 5)], b="x", c=None, d=1)):
+            self.assertEqual(applyDelta(old, diffData(old, new)), new)
+        self.assertIsNone(diffData(old, dict(old)))
+
+    def test_undoRedo(self):
+        target = Target()
+        manager = UndoManager(target)
+        states = []
+        for index in range(5):
+            states.append(target.getDataForSerialization())
+            manager.prepareTarget("move %d" % index)
+            target.data["points"][1] = (10 + index, 0)
+        current = target.getDataForSerialization()
+        manager.undo()
+        self.assertEqual(target.data, states[-1])
+        self.assertEqual(manager.getRedoTitle(0), "move 4")
+        manager.undo(1)
+        self.assertEqual(target.data, states[1])
+        self.assertEqual(manager.getUndoTitle(-1), "move 0")
+        self.assertEqual(manager.getRedoTitle(0), "move 1")
+        manager.redo(2)
+        self.assertEqual(target.data, states[4])
+        manager.redo()
+        self.assertEqual(target.data, current)
+        self.assertFalse(manager.canRedo())
+        self.assertEqual(manager.getUndoTitle(-1), "move 4")
+
+    def test_coalesce(self):
+        target = Target()
+        manager = UndoManager(target)
+        initial = target.getDataForSerialization()
+        for index in range(10):
+            manager.prepareTarget("Nudge", coalesce="nudge")
+            target.data["points"][0] = (index, 0)
+        manager.prepareTarget("Width", coalesce="width")
+        target.data["width"] = 600
+        self.assertEqual(len(manager._undoStack), 2)
+        manager.undo(0)
+        self.assertEqual(target.data, initial)
+        # undo breaks the run of edits
+        manager.redo()
+        manager.prepareTarget("Nudge", coalesce="nudge")
+        self.assertEqual(len(manager._undoStack), 2)
+        manager.prepareTarget("Width", coalesce="width")
+        manager.coalesceInterval = 0
+        manager.prepareTarget("Width", coalesce="width")
+        self.assertEqual(len(manager._undoStack), 4)
+
+    def test_budget(self):
+        target = Target()
+        manager = UndoManager(target)
+        manager.maxCost = 600
+        for index in range(100):
+            manager.prepareTarget()
+            target.data["width"] = index
+        self.assertLessEqual(manager.cost(), 600)
+        self.assertTrue(manager.canUndo())
+        oldMaxCost = undoManager.globalMaxCost()
+        try:
+            undoManager.setGlobalMaxCost(0)
+            self.assertFalse(manager.canUndo())
+        finally:
+            undoManager.setGlobalMaxCost(oldMaxCost)
+
+    def test_globalCost(self):
+        cost = undoManager._globalCost
+        target = Target()
+        manager = UndoManager(target)
+        for index in range(3):
+            manager.prepareTarget()
+            target.data["width"] = index
+        self.assertEqual(undoManager._globalCost, cost + manager.cost())
+        manager.undo()
+        self.assertEqual(undoManager._globalCost, cost + manager.cost())
+        manager.clear()
+        self.assertEqual(undoManager._globalCost, cost)
+        manager.prepareTarget()
+        del manager
+        self.assertEqual(undoManager._globalCost, cost)
+
+
+class JournalTarget(Target):
+
+    def __init__(self, journal):
+        super(JournalTarget, self).__init__()
+        self.name = "a"
+        self.undoJournal = journal
+
+
+class UndoJournalTest(unittest.TestCase):
+
+    def test_spill(self):
+        journal = UndoJournal()
+        try:
+            target = JournalTarget(journal)
+            manager = UndoManager(target)
+            manager.memorySteps = 3
+            states = []
+            for index in range(10):
+                states.append(target.getDataForSerialization())
+                manager.prepareTarget()
+                target.data["points"][0] = (index, 0)
+            self.assertEqual(manager._undoStack.memoryCount(), 3)
+            self.assertEqual(
+                [key for _, key, _ in journal.records()], ["a"] * 7)
+            # undoing past the in-memory steps reads the journal back
+            manager.undo(1)
+            self.assertEqual(target.data, states[1])
+            manager.undo()
+            self.assertEqual(target.data, states[0])
+            manager.redo(9)
+            self.assertEqual(target.data["points"][0], (9, 0))
+        finally:
+            journal.close()
+
+    def test_globalBudget(self):
+        journal = UndoJournal()
+        oldMaxCost = undoManager.globalMaxCost()
+        try:
+            target = JournalTarget(journal)
+            manager = UndoManager(target)
+            manager.memorySteps = 1
+            states = []
+            for index in range(30):
+                states.append(target.getDataForSerialization())
+                manager.prepareTarget()
+                target.data["points"][0] = (index, 0)
+            manager.undo()
+            self.assertTrue(manager.canRedo())
+            # only memory is freed, the spilled history stays
+            undoManager.setGlobalMaxCost(0)
+            self.assertFalse(manager.canRedo())
+            self.assertEqual(len(manager._undoStack), 29)
+            manager.undo(0)
+            self.assertEqual(target.data, states[0])
+        finally:
+            undoManager.setGlobalMaxCost(oldMaxCost)
+            journal.close()
+
+
+class FontUndoManagerTest(unittest.TestCase):
+
+    def test_transaction(self):
+        font = TFont()
+        for name in ("a", "b", "c"):
+            font.newGlyph(name).width = 100
+        with font.undoTransaction("Edit"):
+            for name in ("a", "b"):
+                glyph = font[name]
+                glyph.prepareUndo()
+                glyph.width = 200
+                glyph.prepareUndo()
+                glyph.width = 300
+        # the transaction made one step on the font, none on the glyphs
+        self.assertEqual(font.undoManager.getUndoTitle(-1), "Edit")
+        self.assertFalse(font["a"].undoManager.canUndo())
+        font.undoManager.undo()
+        self.assertEqual([font[name].width for name in "abc"],
+                         [100, 100, 100])
+        self.assertFalse(font.undoManager.canUndo())
+        font.undoManager.redo()
+        self.assertEqual([font[name].width for name in "abc"],
+                         [300, 300, 100])
+
+    def test_glyphManagerThread(self):
+        # glyphs loaded on another thread make their manager on this one
+        fonts = []
+        thread = threading.Thread(
+            target=lambda: fonts.append(TFont()) or fonts[0].newGlyph("a"))
+        thread.start()
+        thread.join()
+        glyph = fonts[0]["a"]
+        self.assertIs(glyph.undoManager.thread(), QThread.currentThread())
+
+    def test_emptyTransaction(self):
+        font = TFont()
+        with font.undoTransaction():
+            pass
+        self.assertFalse(font.undoManager.canUndo())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import sys
+import unittest
+from PyQt5.QtCore import QPointF, Qt
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtWidgets import QApplication
+from defconQt.util import drawing
+
+
+class DrawingTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    def _render(self, func):
+        image = QImage(100, 100, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.white)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        func(painter)
+        painter.end()
+        return image
+
+    def test_drawLines(self):
+        lines = [((10, 10), (10, 90)), ((20, 10), (90, 10)),
+                 ((20, 20), (90, 80))]
+
+        def drawOneByOne(painter):
+            for (x1, y1), (x2, y2) in lines:
+                drawing.drawLine(painter, x1, y1, x2, y2, 2)
+
+        def drawAll(painter):
+            drawing.drawLines(painter, lines, 2)
+
+        self.assertEqual(self._render(drawOneByOne), self._render(drawAll))
+
+    def test_drawTextAtPoint(self):
+        text = "-120  48"
+
+        def drawText(painter):
+            painter.drawText(10, 50, text)
+
+        def drawStaticText(painter):
+            drawing.drawTextAtPoint(painter, text, 10, 50, 1, flipped=False)
+
+        expected = self._render(drawText)
+        self.assertEqual(self._render(drawStaticText), expected)
+        # from the cache
+        self.assertEqual(self._render(drawStaticText), expected)
+
+    def test_cullPoints(self):
+        data = dict(
+            onCurvePoints=[dict(point=(0, 0)), dict(point=(500, 0))],
+            offCurvePoints=[dict(point=(110, 50))],
+            startPoints=[((0, 0), None), ((500, 0), 90)],
+            bezierHandles=[((-50, 50), (300, 50)), ((500, 0), (600, 0))],
+        )
+        culled = drawing._cullPoints(data, (0, 0, 100, 100), 10)
+        self.assertEqual(culled["onCurvePoints"], [dict(point=(0, 0))])
+        self.assertEqual(culled["offCurvePoints"], [dict(point=(110, 50))])
+        self.assertEqual(culled["startPoints"], [((0, 0), None)])
+        # the handle crosses rect
+        self.assertEqual(culled["bezierHandles"], [((-50, 50), (300, 50))])
+
+    def test_pointsPolygon(self):
+        points = [(0, 0), (1.5, -2), (1e4, 3.25)]
+        polygon = drawing._pointsPolygon(points)
+        self.assertEqual(list(polygon), [QPointF(x, y) for x, y in points])
+        numpy = drawing.numpy
+        drawing.numpy = None
+        try:
+            self.assertEqual(drawing._pointsPolygon(points), polygon)
+        finally:
+            drawing.numpy = numpy
+
+
+if __name__ == "__main__":
+    unittest.main()
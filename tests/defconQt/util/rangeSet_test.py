@@ -0,0 +1,88 @@
+import unittest
+from defconQt.util.rangeSet import RangeSet
+
+
+class RangeSetTest(unittest.TestCase):
+
+    def test_addRange(self):
+        rangeSet = RangeSet()
+        rangeSet.addRange(5, 10)
+        rangeSet.addRange(0, 2)
+        self.assertEqual(rangeSet.ranges(), [(0, 2), (5, 10)])
+        # touching ranges merge
+        rangeSet.addRange(2, 3)
+        self.assertEqual(rangeSet.ranges(), [(0, 3), (5, 10)])
+        # overlapping several ranges
+        rangeSet.addRange(1, 7)
+        self.assertEqual(rangeSet.ranges(), [(0, 10)])
+        rangeSet.addRange(4, 4)
+        self.assertEqual(rangeSet.ranges(), [(0, 10)])
+
+    def test_removeRange(self):
+        rangeSet = RangeSet.fromRange(0, 10)
+        rangeSet.removeRange(3, 5)
+        self.assertEqual(rangeSet.ranges(), [(0, 3), (5, 10)])
+        rangeSet.removeRange(2, 6)
+        self.assertEqual(rangeSet.ranges(), [(0, 2), (6, 10)])
+        rangeSet.removeRange(-5, 20)
+        self.assertEqual(rangeSet.ranges(), [])
+
+    def test_deleteRange(self):
+        rangeSet = RangeSet([1, 2, 3, 6, 7, 10])
+        rangeSet.deleteRange(2, 5)
+        self.assertEqual(rangeSet.ranges(), [(1, 2), (3, 5), (7, 8)])
+        # ranges brought together merge
+        rangeSet.deleteRange(2, 3)
+        self.assertEqual(rangeSet.ranges(), [(1, 4), (6, 7)])
+        rangeSet.deleteRange(0, 20)
+        self.assertEqual(rangeSet.ranges(), [])
+
+    def test_insertRange(self):
+        rangeSet = RangeSet([1, 2, 3, 6])
+        rangeSet.insertRange(2, 4)
+        self.assertEqual(rangeSet.ranges(), [(1, 2), (4, 6), (8, 9)])
+        rangeSet.insertRange(2, 3)
+        self.assertEqual(rangeSet.ranges(), [(1, 2), (5, 7), (9, 10)])
+        rangeSet.insertRange(20, 25)
+        self.assertEqual(rangeSet.ranges(), [(1, 2), (5, 7), (9, 10)])
+
+    def test_elements(self):
+        rangeSet = RangeSet([4, 1, 2, 8])
+        self.assertEqual(rangeSet.ranges(), [(1, 3), (4, 5), (8, 9)])
+        self.assertEqual(list(rangeSet), [1, 2, 4, 8])
+        self.assertEqual(list(reversed(rangeSet)), [8, 4, 2, 1])
+        self.assertEqual(len(rangeSet), 4)
+        self.assertIn(2, rangeSet)
+        self.assertNotIn(3, rangeSet)
+        self.assertNotIn(0, rangeSet)
+        rangeSet.add(3)
+        self.assertEqual(rangeSet.ranges(), [(1, 5), (8, 9)])
+        rangeSet.discard(2)
+        rangeSet.discard(20)
+        self.assertEqual(rangeSet.ranges(), [(1, 2), (3, 5), (8, 9)])
+        rangeSet.remove(8)
+        self.assertRaises(KeyError, rangeSet.remove, 8)
+        self.assertFalse(RangeSet())
+
+    def test_operations(self):
+        a = RangeSet.fromRange(0, 10)
+        b = RangeSet([3, 4, 12])
+        self.assertEqual((a | b).ranges(), [(0, 10), (12, 13)])
+        self.assertEqual((a & b).ranges(), [(3, 5)])
+        self.assertEqual((a - b).ranges(), [(0, 3), (5, 10)])
+        self.assertEqual((a ^ b).ranges(), [(0, 3), (5, 10), (12, 13)])
+        self.assertEqual(a | {11}, set(range(10)) | {11})
+        self.assertEqual({1, 11} - a, {11})
+        a |= {10}
+        self.assertEqual(a.ranges(), [(0, 11)])
+        a -= b
+        self.assertEqual(a.ranges(), [(0, 3), (5, 11)])
+
+    def test_equality(self):
+        self.assertEqual(RangeSet([1, 2, 3]), RangeSet.fromRange(1, 4))
+        self.assertEqual(RangeSet([1, 2, 3]), {1, 2, 3})
+        self.assertNotEqual(RangeSet([1, 2]), {1, 2, 3})
+        rangeSet = RangeSet([1, 2])
+        copy = rangeSet.copy()
+        copy.add(5)
+        self.assertNotEqual(rangeSet, copy)
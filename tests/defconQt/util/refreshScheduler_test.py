@@ -0,0 +1,49 @@
+import sys
+import unittest
+from PyQt5.QtWidgets import QApplication, QWidget
+from defconQt.util.refreshScheduler import RefreshScheduler
+
+
+class RefreshSchedulerTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        self.scheduler = RefreshScheduler()
+        self.calls = []
+
+    def test_coalesce(self):
+        widget = QWidget()
+        widget.show()
+        for index in range(5):
+            self.scheduler.schedule(
+                widget, "a", lambda index=index: self.calls.append(index))
+        self.scheduler.schedule(widget, "b", lambda: self.calls.append("b"))
+        self.assertEqual(self.calls, [])
+        self.assertTrue(self.scheduler.isPending(widget, "a"))
+        self.app.processEvents()
+        self.assertEqual(self.calls, [4, "b"])
+        self.assertFalse(self.scheduler.isPending(widget, "a"))
+
+    def test_hidden(self):
+        widget = QWidget()
+        self.scheduler.schedule(widget, "a", lambda: self.calls.append("a"))
+        self.scheduler.flush()
+        self.assertEqual(self.calls, [])
+        self.assertTrue(self.scheduler.isPending(widget, "a"))
+        widget.show()
+        self.assertEqual(self.calls, ["a"])
+        self.assertFalse(self.scheduler.isPending(widget, "a"))
+
+    def test_cancel(self):
+        widget = QWidget()
+        widget.show()
+        self.scheduler.schedule(widget, "a", lambda: self.calls.append("a"))
+        self.scheduler.schedule(widget, "b", lambda: self.calls.append("b"))
+        self.scheduler.cancel(widget, "a")
+        self.scheduler.flush()
+        self.assertEqual(self.calls, ["b"])
+        self.scheduler.schedule(widget, "a", lambda: self.calls.append("a"))
+        self.scheduler.cancel(widget)
+        self.scheduler.flush()
+        self.assertEqual(self.calls, ["b"])